@@ -5,14 +5,20 @@ Orchestrator Endpoint - Multimodal Emotion Analysis
 Automatically detects available inputs and fuses results
 """
 
+import asyncio
 import logging
-from typing import Optional
+from typing import List, Optional
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
-from app.services.text_emotion import analyze_text_emotion
-from app.services.voice_emotion import analyze_voice
-from app.services.face_emotion import analyze_face_emotion
+from app.core.config import env_int
+from app.core.executor import ExecutorSaturated, get_pool
+from app.core.pipeline import Pipeline, register_pipeline
+from app.core.uploads import close_upload, read_upload, register_upload_limit
+from app.services.text_emotion import analyze_text_emotion_async
+from app.services.voice_emotion import analyze_voice_async
+from app.services.face_emotion import analyze_face_emotion_async
 from app.services.fusion import fuse_emotions, get_emotion_explanation
 
 logger = logging.getLogger(__name__)
@@ -23,6 +29,83 @@ router = APIRouter(prefix="/analyze", tags=["Multimodal Analysis"])
 MAX_AUDIO_SIZE = 10 * 1024 * 1024  # 10 MB
 MAX_IMAGE_SIZE = 5 * 1024 * 1024   # 5 MB
 
+# Batch limits
+MAX_BATCH_ITEMS = env_int("AIRA_MAX_BATCH_ITEMS", 256)
+MAX_BATCH_BODY = env_int("AIRA_MAX_BATCH_BODY_MB", 100) * 1024 * 1024
+
+# Whole-request caps, enforced while the body streams in
+register_upload_limit("/analyze", MAX_AUDIO_SIZE + MAX_IMAGE_SIZE)
+register_upload_limit("/analyze/batch", MAX_BATCH_BODY)
+
+
+# ============================================================
+# MULTIMODAL PIPELINE
+# ============================================================
+# Each modality is independent, so all three run at once; fusion waits
+# for them. A failed modality logs and drops out of the fusion.
+
+multimodal_pipeline = register_pipeline(
+    Pipeline("multimodal", inputs=("text", "audio_bytes", "image_bytes"))
+)
+
+
+@multimodal_pipeline.stage("text_scores")
+async def _text_stage(text):
+    if not text:
+        return None
+    try:
+        logger.info("📝 Analyzing text...")
+        text_result = await analyze_text_emotion_async(text)
+        logger.info(f"✅ Text analysis complete: {text_result['emotion']} ({text_result['confidence']:.2f})")
+        return text_result.get("all_scores")
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Text analysis failed: {e}")
+        return None
+
+
+@multimodal_pipeline.stage("voice_scores")
+async def _voice_stage(audio_bytes):
+    if not audio_bytes:
+        return None
+    try:
+        voice_result = await analyze_voice_async(audio_bytes)
+        logger.info(f"✅ Voice analysis complete: {voice_result['emotion']} ({voice_result['confidence']:.2f})")
+        return voice_result.get("all_scores")
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Voice analysis failed: {e}")
+        return None
+
+
+@multimodal_pipeline.stage("face_scores")
+async def _face_stage(image_bytes):
+    if not image_bytes:
+        return None
+    try:
+        face_result = await analyze_face_emotion_async(image_bytes)
+        logger.info(f"✅ Face analysis complete: {face_result['emotion']} ({face_result['confidence']:.2f})")
+        return face_result.get("scores")
+    except ExecutorSaturated:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Face analysis failed: {e}")
+        return None
+
+
+@multimodal_pipeline.stage("fusion")
+async def _fusion_stage(text_scores, voice_scores, face_scores):
+    logger.info("🔄 Fusing emotions from all available modalities...")
+    fusion_result = fuse_emotions(
+        text_scores=text_scores,
+        voice_scores=voice_scores,
+        face_scores=face_scores
+    )
+    fusion_result["explanation"] = get_emotion_explanation(fusion_result["emotion"])
+    return fusion_result
+
 
 @router.post(
     "",
@@ -131,88 +214,183 @@ async def analyze_multimodal(
     
     logger.info(f"📥 Inputs received: {', '.join(available)}")
     
-    # === ANALYZE TEXT ===
-    text_scores = None
-    if text:
-        try:
-            logger.info("📝 Analyzing text...")
-            text_result = analyze_text_emotion(text)
-            text_scores = text_result.get("all_scores")
-            logger.info(f"✅ Text analysis complete: {text_result['emotion']} ({text_result['confidence']:.2f})")
-        except Exception as e:
-            logger.error(f"❌ Text analysis failed: {e}")
-            # Continue with other modalities
-    
-    # === ANALYZE VOICE ===
-    voice_scores = None
-    if audio:
-        try:
+    # === READ UPLOADS ===
+    audio_bytes = image_bytes = None
+    try:
+        if audio:
             logger.info(f"🎤 Analyzing voice: {audio.filename}")
-            
-            # Read audio bytes
-            audio_bytes = await audio.read()
-            
-            # Size check
+            audio_bytes = await read_upload(audio, MAX_AUDIO_SIZE, "Audio file")
             if len(audio_bytes) == 0:
                 logger.warning("⚠️  Empty audio file")
-            elif len(audio_bytes) > MAX_AUDIO_SIZE:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"Audio file too large. Max {MAX_AUDIO_SIZE // (1024*1024)} MB"
-                )
-            else:
-                voice_result = analyze_voice(audio_bytes)
-                voice_scores = voice_result.get("all_scores")
-                logger.info(f"✅ Voice analysis complete: {voice_result['emotion']} ({voice_result['confidence']:.2f})")
-                
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"❌ Voice analysis failed: {e}")
-            # Continue with other modalities
-    
-    # === ANALYZE FACE ===
-    face_scores = None
-    if image:
-        try:
+
+        if image:
             logger.info(f"😊 Analyzing face: {image.filename}")
-            
-            # Read image bytes
-            image_bytes = await image.read()
-            
-            # Size check
+            image_bytes = await read_upload(image, MAX_IMAGE_SIZE, "Image file")
             if len(image_bytes) == 0:
                 logger.warning("⚠️  Empty image file")
-            elif len(image_bytes) > MAX_IMAGE_SIZE:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"Image file too large. Max {MAX_IMAGE_SIZE // (1024*1024)} MB"
-                )
-            else:
-                face_result = analyze_face_emotion(image_bytes)
-                face_scores = face_result.get("all_scores")
-                logger.info(f"✅ Face analysis complete: {face_result['emotion']} ({face_result['confidence']:.2f})")
-                
-        except HTTPException:
-            raise
-        except Exception as e:
-            logger.error(f"❌ Face analysis failed: {e}")
-            # Continue with other modalities
+
+        # === ANALYZE + FUSE (modalities run concurrently) ===
+        run = await multimodal_pipeline.run({
+            "text": text,
+            "audio_bytes": audio_bytes or None,
+            "image_bytes": image_bytes or None,
+        })
+    finally:
+        close_upload(audio_bytes, image_bytes)
+    fusion_result = run.results["fusion"]
     
-    # === FUSE RESULTS ===
-    logger.info("🔄 Fusing emotions from all available modalities...")
+    logger.info("=" * 60)
+    logger.info(f"🎉 FINAL RESULT: {fusion_result['emotion'].upper()} (confidence: {fusion_result['confidence']:.2f})")
+    logger.info("=" * 60)
     
-    fusion_result = fuse_emotions(
+    return JSONResponse(content=fusion_result, headers={"Server-Timing": run.server_timing()})
+
+
+# ============================================================
+# BATCH ANALYSIS
+# ============================================================
+
+class BatchItem(BaseModel):
+    id: Optional[str] = None
+    text: Optional[str] = None
+    audio: Optional[str] = None  # filename of an uploaded part in `files`
+    image: Optional[str] = None  # filename of an uploaded part in `files`
+
+
+_batch_items_adapter = TypeAdapter(List[BatchItem])
+
+
+async def _analyze_batch_item(item: BatchItem, uploads: dict, voice_slots, face_slots) -> dict:
+    """Analyze one batch item; errors stay local to the item"""
+    if not any([item.text, item.audio, item.image]):
+        raise ValueError("Item needs at least one of: text, audio, image")
+
+    audio_bytes = image_bytes = None
+    if item.audio:
+        audio_bytes = uploads.get(item.audio)
+        if audio_bytes is None:
+            raise ValueError(f"Audio part '{item.audio}' was not uploaded")
+        if len(audio_bytes) > MAX_AUDIO_SIZE:
+            raise ValueError(f"Audio part '{item.audio}' too large. Max {MAX_AUDIO_SIZE // (1024*1024)} MB")
+    if item.image:
+        image_bytes = uploads.get(item.image)
+        if image_bytes is None:
+            raise ValueError(f"Image part '{item.image}' was not uploaded")
+        if len(image_bytes) > MAX_IMAGE_SIZE:
+            raise ValueError(f"Image part '{item.image}' too large. Max {MAX_IMAGE_SIZE // (1024*1024)} MB")
+
+    modality_errors = {}
+
+    async def text_task():
+        if not item.text:
+            return None
+        try:
+            return (await analyze_text_emotion_async(item.text)).get("all_scores")
+        except Exception as e:
+            modality_errors["text"] = str(e)
+
+    async def voice_task():
+        if not audio_bytes:
+            return None
+        try:
+            async with voice_slots:
+                return (await analyze_voice_async(audio_bytes)).get("all_scores")
+        except Exception as e:
+            modality_errors["voice"] = str(e)
+
+    async def face_task():
+        if not image_bytes:
+            return None
+        try:
+            async with face_slots:
+                return (await analyze_face_emotion_async(image_bytes)).get("scores")
+        except Exception as e:
+            modality_errors["face"] = str(e)
+
+    text_scores, voice_scores, face_scores = await asyncio.gather(text_task(), voice_task(), face_task())
+
+    requested = sum(bool(x) for x in (item.text, audio_bytes, image_bytes))
+    if requested and len(modality_errors) == requested:
+        raise RuntimeError("; ".join(f"{k}: {v}" for k, v in modality_errors.items()))
+
+    result = fuse_emotions(
         text_scores=text_scores,
         voice_scores=voice_scores,
         face_scores=face_scores
     )
-    
-    # Add explanation
-    fusion_result["explanation"] = get_emotion_explanation(fusion_result["emotion"])
-    
-    logger.info("=" * 60)
-    logger.info(f"🎉 FINAL RESULT: {fusion_result['emotion'].upper()} (confidence: {fusion_result['confidence']:.2f})")
-    logger.info("=" * 60)
-    
-    return JSONResponse(content=fusion_result)
+    result["explanation"] = get_emotion_explanation(result["emotion"])
+    if modality_errors:
+        result["modality_errors"] = modality_errors
+    return result
+
+
+@router.post(
+    "/batch",
+    summary="Batch Multimodal Emotion Analysis",
+    response_description="Per-item results in request order",
+)
+async def analyze_batch(
+    items: str = Form(..., description="JSON list of {id?, text?, audio?, image?}"),
+    files: List[UploadFile] = File(default=[], description="Audio/image parts referenced by filename"),
+):
+    """
+    ## 📦 Batch Emotion Analysis
+
+    Analyze many items in one request (nightly re-scoring, offline queues).
+
+    - **items**: JSON list, e.g.
+      `[{"id": "m1", "text": "I'm fine"}, {"id": "m2", "text": "ok", "audio": "clip2.wav"}]`
+    - **files**: uploaded parts; items reference them by filename
+
+    Text items share micro-batched forward passes; voice and face items
+    are spread over their inference pools without overflowing them.
+
+    Returns `{"count": N, "results": [...]}` in request order. Each result is
+    `{"index", "id", "status": "ok", "result": {...}}` or
+    `{"index", "id", "status": "error", "error": "..."}` - one bad item
+    never fails the whole batch.
+    """
+    try:
+        batch = _batch_items_adapter.validate_json(items)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid items: {e.errors(include_url=False)}")
+
+    if not batch:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(batch) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Too many items. Max {MAX_BATCH_ITEMS} per batch")
+
+    uploads = {}
+    try:
+        for upload in files:
+            if upload.filename in uploads:
+                raise HTTPException(status_code=400, detail=f"Duplicate upload filename: {upload.filename}")
+            # Per-item modality limits are checked later; no part may exceed the largest
+            uploads[upload.filename] = await read_upload(
+                upload, max(MAX_AUDIO_SIZE, MAX_IMAGE_SIZE), f"Part '{upload.filename}'"
+            )
+
+        logger.info(f"📦 Batch analysis: {len(batch)} items, {len(uploads)} files")
+
+        # Never queue more work than a pool can hold; the rest waits here
+        voice_slots = asyncio.Semaphore(get_pool("voice").max_workers)
+        face_slots = asyncio.Semaphore(get_pool("face").max_workers)
+
+        outcomes = await asyncio.gather(
+            *[_analyze_batch_item(item, uploads, voice_slots, face_slots) for item in batch],
+            return_exceptions=True,
+        )
+    finally:
+        close_upload(*uploads.values())
+
+    results = []
+    for index, (item, outcome) in enumerate(zip(batch, outcomes)):
+        if isinstance(outcome, Exception):
+            results.append({"index": index, "id": item.id, "status": "error", "error": str(outcome)})
+        else:
+            results.append({"index": index, "id": item.id, "status": "ok", "result": outcome})
+
+    failed = sum(r["status"] == "error" for r in results)
+    logger.info(f"✅ Batch complete: {len(results) - failed} ok, {failed} failed")
+
+    return JSONResponse(content={"count": len(results), "results": results})
@@ -4,17 +4,20 @@ api/chat.py
 Text-to-Text conversation (NO voice)
 """
 
+import asyncio
+import json
 import logging
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from app.db.database import SessionLocal
-from app.db.models import Conversation
+from app.db.models import Conversation, save_conversation
 
-from app.services.text_emotion import analyze_text_emotion
+from app.services.text_emotion import analyze_text_emotion_async
 from app.services.crisis import detect_crisis
-from app.services.llm_service import generate_response
-from app.services.memory import add_emotion, get_emotion_history
+from app.services.llm_service import generate_response, stream_response
+from app.services.memory import add_emotion, aget_emotion_history
 
 logger = logging.getLogger(__name__)
 
@@ -40,14 +43,14 @@ async def chat(data: ChatInput):
         }
 
     # 🧠 Emotion Detection
-    emotion_result = analyze_text_emotion(data.text)
+    emotion_result = await analyze_text_emotion_async(data.text)
     emotion = emotion_result["emotion"]
 
     add_emotion("demo_user", emotion)
-    emotion_history = get_emotion_history("demo_user")
+    emotion_history = await aget_emotion_history("demo_user")
 
     # 🤖 LLM Response
-    assistant_reply = generate_response(
+    assistant_reply = await generate_response(
         data.text,
         emotion,
         emotion_history,
@@ -73,6 +76,71 @@ async def chat(data: ChatInput):
     }
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# ✅ STREAMING CHAT ENDPOINT (Server-Sent Events)
+@router.post("/stream", summary="Text-to-Text conversation, streamed over SSE")
+async def chat_stream(data: ChatInput):
+    """
+    Same flow as `/api/chat`, but the reply is streamed as it is generated.
+
+    Events (`text/event-stream`):
+    - `meta`:  `{"emotion": ...}` right away
+    - `token`: `{"token": ...}` for every text delta
+    - `done`:  `{"emotion": ..., "response_text": <full reply>}`
+    - `error`: `{"detail": ...}` if generation fails mid-way
+
+    Memory and the SQLite row are written after the stream ends.
+    """
+
+    logger.info(f"📝 Text mode (stream) - Received: {data.text[:50]}...")
+
+    crisis_data = detect_crisis(data.text)
+    if crisis_data["is_crisis"]:
+        async def crisis_events():
+            yield _sse("meta", {"emotion": "crisis"})
+            yield _sse("token", {"token": crisis_data["message"]})
+            yield _sse("done", {"emotion": "crisis", "response_text": crisis_data["message"]})
+
+        return StreamingResponse(crisis_events(), media_type="text/event-stream")
+
+    emotion_result = await analyze_text_emotion_async(data.text)
+    emotion = emotion_result["emotion"]
+
+    add_emotion("demo_user", emotion)
+    emotion_history = await aget_emotion_history("demo_user")
+
+    async def events():
+        yield _sse("meta", {"emotion": emotion})
+
+        parts = []
+        try:
+            async for token in stream_response(data.text, emotion, emotion_history, user_id="demo_user"):
+                parts.append(token)
+                yield _sse("token", {"token": token})
+        except Exception as e:
+            logger.error(f"❌ LLM stream failed: {e}")
+            yield _sse("error", {"detail": "Reply generation failed"})
+            return
+
+        assistant_reply = "".join(parts)
+        try:
+            await asyncio.to_thread(save_conversation, data.text, assistant_reply, emotion)
+            logger.info("✅ Streamed response finished & saved to DB")
+        except Exception as e:
+            logger.error(f"Database save failed: {e}")
+
+        yield _sse("done", {"emotion": emotion, "response_text": assistant_reply})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ✅ HISTORY ENDPOINT (Outside chat function)
 @router.get("/history", summary="Get all chat history")
 def get_history():
@@ -4,11 +4,18 @@ api/face_emotion.py
 Face emotion detection endpoint
 """
 
+import asyncio
 import logging
-from fastapi import APIRouter, UploadFile, File, HTTPException
+import math
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 
-from app.services.face_emotion import analyze_face_emotion
+from app.core.executor import ExecutorSaturated
+from app.core.uploads import close_upload, read_upload, register_upload_limit
+from app.services.face_emotion import FACE_DETECTOR, FACE_DETECTORS, BoxOutsideImage, analyze_face_emotion_async
+from app.services.face_stream import DETECT_EVERY, FaceStream
+from app.services.image_decode import ImageTooLarge
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +23,7 @@ router = APIRouter(prefix="/face-emotion", tags=["Face Emotion Analysis"])
 
 # Max accepted file size: 5 MB
 MAX_FILE_SIZE_BYTES = 5 * 1024 * 1024
+register_upload_limit("/face-emotion", MAX_FILE_SIZE_BYTES)
 
 # Accepted image types
 ACCEPTED_IMAGE_TYPES = {
@@ -27,6 +35,20 @@ ACCEPTED_IMAGE_TYPES = {
 }
 
 
+def _parse_bbox(bbox: str):
+    """'x,y,w,h' (pixels in the uploaded image) -> tuple of ints"""
+    try:
+        values = [float(v) for v in bbox.split(",")]
+        if len(values) != 4 or not all(math.isfinite(v) for v in values):
+            raise ValueError(bbox)
+        x, y, w, h = (int(v) for v in values)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be 'x,y,w,h'")
+    if w <= 0 or h <= 0 or x < 0 or y < 0:
+        raise HTTPException(status_code=400, detail="bbox needs x,y >= 0 and w,h > 0")
+    return x, y, w, h
+
+
 @router.post(
     "",
     summary="Detect emotion from facial image",
@@ -36,7 +58,15 @@ async def face_emotion(
     file: UploadFile = File(
         ...,
         description="Image file with face (jpg / png / webp). Max 5 MB."
-    )
+    ),
+    detector: Optional[str] = Form(
+        None,
+        description=f"Face detector: {', '.join(FACE_DETECTORS)} (default: {FACE_DETECTOR})"
+    ),
+    bbox: Optional[str] = Form(
+        None,
+        description="Face box 'x,y,w,h' from the client; skips detection"
+    ),
 ):
     """
     Face Emotion Detection
@@ -60,14 +90,23 @@ async def face_emotion(
     
     logger.info(f"Received image file: {file.filename} ({file.content_type})")
     
+    if detector and detector not in FACE_DETECTORS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown detector. Choose from: {', '.join(FACE_DETECTORS)}"
+        )
+    face_box = _parse_bbox(bbox) if bbox else None
+    
     # Validate content type (soft check)
     content_type = file.content_type or ""
     if content_type and content_type not in ACCEPTED_IMAGE_TYPES:
         logger.warning(f"Unexpected content type: {content_type}")
     
-    # Read file bytes
+    # Read file bytes (chunked, 413 past the limit; large files stay memory-mapped)
     try:
-        image_bytes = await file.read()
+        image_bytes = await read_upload(file, MAX_FILE_SIZE_BYTES, "Image")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to read uploaded file: {e}")
         raise HTTPException(
@@ -82,17 +121,11 @@ async def face_emotion(
             detail="Uploaded image file is empty."
         )
     
-    if len(image_bytes) > MAX_FILE_SIZE_BYTES:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum allowed size is {MAX_FILE_SIZE_BYTES // (1024*1024)} MB."
-        )
-    
     logger.info(f"File size: {len(image_bytes) / 1024:.2f} KB")
     
     # Run emotion analysis
     try:
-        result = analyze_face_emotion(image_bytes)
+        result = await analyze_face_emotion_async(image_bytes, detector=detector, bbox=face_box)
         
         logger.info(f"Analysis complete: {result.get('emotion')} (confidence: {result.get('confidence', 0):.2f})")
         
@@ -100,10 +133,21 @@ async def face_emotion(
             "filename": file.filename,
             "emotion": result.get("emotion"),
             "confidence": result.get("confidence"),
-            "all_scores": result.get("all_scores", {}),
-            "face_detected": result.get("face_detected", True)
+            "all_scores": result.get("scores", {}),
+            "face_detected": result.get("face_detected", True),
+            "box": result.get("box"),
+            "detector": result.get("detector")
         })
         
+    except ExecutorSaturated:
+        raise
+
+    except ImageTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    except BoxOutsideImage as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     except ValueError as ve:
         logger.error(f"Validation error: {ve}")
         raise HTTPException(status_code=422, detail=str(ve))
@@ -113,4 +157,65 @@ async def face_emotion(
         raise HTTPException(
             status_code=500,
             detail="Internal server error during face analysis."
-        )
\ No newline at end of file
+        )
+
+    finally:
+        close_upload(image_bytes)
+
+# ============================================================
+# LIVE FACE (WebSocket)
+# ============================================================
+
+@router.websocket("/stream")
+async def face_stream_endpoint(
+    websocket: WebSocket,
+    detector: Optional[str] = Query(None),
+    detect_every: int = Query(DETECT_EVERY, ge=1, le=100),
+):
+    """
+    Continuous mood feedback from a webcam.
+
+    Client → server: binary messages, one JPEG/PNG/WebP frame each.
+    Server → client (JSON): `rate` (suggested frames per second - send
+    no faster), `emotion` (smoothed scores, tracked box), `error`. After
+    repeated failed frames a `fatal` error is sent and the socket closed.
+
+    Full face detection runs every `detect_every` frames or when tracking
+    is lost; frames arriving while the server is busy are dropped, newest
+    first kept.
+    """
+    await websocket.accept()
+    send_lock = asyncio.Lock()
+
+    async def emit(event: dict):
+        async with send_lock:
+            try:
+                await websocket.send_json(event)
+                if event.get("fatal"):
+                    await websocket.close(code=1011)
+            except (WebSocketDisconnect, RuntimeError):
+                pass  # client went away; the receive loop notices
+
+    try:
+        stream = FaceStream(emit, detector=detector, detect_every=detect_every)
+    except ValueError as e:
+        await emit({"type": "error", "detail": str(e)})
+        await websocket.close(code=1008)
+        return
+
+    logger.info(f"📷 Face stream opened ({stream.mode}, detect every {stream.detect_every})")
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                if len(message["bytes"]) > MAX_FILE_SIZE_BYTES:
+                    await emit({"type": "error", "detail": "Frame too large"})
+                    continue
+                stream.submit(message["bytes"])
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await stream.aclose()
+        logger.info("📷 Face stream closed")
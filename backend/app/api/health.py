@@ -1,4 +1,15 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.core.batcher import batcher_stats
+from app.core.cache import cache_stats
+from app.core.config import env_str
+from app.core.executor import executor_stats
+from app.core.model_registry import is_ready, model_status
+from app.core.pipeline import pipeline_stats
+from app.services.face_stream import face_stream_stats
+from app.services.llm_client import llm_client
+from app.services.voice_stream import stream_stats
 
 router = APIRouter()
 
@@ -8,3 +19,67 @@ def health():
         "status": "ok",
         "service": "AIRA backend is running 🚀"
     }
+
+
+@router.get("/health/ready")
+def ready():
+    """Readiness probe: 200 only once every required model is loaded and warm"""
+    required = [m.strip() for m in env_str("AIRA_REQUIRED_MODELS", "").split(",") if m.strip()]
+    models = model_status()
+    ready_now = is_ready(required or None)
+
+    return JSONResponse(
+        status_code=200 if ready_now else 503,
+        content={
+            "status": "ready" if ready_now else "not_ready",
+            "models": models,
+        },
+    )
+
+
+@router.get("/health/models")
+def models():
+    """Per-model state, load/warmup time and memory estimate"""
+    return model_status()
+
+
+@router.get("/health/executors")
+def executors():
+    """Queue depth, latency and rejection counters per inference pool"""
+    return executor_stats()
+
+
+@router.get("/health/batchers")
+def batchers():
+    """Batch counts and batch-size histograms per micro-batcher"""
+    return batcher_stats()
+
+
+@router.get("/health/caches")
+def caches():
+    """Size, hit rate and eviction counters per result cache"""
+    return cache_stats()
+
+
+@router.get("/health/llm")
+def llm():
+    """Upstream LLM latency percentiles, retries and errors"""
+    return llm_client.stats()
+
+
+@router.get("/health/pipelines")
+def pipelines():
+    """Per-stage timing, skips and errors for the endpoint pipelines"""
+    return pipeline_stats()
+
+
+@router.get("/health/voice-stream")
+def voice_stream():
+    """Live voice sessions, partial/emotion update counts and finalize latency"""
+    return stream_stats()
+
+
+@router.get("/health/face-stream")
+def face_stream():
+    """Live face sessions: frames, drops, detections vs tracked, frame latency"""
+    return face_stream_stats()
@@ -0,0 +1,75 @@
+"""
+api/tts.py
+----------
+Streaming Text-to-Speech
+Audio is sent as chunked mp3 while it is being synthesized
+"""
+
+import logging
+from typing import Optional
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.services.tts_service import DEFAULT_LANG, DEFAULT_TLD, TTS_LANGS, TTS_TLDS, read_stream_handle, stream_audio
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/tts", tags=["Text-to-Speech"])
+
+MAX_TTS_CHARS = 2000
+
+
+class TTSInput(BaseModel):
+    text: str
+    lang: Optional[str] = DEFAULT_LANG
+    tld: Optional[str] = DEFAULT_TLD
+
+
+def _rest(first: bytes, chunks):
+    yield first
+    try:
+        yield from chunks
+    except Exception as e:
+        # Headers are already sent; the client just sees a short stream
+        logger.error(f"❌ TTS stream failed mid-way: {e}")
+
+
+def _audio_response(text: str, lang: str, tld: str) -> StreamingResponse:
+    """Wait for the first segment (so upstream errors can still be a 502), then stream"""
+    chunks = stream_audio(text, lang, tld)
+    try:
+        first = next(chunks, b"")
+    except Exception as e:
+        logger.error(f"❌ TTS stream failed: {e}")
+        raise HTTPException(status_code=502, detail="Speech synthesis failed")
+
+    return StreamingResponse(_rest(first, chunks), media_type="audio/mpeg")
+
+
+@router.get("/stream/{handle}", summary="Stream reply audio from a handle")
+def stream_from_handle(handle: str):
+    """
+    Streams the mp3 for a handle returned as `response_audio_url`
+    by the voice chat endpoint. Handles expire after a few minutes.
+    """
+    try:
+        text, lang, tld = read_stream_handle(handle)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown audio stream: {e}")
+
+    return _audio_response(text, lang, tld)
+
+
+@router.post("/stream", summary="Stream synthesized speech for text")
+def stream_text(data: TTSInput):
+    if not data.text.strip():
+        raise HTTPException(status_code=400, detail="Text is empty")
+    if len(data.text) > MAX_TTS_CHARS:
+        raise HTTPException(status_code=413, detail=f"Text too long. Max {MAX_TTS_CHARS} characters")
+    if data.lang not in TTS_LANGS:
+        raise HTTPException(status_code=400, detail=f"Unsupported language '{data.lang}'")
+    if data.tld not in TTS_TLDS:
+        raise HTTPException(status_code=400, detail=f"Unsupported voice '{data.tld}'. Choose from: {', '.join(sorted(TTS_TLDS))}")
+
+    return _audio_response(data.text, data.lang, data.tld)
@@ -4,25 +4,35 @@ api/voice_emotion.py
 Voice-to-Voice conversation (with text for history)
 """
 
+import asyncio
+import json
 import logging
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from typing import Optional
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 
-from app.services.voice_emotion import analyze_voice
-from app.services.text_emotion import analyze_text_emotion
+from app.core.config import env_bool
+from app.core.executor import ExecutorSaturated
+from app.core.pipeline import Halt, Pipeline, register_pipeline
+from app.core.uploads import close_upload, read_upload, register_upload_limit
+from app.services.voice_emotion import analyze_voice_async
+from app.services.stt import DEFAULT_STT_PROFILE, STT_PROFILES
+from app.services.voice_stream import STREAM_FORMATS, STREAM_SR, STREAM_STT_PROFILE, VoiceStream
+from app.services.text_emotion import analyze_text_emotion_async
 from app.services.crisis import detect_crisis
 from app.services.llm_service import generate_response
-from app.services.memory import add_emotion, get_emotion_history
-from app.services.tts_service import generate_audio
+from app.services.memory import add_emotion, aget_emotion_history
+from app.services.tts_service import cached_audio_url, reply_audio_url
+from app.services.local_responses import LLM_FAILURE_RESPONSE, NO_SPEECH_RESPONSE
 
-from app.db.database import SessionLocal
-from app.db.models import Conversation
+from app.db.models import save_conversation
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/analyze-voice", tags=["Voice Chat"])
 
 MAX_FILE_SIZE_BYTES = 10 * 1024 * 1024
+register_upload_limit("/analyze-voice", MAX_FILE_SIZE_BYTES)
 
 ACCEPTED_AUDIO_TYPES = {
     "audio/wav", "audio/x-wav", "audio/mpeg", "audio/mp3",
@@ -32,132 +42,270 @@ ACCEPTED_AUDIO_TYPES = {
 }
 
 
-@router.post("", summary="Voice-to-Voice conversation")
-async def analyze_voice_endpoint(
-    file: UploadFile = File(..., description="Audio file. Max 10 MB."),
-):
-    """
-    Voice Chat Mode
-    
-    User speaks → AI replies with voice + text
-    """
-
-    logger.info(f"🎤 Voice mode - Received audio: {file.filename}")
-
-    # Validate content type
-    content_type = file.content_type or ""
-    if content_type and content_type not in ACCEPTED_AUDIO_TYPES:
-        logger.warning(f"Unexpected content type: {content_type}")
+# ============================================================
+# VOICE CHAT PIPELINE
+# ============================================================
+#   voice ─► transcription ─► crisis ─► reply ─► reply_audio_url
+#                 │                       └────► save (sink)
+#                 └─► text_emotion
+#
+# text_emotion runs alongside the LLM call instead of before it, and
+# reply audio is prepared while the conversation is written to the DB.
+# Live streams enter with `voice_result` already computed.
 
-    # Read file
-    try:
-        audio_bytes = await file.read()
-    except Exception:
-        raise HTTPException(status_code=400, detail="Could not read file")
+voice_chat_pipeline = register_pipeline(
+    Pipeline("voice_chat", inputs=("audio_bytes", "stt_profile", "user_id", "voice_result"))
+)
 
-    if len(audio_bytes) == 0:
-        raise HTTPException(status_code=400, detail="Empty audio file")
+# The reply is driven by the voice emotion; the transcript's text emotion
+# is informational only, so it can be switched off to save a model call
+VOICE_CHAT_OUTPUTS = ("reply_audio_url",) + (
+    ("text_emotion",) if env_bool("AIRA_VOICE_TEXT_EMOTION", True) else ()
+)
 
-    if len(audio_bytes) > MAX_FILE_SIZE_BYTES:
-        raise HTTPException(
-            status_code=413,
-            detail="File too large. Max 10 MB"
-        )
 
-    # ========================================
-    # STEP 1: Voice Analysis (STT + Emotion)
-    # ========================================
+# STEP 1: Voice Analysis (STT + Emotion)
+@voice_chat_pipeline.stage("voice")
+async def _voice_stage(audio_bytes, stt_profile, voice_result):
+    if voice_result is not None:
+        return voice_result
     try:
-        voice_result = analyze_voice(audio_bytes)
-        transcription = voice_result.get("transcription", "")
-        voice_emotion = voice_result["emotion"]
+        return await analyze_voice_async(audio_bytes, stt_profile=stt_profile)
+    except ExecutorSaturated:
+        raise
     except Exception:
         raise HTTPException(status_code=500, detail="Voice analysis failed")
 
+
+@voice_chat_pipeline.stage("transcription")
+async def _transcription_stage(voice):
+    if voice.get("transcription_failed"):
+        raise HTTPException(status_code=503, detail="Speech recognition failed, please try again")
+    transcription = voice.get("transcription", "")
     if not transcription.strip():
-        return JSONResponse(content={
+        raise Halt({
             "transcription": "",
-            "voice_emotion": voice_emotion,
-            "confidence": voice_result.get("confidence"),
-            "response_text": "I couldn't hear what you said. Could you try again?",
-            "response_audio_url": None
+            "voice_emotion": voice["emotion"],
+            "confidence": voice.get("confidence"),
+            "response_text": NO_SPEECH_RESPONSE,
+            "response_audio_url": cached_audio_url(NO_SPEECH_RESPONSE)
         })
+    return transcription
 
-    # ========================================
-    # STEP 2: Crisis Check
-    # ========================================
-    crisis_data = detect_crisis(transcription)
 
+# STEP 2: Crisis Check
+@voice_chat_pipeline.stage("crisis")
+async def _crisis_stage(voice, transcription):
+    crisis_data = detect_crisis(transcription)
     if crisis_data["is_crisis"]:
-        crisis_audio_url = generate_audio(crisis_data["message"])
-
-        return JSONResponse(content={
+        # Pre-rendered at startup, so normally no network call here
+        raise Halt({
             "transcription": transcription,
-            "voice_emotion": voice_emotion,
+            "voice_emotion": voice["emotion"],
             "emotion": "crisis",
             "response_text": crisis_data["message"],
-            "response_audio_url": crisis_audio_url,
+            "response_audio_url": await reply_audio_url(crisis_data["message"]),
             "is_crisis": True
         })
+    return False
 
-    # ========================================
-    # STEP 3: Emotion + LLM Response
-    # ========================================
-    try:
-        text_emotion_result = analyze_text_emotion(transcription)
-        text_emotion = text_emotion_result["emotion"]
 
-        final_emotion = voice_emotion
+@voice_chat_pipeline.stage("text_emotion")
+async def _text_emotion_stage(transcription):
+    try:
+        return (await analyze_text_emotion_async(transcription))["emotion"]
+    except Exception:
+        return "neutral"
 
-        add_emotion("demo_user", final_emotion)
-        emotion_history = get_emotion_history("demo_user")
 
-        llm_response = generate_response(
+# STEP 3: LLM Response (driven by the voice emotion)
+@voice_chat_pipeline.stage("reply")
+async def _reply_stage(voice, transcription, crisis, user_id):
+    try:
+        add_emotion(user_id, voice["emotion"])
+        emotion_history = await aget_emotion_history(user_id)
+        return await generate_response(
             transcription,
-            final_emotion,
+            voice["emotion"],
             emotion_history,
-            user_id="demo_user"
+            user_id=user_id
         )
-
     except Exception:
-        llm_response = "I heard you, but I'm having trouble responding right now."
-        text_emotion = "neutral"
+        return LLM_FAILURE_RESPONSE
 
-    # ========================================
-    # STEP 4: Generate Voice Response
-    # ========================================
+
+# STEP 4: Generate Voice Response
+@voice_chat_pipeline.stage("reply_audio_url")
+async def _reply_audio_stage(reply):
     try:
-        response_audio_url = generate_audio(llm_response)
+        # Stream handle (or cached file) - synthesis happens while the client plays it
+        return await reply_audio_url(reply)
     except Exception:
-        response_audio_url = None
+        return None
 
-    # ========================================
-    # STEP 5: Save Conversation to SQLite
-    # ========================================
+
+# STEP 5: Save Conversation to SQLite
+@voice_chat_pipeline.stage("save", sink=True)
+async def _save_stage(voice, transcription, reply):
     try:
-        db = SessionLocal()
-        conversation = Conversation(
-            user_message=transcription,
-            assistant_message=llm_response,
-            emotion=voice_emotion
-        )
-        db.add(conversation)
-        db.commit()
-        db.close()
+        await asyncio.to_thread(save_conversation, transcription, reply, voice["emotion"])
         logger.info("💾 Conversation saved to DB")
     except Exception as e:
         logger.error(f"Database save failed: {e}")
 
+
+@router.post("", summary="Voice-to-Voice conversation")
+async def analyze_voice_endpoint(
+    file: UploadFile = File(..., description="Audio file. Max 10 MB."),
+    stt_profile: Optional[str] = Query(
+        None,
+        description=f"Speech-to-text profile: {', '.join(STT_PROFILES)} (default: {DEFAULT_STT_PROFILE})",
+    ),
+):
+    """
+    Voice Chat Mode
+    
+    User speaks → AI replies with voice + text
+    """
+
+    logger.info(f"🎤 Voice mode - Received audio: {file.filename}")
+
+    if stt_profile and stt_profile not in STT_PROFILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown stt_profile. Choose from: {', '.join(STT_PROFILES)}"
+        )
+
+    # Validate content type
+    content_type = file.content_type or ""
+    if content_type and content_type not in ACCEPTED_AUDIO_TYPES:
+        logger.warning(f"Unexpected content type: {content_type}")
+
+    # Read file (chunked, 413 past the limit; large files stay memory-mapped)
+    try:
+        audio_bytes = await read_upload(file, MAX_FILE_SIZE_BYTES)
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=400, detail="Could not read file")
+
+    if len(audio_bytes) == 0:
+        raise HTTPException(status_code=400, detail="Empty audio file")
+
+    try:
+        run = await voice_chat_pipeline.run(
+            {"audio_bytes": audio_bytes, "stt_profile": stt_profile, "user_id": "demo_user", "voice_result": None},
+            want=VOICE_CHAT_OUTPUTS,
+        )
+    finally:
+        close_upload(audio_bytes)
+    return JSONResponse(content=_reply_body(run), headers={"Server-Timing": run.server_timing()})
+
+
+def _reply_body(run) -> dict:
+    # No speech / crisis: the pipeline stopped early with the final body
+    if run.halted:
+        return run.halt_value
+
+    voice_result = run.results["voice"]
+    text_emotion = run.results.get("text_emotion")
+
     # ========================================
     # FINAL RESPONSE
     # ========================================
-    return JSONResponse(content={
-        "transcription": transcription,
-        "voice_emotion": voice_emotion,
+    return {
+        "transcription": run.results["transcription"],
+        "voice_emotion": voice_result["emotion"],
         "text_emotion": text_emotion,
         "confidence": voice_result.get("confidence"),
-        "response_text": llm_response,
-        "response_audio_url": response_audio_url,
+        "response_text": run.results["reply"],
+        "response_audio_url": run.results["reply_audio_url"],
         "features": voice_result.get("features"),
         "all_scores": voice_result.get("all_scores")
-    })
\ No newline at end of file
+    }
+
+
+# ============================================================
+# LIVE VOICE (WebSocket)
+# ============================================================
+
+@router.websocket("/stream")
+async def voice_stream_endpoint(
+    websocket: WebSocket,
+    audio_format: str = Query("pcm16", alias="format"),
+    sample_rate: int = Query(STREAM_SR),
+    stt_profile: Optional[str] = Query(
+        None,
+        description=f"Speech-to-text profile: {', '.join(STT_PROFILES)} (default: {STREAM_STT_PROFILE})",
+    ),
+    reply: bool = Query(True),
+):
+    """
+    Live voice chat.
+
+    Query: `format` = pcm16 | f32 (mono 16 kHz little-endian) | opus (one
+    packet per message), `stt_profile`, `reply` (run the voice chat reply
+    after each utterance).
+
+    Client → server: binary audio frames (20-100 ms each works well);
+    text `{"type": "end"}` closes the current utterance immediately.
+
+    Server → client (JSON): `ready`, `speech_start`, `partial` (stable +
+    tentative transcript), `emotion` (sliding window), `final` (per
+    utterance), `reply` (same body as POST /analyze-voice), `error`.
+    """
+    await websocket.accept()
+    send_lock = asyncio.Lock()
+
+    async def emit(event: dict):
+        async with send_lock:
+            try:
+                await websocket.send_json(event)
+            except (WebSocketDisconnect, RuntimeError):
+                pass  # client went away; the receive loop notices
+
+    async def on_final(result: dict):
+        if not result["transcription"].strip():
+            return  # background noise tripped the VAD
+        try:
+            run = await voice_chat_pipeline.run(
+                {"audio_bytes": None, "stt_profile": stream.profile.name, "user_id": "demo_user",
+                 "voice_result": result},
+                want=VOICE_CHAT_OUTPUTS,
+            )
+            await emit({"type": "reply", **_reply_body(run), "timings": run.timings})
+        except Exception as e:
+            logger.error(f"Stream reply failed: {e}")
+            await emit({"type": "error", "detail": "Reply failed"})
+
+    try:
+        stream = VoiceStream(emit, on_final if reply else None, audio_format=audio_format,
+                             sample_rate=sample_rate, stt_profile=stt_profile)
+    except ValueError as e:
+        await emit({"type": "error", "detail": str(e)})
+        await websocket.close(code=1008)
+        return
+
+    logger.info(f"🎙️ Voice stream opened ({audio_format}, STT {stream.profile.name})")
+    await emit({"type": "ready", "format": audio_format, "sample_rate": STREAM_SR,
+                "stt_profile": stream.profile.name, "formats": list(STREAM_FORMATS)})
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes") is not None:
+                await stream.feed(message["bytes"])
+            elif message.get("text"):
+                try:
+                    control = json.loads(message["text"])
+                except ValueError:
+                    control = {}
+                if control.get("type") == "end":
+                    await stream.flush()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await stream.aclose()
+        logger.info("🎙️ Voice stream closed")
@@ -0,0 +1,123 @@
+"""
+core/batcher.py
+---------------
+Dynamic Micro-Batching
+Collects concurrent requests for a few ms (or N items) and runs one
+batched call in an inference pool, handing each caller its own slice
+"""
+
+import asyncio
+import logging
+import threading
+
+from app.core.executor import run_in_pool
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Event-loop side batch collector.
+
+    `process_batch(items) -> results` is a blocking function that must
+    return one result per item, in order; it runs in `pool_name`.
+    """
+
+    def __init__(self, name: str, process_batch, pool_name: str,
+                 max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        self.name = name
+        self.process_batch = process_batch
+        self.pool_name = pool_name
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+        # Stats
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.failed_batches = 0
+        self.size_histogram = {}
+
+    async def submit(self, item):
+        """Queue one item and await its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            del self._pending[: self.max_batch_size]
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch):
+        # Callers that already gave up (client disconnected) are dropped
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+
+        self._record(len(batch))
+        try:
+            results = await run_in_pool(self.pool_name, self.process_batch, [item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name}: got {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            with self._lock:
+                self.failed_batches += 1
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _record(self, size: int):
+        with self._lock:
+            self.batches += 1
+            self.items += size
+            self.size_histogram[size] = self.size_histogram.get(size, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pool": self.pool_name,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+                "batches": self.batches,
+                "items": self.items,
+                "failed_batches": self.failed_batches,
+                "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+                "queued": len(self._pending),
+                "batch_size_histogram": dict(sorted(self.size_histogram.items())),
+            }
+
+
+_batchers = {}
+
+
+def register_batcher(batcher: MicroBatcher) -> MicroBatcher:
+    _batchers[batcher.name] = batcher
+    return batcher
+
+
+def batcher_stats() -> dict:
+    return {name: batcher.stats() for name, batcher in _batchers.items()}
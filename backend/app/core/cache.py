@@ -0,0 +1,308 @@
+"""
+core/cache.py
+-------------
+Bounded Result Caches
+Thread-safe LRU with optional TTL, content-addressed memory+disk cache
+and single-flight coalescing of identical concurrent requests
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import env_int, env_str
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Size-bounded LRU; entries older than `ttl` seconds (if > 0) expire"""
+
+    def __init__(self, name: str, max_entries: int = 1024, ttl: float = 0.0):
+        self.name = name
+        self.max_entries = max(0, max_entries)
+        self.ttl = max(0.0, ttl)
+
+        self._data = OrderedDict()  # key -> (value, expires_at); expires_at 0 = never
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at and time.monotonic() > expires_at:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key, default=None):
+        """Like get(), without touching recency or the hit/miss counters"""
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or (entry[1] and time.monotonic() > entry[1]):
+                return default
+            return entry[0]
+
+    def set(self, key, value, ttl: float = None):
+        """`ttl` overrides the cache-wide TTL for this entry (e.g. short-lived negative entries)"""
+        if self.max_entries == 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl if ttl > 0 else 0.0)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_caches = {}
+
+
+def register_cache(cache):
+    """Make a cache (anything with .name and .stats()) visible in /health/caches"""
+    _caches[cache.name] = cache
+    return cache
+
+
+def cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one in-flight computation"""
+
+    def __init__(self):
+        self._inflight = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key, compute):
+        """`compute` is a zero-arg coroutine function, run once per key at a time"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+
+        # shield: one waiter disconnecting must not cancel the shared work
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+
+def content_key(data: bytes, *config) -> str:
+    """Hash of the input bytes plus everything that can change the result"""
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(repr(config).encode())
+    digest.update(b"\0")
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class ContentCache:
+    """
+    Content-addressed result cache: in-memory LRU in front of an optional
+    on-disk JSON store bounded by total bytes (least recently used files
+    are deleted first), plus single-flight coalescing of misses.
+    """
+
+    def __init__(self, name: str, max_entries: int = 512, disk_dir: str = None, max_disk_bytes: int = 0):
+        self.name = name
+        self.memory = LRUCache(name, max_entries=max_entries)
+        self.flight = SingleFlight()
+
+        self.disk_dir = disk_dir if disk_dir and max_disk_bytes > 0 else None
+        self.max_disk_bytes = max_disk_bytes
+
+        self._disk_index = OrderedDict()  # key -> size, oldest first
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_writes = 0
+        self.disk_evictions = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._scan_disk()
+
+    # ---------- disk tier ----------
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _scan_disk(self):
+        found = []
+        for root, _, files in os.walk(self.disk_dir):
+            for filename in files:
+                if filename.endswith(".json"):
+                    path = os.path.join(root, filename)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    found.append((stat.st_mtime, filename[:-5], stat.st_size))
+
+        with self._disk_lock:
+            for _, key, size in sorted(found):
+                self._disk_index[key] = size
+                self._disk_bytes += size
+            self._evict_disk()
+
+    def _evict_disk(self):
+        # caller holds _disk_lock
+        while self._disk_bytes > self.max_disk_bytes and self._disk_index:
+            key, size = self._disk_index.popitem(last=False)
+            self._disk_bytes -= size
+            self.disk_evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _disk_get(self, key: str):
+        with self._disk_lock:
+            if key not in self._disk_index:
+                return None
+            self._disk_index.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._disk_lock:
+                self._disk_bytes -= self._disk_index.pop(key, 0)
+            return None
+        self.disk_hits += 1
+        return value
+
+    def _disk_set(self, key: str, value):
+        path = self._path(key)
+        payload = json.dumps(value).encode("utf-8")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+
+        with self._disk_lock:
+            self._disk_bytes -= self._disk_index.pop(key, 0)
+            self._disk_index[key] = len(payload)
+            self._disk_bytes += len(payload)
+            self.disk_writes += 1
+            self._evict_disk()
+
+    # ---------- public API ----------
+
+    def get(self, key: str):
+        value = self.memory.get(key)
+        if value is None and self.disk_dir:
+            value = self._disk_get(key)
+            if value is not None:
+                self.memory.set(key, value)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value):
+        value = copy.deepcopy(value)
+        self.memory.set(key, value)
+        if self.disk_dir:
+            self._disk_set(key, value)
+
+    async def get_or_compute(self, key: str, compute, cacheable=None):
+        """
+        Cached value for key, or await compute() once for all concurrent
+        callers and store the result if cacheable(result) allows it.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        async def leader():
+            result = await compute()
+            if cacheable is None or cacheable(result):
+                self.set(key, result)
+            return result
+
+        return copy.deepcopy(await self.flight.do(key, leader))
+
+    def stats(self) -> dict:
+        stats = self.memory.stats()
+        with self._disk_lock:
+            stats["disk"] = {
+                "enabled": bool(self.disk_dir),
+                "entries": len(self._disk_index),
+                "bytes": self._disk_bytes,
+                "max_bytes": self.max_disk_bytes,
+                "hits": self.disk_hits,
+                "writes": self.disk_writes,
+                "evictions": self.disk_evictions,
+            }
+        stats["single_flight"] = self.flight.stats()
+        return stats
+
+
+def make_result_cache(name: str) -> ContentCache:
+    """ContentCache sized from AIRA_RESULT_CACHE_* settings, registered for stats"""
+    return register_cache(ContentCache(
+        name,
+        max_entries=env_int("AIRA_RESULT_CACHE_SIZE", 512),
+        disk_dir=os.path.join(env_str("AIRA_RESULT_CACHE_DIR", "cache/results"), name),
+        max_disk_bytes=env_int("AIRA_RESULT_CACHE_DISK_MB", 256) * 1024 * 1024,
+    ))
@@ -1,2 +1,34 @@
+import os
+
 from dotenv import load_dotenv
 load_dotenv()
+
+
+def env_str(name: str, default: str) -> str:
+    """Read a string setting from the environment"""
+    value = os.getenv(name)
+    return value if value not in (None, "") else default
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting, falling back to default on bad values"""
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting, falling back to default on bad values"""
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def env_bool(name: str, default: bool) -> bool:
+    """Read a boolean setting (1/true/yes/on)"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
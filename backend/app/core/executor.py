@@ -0,0 +1,189 @@
+"""
+core/executor.py
+----------------
+Bounded Inference Executors
+Runs blocking model calls off the event loop, one pool per model
+"""
+
+import asyncio
+import logging
+import mmap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from app.core.config import env_int, env_str
+
+logger = logging.getLogger(__name__)
+
+# name -> (kind, max_workers, max_queue)
+# Override per pool with AIRA_POOL_<NAME>_KIND / _WORKERS / _QUEUE
+POOL_DEFAULTS = {
+    "text": ("thread", 2, 32),    # distilroberta classifier
+    "voice": ("thread", 1, 8),    # Whisper STT + acoustic features
+    "face": ("thread", 2, 16),    # FER / MTCNN
+    "tts": ("thread", 4, 32),     # gTTS synthesis (network bound)
+}
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when a pool already holds max_workers + max_queue jobs"""
+
+    def __init__(self, pool_name: str):
+        super().__init__(f"Inference pool '{pool_name}' is saturated")
+        self.pool_name = pool_name
+
+
+def _timed_call(fn, args, kwargs):
+    """Worker-side wrapper: returns (result, started_at, run_seconds)"""
+    started_at = time.time()
+    result = fn(*args, **kwargs)
+    return result, started_at, time.time() - started_at
+
+
+class InferencePool:
+    """A thread or process pool with a hard cap on queued work"""
+
+    def __init__(self, name: str, kind: str = "thread", max_workers: int = 1, max_queue: int = 8):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown pool kind: {kind}")
+
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+
+        self._executor = None
+        self._lock = threading.Lock()
+
+        # Counters
+        self._pending = 0
+        self._running = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+        self.max_run = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"aira-{self.name}",
+                )
+            logger.info(f"🧵 Started {self.kind} pool '{self.name}' ({self.max_workers} workers)")
+        return self._executor
+
+    def _on_done(self, future, submitted_at: float):
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled():
+                self.failed += 1
+                return
+            if future.exception() is not None:
+                self.failed += 1
+                return
+            _, started_at, run_seconds = future.result()
+            self.completed += 1
+            self.total_wait += max(0.0, started_at - submitted_at)
+            self.total_run += run_seconds
+            self.max_run = max(self.max_run, run_seconds)
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) in the pool and await the result"""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(self.name)
+            self._pending += 1
+            self.submitted += 1
+
+        if self.kind == "process":
+            # Memory-mapped uploads can't be pickled; ship their bytes instead
+            args = tuple(bytes(a) if isinstance(a, mmap.mmap) else a for a in args)
+            kwargs = {k: bytes(v) if isinstance(v, mmap.mmap) else v for k, v in kwargs.items()}
+
+        submitted_at = time.time()
+        try:
+            future = self._get_executor().submit(_timed_call, fn, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+                self.failed += 1
+            raise
+
+        # Accounting runs when the work really finishes, even if the
+        # awaiting request was cancelled in the meantime
+        future.add_done_callback(lambda f: self._on_done(f, submitted_at))
+
+        result, _, _ = await asyncio.wrap_future(future)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            finished = max(self.completed, 1)
+            return {
+                "kind": self.kind,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._pending,
+                "queued": max(0, self._pending - self.max_workers),
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.total_wait / finished * 1000, 2),
+                "avg_run_ms": round(self.total_run / finished * 1000, 2),
+                "max_run_ms": round(self.max_run * 1000, 2),
+            }
+
+    def shutdown(self, wait: bool = False):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str) -> InferencePool:
+    """Get (or lazily create) the named pool using env/default sizing"""
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            kind, workers, queue = POOL_DEFAULTS.get(name, ("thread", 1, 8))
+            prefix = f"AIRA_POOL_{name.upper()}"
+            pool = InferencePool(
+                name,
+                kind=env_str(f"{prefix}_KIND", kind),
+                max_workers=env_int(f"{prefix}_WORKERS", workers),
+                max_queue=env_int(f"{prefix}_QUEUE", queue),
+            )
+            _pools[name] = pool
+        return pool
+
+
+async def run_in_pool(name: str, fn, *args, **kwargs):
+    """Shortcut: await get_pool(name).run(fn, *args, **kwargs)"""
+    return await get_pool(name).run(fn, *args, **kwargs)
+
+
+def executor_stats() -> dict:
+    """Stats for every pool that has been created"""
+    with _pools_lock:
+        pools = dict(_pools)
+    return {name: pool.stats() for name, pool in pools.items()}
+
+
+def shutdown_pools(wait: bool = False):
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=wait)
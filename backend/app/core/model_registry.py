@@ -0,0 +1,175 @@
+"""
+core/model_registry.py
+----------------------
+Central Model Registry
+Lazy / background model loading, warmup and load-time telemetry
+"""
+
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Model lifecycle states
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+WARMING = "warming"
+READY = "ready"
+FAILED = "failed"
+
+
+def _rss_bytes():
+    """Current resident set size (Linux only, None elsewhere)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _param_bytes(model):
+    """Size of torch parameters for a model or a pipeline wrapping one"""
+    for candidate in (model, getattr(model, "model", None)):
+        parameters = getattr(candidate, "parameters", None)
+        if callable(parameters):
+            try:
+                return int(sum(p.numel() * p.element_size() for p in parameters()))
+            except Exception:
+                continue
+    return None
+
+
+class ModelEntry:
+    """One registered model and its load telemetry"""
+
+    def __init__(self, name: str, loader, warmup=None, eager: bool = True):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+        self.eager = eager
+
+        self.model = None
+        self.state = NOT_LOADED
+        self.error = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.memory_bytes = None
+        self.memory_source = None
+        self.loaded_at = None
+
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Load + warm the model once; later calls return the cached result"""
+        if self.state in (READY, FAILED):
+            return self.model
+
+        with self._lock:
+            if self.state in (READY, FAILED):
+                return self.model
+
+            logger.info(f"📥 Loading model '{self.name}'...")
+            self.state = LOADING
+            rss_before = _rss_bytes()
+            started = time.perf_counter()
+
+            try:
+                model = self.loader()
+            except Exception as e:
+                self.state = FAILED
+                self.error = f"{type(e).__name__}: {e}"
+                self.load_seconds = round(time.perf_counter() - started, 3)
+                logger.error(f"❌ Failed to load model '{self.name}': {e}")
+                return None
+
+            self.load_seconds = round(time.perf_counter() - started, 3)
+
+            param_bytes = _param_bytes(model)
+            rss_after = _rss_bytes()
+            if param_bytes is not None:
+                self.memory_bytes, self.memory_source = param_bytes, "parameters"
+            elif rss_before is not None and rss_after is not None:
+                self.memory_bytes, self.memory_source = max(0, rss_after - rss_before), "rss_delta"
+
+            if self.warmup is not None:
+                self.state = WARMING
+                started = time.perf_counter()
+                try:
+                    self.warmup(model)
+                except Exception as e:
+                    # A failed warmup is not fatal: the first request pays instead
+                    logger.warning(f"⚠️ Warmup failed for '{self.name}': {e}")
+                self.warmup_seconds = round(time.perf_counter() - started, 3)
+
+            self.model = model
+            self.loaded_at = time.time()
+            self.state = READY
+            logger.info(
+                f"✅ Model '{self.name}' ready "
+                f"(load {self.load_seconds}s, warmup {self.warmup_seconds}s)"
+            )
+            return model
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "eager": self.eager,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "memory_bytes": self.memory_bytes,
+            "memory_source": self.memory_source,
+            "loaded_at": self.loaded_at,
+        }
+
+
+_models = {}
+_background_thread = None
+
+
+def register_model(name: str, loader, warmup=None, eager: bool = True):
+    """
+    Register a loader (and optional warmup(model)) under a name.
+    Non-eager models (alternative profiles) only load on first use.
+    """
+    if name not in _models:
+        _models[name] = ModelEntry(name, loader, warmup, eager)
+    return _models[name]
+
+
+def get_model(name: str):
+    """Return the loaded model, loading it on first use (None if it failed)"""
+    entry = _models.get(name)
+    if entry is None:
+        raise KeyError(f"Unknown model: {name}")
+    return entry.load()
+
+
+def load_all():
+    """Load and warm every eager model, one after another"""
+    for entry in list(_models.values()):
+        if entry.eager:
+            entry.load()
+
+
+def start_background_loading():
+    """Kick off load_all() in a daemon thread (idempotent)"""
+    global _background_thread
+    if _background_thread is None:
+        _background_thread = threading.Thread(
+            target=load_all, name="aira-model-loader", daemon=True
+        )
+        _background_thread.start()
+    return _background_thread
+
+
+def model_status() -> dict:
+    return {name: entry.status() for name, entry in _models.items()}
+
+
+def is_ready(required=None) -> bool:
+    """True when every required model (default: all eager ones) is READY"""
+    names = required or [name for name, entry in _models.items() if entry.eager]
+    return all(name in _models and _models[name].state == READY for name in names)
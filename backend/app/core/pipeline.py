@@ -0,0 +1,238 @@
+"""
+core/pipeline.py
+----------------
+Stage-Graph Executor
+Endpoints declare their steps once; each request runs independent
+stages concurrently and only what the response actually needs.
+
+    pipeline = Pipeline("voice_chat", inputs=("audio_bytes",))
+
+    @pipeline.stage("voice")
+    async def _voice(audio_bytes): ...
+
+    @pipeline.stage("reply")
+    async def _reply(voice): ...          # waits for "voice"
+
+    run = await pipeline.run({"audio_bytes": data}, want=("reply",))
+    run.results["reply"], run.timings, run.server_timing()
+
+A stage's dependencies are its parameter names: pipeline inputs or
+earlier stages. Stages nobody wants (directly or through a dependency)
+are skipped; `sink=True` stages (side effects such as DB writes) always
+run. A stage can end the whole run early by raising Halt(value).
+"""
+
+import asyncio
+import inspect
+import logging
+import threading
+import time
+from collections import deque
+
+from app.core.stats import percentile_ms
+
+logger = logging.getLogger(__name__)
+
+
+class Halt(Exception):
+    """Raised by a stage to finish the run early with `value` as the outcome"""
+
+    def __init__(self, value=None):
+        super().__init__("pipeline halted")
+        self.value = value
+
+
+class Stage:
+
+    def __init__(self, name: str, fn, deps: tuple, sink: bool):
+        self.name = name
+        self.fn = fn
+        self.deps = deps
+        self.sink = sink
+
+        # Aggregates across runs
+        self.runs = 0
+        self.errors = 0
+        self.skipped = 0
+        self.cancelled = 0
+        self.durations = deque(maxlen=500)
+
+
+class PipelineRun:
+    """Outcome of one run: stage results, timings and an optional halt value"""
+
+    def __init__(self):
+        self.results = {}
+        self.timings = {}        # stage -> ms spent in the stage itself
+        self.started_at = {}     # stage -> ms after the run began
+        self.skipped = []
+        self.halted = False
+        self.halt_value = None
+        self.total_ms = 0.0
+
+    def server_timing(self) -> str:
+        """Value for a Server-Timing response header (shows up in browser devtools)"""
+        parts = [f"{name};dur={ms:.1f}" for name, ms in self.timings.items()]
+        parts.append(f"total;dur={self.total_ms:.1f}")
+        return ", ".join(parts)
+
+
+class Pipeline:
+
+    def __init__(self, name: str, inputs: tuple = ()):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self._stages = {}
+        self._lock = threading.Lock()
+
+        self.runs = 0
+        self.halts = 0
+        self.failures = 0
+        self._totals = deque(maxlen=500)
+
+    def stage(self, name: str, sink: bool = False):
+        """Decorator: register an async fn as a stage; parameters name its dependencies"""
+
+        def register(fn):
+            if not asyncio.iscoroutinefunction(fn):
+                raise TypeError(f"Stage '{name}' must be an async function")
+            if name in self._stages or name in self.inputs:
+                raise ValueError(f"Stage '{name}' already defined in pipeline '{self.name}'")
+
+            deps = tuple(inspect.signature(fn).parameters)
+            for dep in deps:
+                if dep not in self._stages and dep not in self.inputs:
+                    raise ValueError(f"Stage '{name}' depends on unknown '{dep}' in pipeline '{self.name}'")
+
+            self._stages[name] = Stage(name, fn, deps, sink)
+            return fn
+
+        return register
+
+    def _needed(self, want) -> list:
+        """Stages reachable from `want` + sinks, in declaration (= topological) order"""
+        needed = set()
+        pending = [name for name in want] + [s.name for s in self._stages.values() if s.sink]
+        while pending:
+            name = pending.pop()
+            if name in needed or name in self.inputs:
+                continue
+            if name not in self._stages:
+                raise KeyError(f"Unknown stage '{name}' in pipeline '{self.name}'")
+            needed.add(name)
+            pending.extend(self._stages[name].deps)
+        return [stage for name, stage in self._stages.items() if name in needed]
+
+    async def run(self, inputs: dict, want=None) -> PipelineRun:
+        """Run the stages needed for `want` (default: every stage)"""
+        missing = [name for name in self.inputs if name not in inputs]
+        if missing:
+            raise ValueError(f"Pipeline '{self.name}' missing inputs: {', '.join(missing)}")
+
+        stages = self._needed(self._stages if want is None else want)
+        outcome = PipelineRun()
+        outcome.skipped = [name for name in self._stages if name not in {s.name for s in stages}]
+        began = time.perf_counter()
+        tasks = {}
+
+        async def execute(stage: Stage):
+            kwargs = {}
+            for dep in stage.deps:
+                kwargs[dep] = inputs[dep] if dep in self.inputs else await tasks[dep]
+
+            started = time.perf_counter()
+            outcome.started_at[stage.name] = round((started - began) * 1000, 1)
+            try:
+                result = await stage.fn(**kwargs)
+            finally:
+                outcome.timings[stage.name] = round((time.perf_counter() - started) * 1000, 1)
+            outcome.results[stage.name] = result
+            return result
+
+        for stage in stages:
+            tasks[stage.name] = asyncio.ensure_future(execute(stage))
+
+        error = None
+        try:
+            if tasks:
+                done, _ = await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_EXCEPTION)
+                for task in done:
+                    if not task.cancelled() and task.exception() is not None:
+                        error = task.exception()
+                        break
+        except asyncio.CancelledError:
+            error = asyncio.CancelledError()
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+            if tasks:
+                # Let cancelled stages unwind before anyone reads the results
+                await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        outcome.total_ms = round((time.perf_counter() - began) * 1000, 1)
+        self._record(stages, tasks, outcome, error)
+
+        if isinstance(error, Halt):
+            outcome.halted = True
+            outcome.halt_value = error.value
+            return outcome
+        if error is not None:
+            raise error
+        return outcome
+
+    def _record(self, stages, tasks, outcome: PipelineRun, error):
+        with self._lock:
+            self.runs += 1
+            self._totals.append(outcome.total_ms / 1000)
+            if isinstance(error, Halt):
+                self.halts += 1
+            elif error is not None:
+                self.failures += 1
+
+            for name in outcome.skipped:
+                self._stages[name].skipped += 1
+            for stage in stages:
+                task = tasks[stage.name]
+                if stage.name in outcome.results:
+                    stage.runs += 1
+                    stage.durations.append(outcome.timings[stage.name] / 1000)
+                elif task.cancelled():
+                    stage.cancelled += 1
+                elif not isinstance(task.exception(), Halt):
+                    stage.errors += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "halts": self.halts,
+                "failures": self.failures,
+                "total_p50_ms": percentile_ms(self._totals, 50, digits=2),
+                "total_p95_ms": percentile_ms(self._totals, 95, digits=2),
+                "stages": {
+                    stage.name: {
+                        "deps": list(stage.deps),
+                        "sink": stage.sink,
+                        "runs": stage.runs,
+                        "errors": stage.errors,
+                        "skipped": stage.skipped,
+                        "cancelled": stage.cancelled,
+                        "p50_ms": percentile_ms(stage.durations, 50, digits=2),
+                        "p95_ms": percentile_ms(stage.durations, 95, digits=2),
+                    }
+                    for stage in self._stages.values()
+                },
+            }
+
+
+_pipelines = {}
+
+
+def register_pipeline(pipeline: Pipeline) -> Pipeline:
+    _pipelines[pipeline.name] = pipeline
+    return pipeline
+
+
+def pipeline_stats() -> dict:
+    return {name: pipeline.stats() for name, pipeline in _pipelines.items()}
@@ -0,0 +1,55 @@
+"""
+core/stats.py
+-------------
+Latency Percentiles & Stream Counters
+Shared by the /health stats of pipelines, the LLM client, the live
+face / voice streams and the load generator.
+"""
+
+import threading
+from collections import deque
+
+
+def percentile_ms(values, pct: float, digits: int = 1):
+    """pct-th percentile (nearest rank) of durations in seconds, as ms; None if empty"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return round(ordered[index] * 1000, digits)
+
+
+class StreamStats:
+    """Thread-safe counters plus a window of recent latencies for a live stream
+
+        stats = StreamStats(("active", "frames"), latency="frame")
+        stats.add(active=1)
+        stats.observe(0.012, frames=1)
+        stats.snapshot()  # {"active": 1, "frames": 1, "frame_p50_ms": 12.0, ...}
+    """
+
+    def __init__(self, counters: tuple, latency: str, window: int = 1000):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(counters, 0)
+        self._latency_name = latency
+        self._latency = deque(maxlen=window)
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                self._counts[name] += value
+
+    def observe(self, seconds: float, **counts):
+        """Record one latency sample, bumping `counts` under the same lock"""
+        with self._lock:
+            for name, value in counts.items():
+                self._counts[name] += value
+            self._latency.append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            snapshot = {name: round(value, 1) if isinstance(value, float) else value
+                        for name, value in self._counts.items()}
+            snapshot[f"{self._latency_name}_p50_ms"] = percentile_ms(self._latency, 50)
+            snapshot[f"{self._latency_name}_p95_ms"] = percentile_ms(self._latency, 95)
+            return snapshot
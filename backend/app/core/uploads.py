@@ -0,0 +1,223 @@
+"""
+core/uploads.py
+---------------
+Bounded Uploads
+Request bodies are capped while they arrive, and large accepted files
+are memory-mapped instead of copied into Python bytes.
+
+- UploadLimitMiddleware: per-route body cap. Rejects on Content-Length
+  before reading anything, and aborts with 413 as soon as a streamed
+  (chunked) body crosses the cap.
+- read_upload: per-file cap, chunked reads, returns bytes for small
+  files and a read-only mmap of the spooled temp file for large ones;
+  routes hand the result to close_upload once analysis is done.
+- open_buffer: seekable file object over bytes or mmap, no copy.
+"""
+
+import io
+import json
+import logging
+import mmap
+
+from fastapi import HTTPException, UploadFile
+
+from app.core.config import env_int
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+# Files above this are mapped from the multipart spool file, not copied
+SPOOL_THRESHOLD = env_int("AIRA_UPLOAD_SPOOL_KB", 1024) * 1024
+
+# Room for multipart boundaries, headers and small form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Body cap for routes without a registered limit (JSON chat, TTS, ...)
+DEFAULT_BODY_LIMIT = env_int("AIRA_MAX_BODY_KB", 1024) * 1024
+
+_route_limits = {}
+
+
+def register_upload_limit(path: str, max_bytes: int):
+    """Cap request bodies for `path` (and its sub-paths) at max_bytes + multipart overhead"""
+    _route_limits[path.rstrip("/") or "/"] = max_bytes + MULTIPART_OVERHEAD
+
+
+def _limit_for(path: str) -> int:
+    path = path.rstrip("/") or "/"
+    best, best_len = DEFAULT_BODY_LIMIT, -1
+    for prefix, limit in _route_limits.items():
+        if (path == prefix or path.startswith(prefix + "/")) and len(prefix) > best_len:
+            best, best_len = limit, len(prefix)
+    return best
+
+
+def _too_large(limit: int) -> str:
+    return f"Request body too large. Max {limit / (1024 * 1024):.1f} MB"
+
+
+class BodyTooLarge(HTTPException):
+    """Raised from the wrapped receive(); FastAPI turns it into a 413"""
+
+    def __init__(self, limit: int):
+        super().__init__(status_code=413, detail=_too_large(limit))
+
+
+class UploadLimitMiddleware:
+    """Pure ASGI middleware (works before FastAPI parses the multipart body)"""
+
+    def __init__(self, app):
+        self.app = app
+        self.rejected = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        limit = _limit_for(scope["path"])
+
+        # Declared size: reject without reading a byte
+        for name, value in scope.get("headers", ()):
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = 0
+                if declared > limit:
+                    self.rejected += 1
+                    return await self._reject(send, limit)
+                break
+
+        # Streamed size (chunked or lying Content-Length): count as it arrives
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise BodyTooLarge(limit)
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except BodyTooLarge:
+            self.rejected += 1
+            if response_started:
+                raise
+            await self._reject(send, limit)
+
+    @staticmethod
+    async def _reject(send, limit: int):
+        body = json.dumps({"detail": _too_large(limit)}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+async def read_upload(upload: UploadFile, max_bytes: int, label: str = "File"):
+    """
+    Contents of an uploaded file, never more than max_bytes in memory.
+
+    Returns bytes for small files. Larger ones come back as a read-only
+    mmap of the spool file Starlette already wrote, so they are backed by
+    the page cache, not the Python heap. Both support len(), hashing,
+    slicing and open_buffer(). Pass the result to close_upload when done.
+    """
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"{label} too large. Max {max_bytes // (1024 * 1024)} MB"
+    )
+
+    if upload.size is not None and upload.size > max_bytes:
+        raise too_large
+
+    if upload.size is not None and upload.size > SPOOL_THRESHOLD:
+        try:
+            upload.file.flush()
+            # SpooledTemporaryFile rolls over to disk if it hadn't yet
+            return mmap.mmap(upload.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, io.UnsupportedOperation) as e:
+            logger.warning(f"⚠️ Could not map upload, reading it instead: {e}")
+
+    await upload.seek(0)
+    chunks, total = [], 0
+    while chunk := await upload.read(CHUNK_SIZE):
+        total += len(chunk)
+        if total > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def close_upload(*buffers):
+    """Unmap what read_upload returned (bytes and None are ignored)"""
+    for data in buffers:
+        if isinstance(data, mmap.mmap) and not data.closed:
+            try:
+                data.close()
+            except BufferError:
+                # Still viewed by an analysis that outlived the request; GC unmaps it
+                logger.debug("Upload mapping still in use, leaving it to GC")
+
+
+class _BufferReader(io.RawIOBase):
+    """Seekable read-only file over any buffer without copying it"""
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast("B")
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, target):
+        n = max(0, min(len(target), len(self._view) - self._pos))
+        target[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = len(self._view) + offset
+        else:
+            raise ValueError(f"invalid whence: {whence}")
+        self._pos = max(0, self._pos)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        self._view.release()
+        super().close()
+
+
+def open_buffer(data):
+    """File object over upload data (bytes, bytearray or mmap)"""
+    if isinstance(data, bytes):
+        return io.BytesIO(data)  # shares the bytes, no copy
+    return io.BufferedReader(_BufferReader(data), buffer_size=CHUNK_SIZE)
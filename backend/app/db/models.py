@@ -2,7 +2,7 @@
 
 from sqlalchemy import Column, Integer, Text, String, DateTime
 from datetime import datetime
-from app.db.database import Base
+from app.db.database import Base, SessionLocal
 
 
 class Conversation(Base):
@@ -12,4 +12,18 @@ class Conversation(Base):
     user_message = Column(Text)
     assistant_message = Column(Text)
     emotion = Column(String)
-    timestamp = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
+
+def save_conversation(user_message: str, assistant_message: str, emotion: str):
+    """Insert one exchange in its own session (blocking; run off the event loop)"""
+    db = SessionLocal()
+    try:
+        db.add(Conversation(
+            user_message=user_message,
+            assistant_message=assistant_message,
+            emotion=emotion
+        ))
+        db.commit()
+    finally:
+        db.close()
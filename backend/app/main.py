@@ -4,16 +4,56 @@ main.py
 AIRA Emotional AI - Main Application
 """
 
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 
 from fastapi.staticfiles import StaticFiles
 from app.api.chat import router as chat_router
+from app.core.config import env_bool, env_float, env_str
+from app.core.executor import ExecutorSaturated, run_in_pool, shutdown_pools
+from app.core.model_registry import start_background_loading
+from app.core.uploads import UploadLimitMiddleware
+from app.services.audio_store import audio_store
+from app.services.llm_client import LLMError, llm_client
+from app.services.memory import close_memory
+from app.services.tts_service import prerender_static_audio
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # "eager": load + warm all models in the background at startup
+    # "lazy":  load each model on its first request
+    if env_str("AIRA_MODEL_LOADING", "eager") == "eager":
+        start_background_loading()
+
+    # Crisis / fixed replies get their audio rendered before anyone needs it
+    prerender_task = None
+    if env_bool("AIRA_PRERENDER_AUDIO", True):
+        prerender_task = asyncio.create_task(run_in_pool("tts", prerender_static_audio))
+
+    # Keep static/audio within its quota
+    gc_task = asyncio.create_task(audio_store.gc_loop(env_float("AIRA_AUDIO_GC_INTERVAL", 300.0)))
+
+    yield
+
+    gc_task.cancel()
+    if prerender_task is not None and not prerender_task.done():
+        prerender_task.cancel()
+    await llm_client.aclose()
+    close_memory()
+    shutdown_pools()
+
+
 app = FastAPI(
     title="AIRA Emotional AI",
     version="1.0.0",
     description="Multimodal emotion detection from text, voice, and face",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -24,6 +64,7 @@ from app.api.health import router as health_router
 from app.api.voice_emotion import router as voice_emotion_router
 from app.api.face_emotion import router as face_emotion_router
 from app.api.analyze import router as analyze_router
+from app.api.tts import router as tts_router
 
 from app.db.database import engine
 from app.db. models import Base
@@ -32,6 +73,28 @@ Base.metadata.create_all(bind=engine)
 
 
 
+@app.exception_handler(ExecutorSaturated)
+async def executor_saturated_handler(request: Request, exc: ExecutorSaturated):
+    """Inference queue full -> ask the client to back off"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"Server busy ({exc.pool_name}), please retry shortly."},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(LLMError)
+async def llm_error_handler(request: Request, exc: LLMError):
+    """Upstream LLM failed after retries -> bad gateway, not a 500"""
+    return JSONResponse(
+        status_code=502,
+        content={"detail": "Language model unavailable, please retry."},
+    )
+
+
+# Oversized bodies are refused before they are buffered (limits per router)
+app.add_middleware(UploadLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -50,6 +113,7 @@ app.include_router(analyze_router)
 
 app.include_router(voice_emotion_router)
 app.include_router(face_emotion_router)
+app.include_router(tts_router)
 
 
 @app.get("/", tags=["Info"])
@@ -0,0 +1,69 @@
+"""
+services/audio_decode.py
+------------------------
+Decode-once audio buffer shared by STT and feature extraction
+"""
+
+import logging
+import threading
+
+import numpy as np
+
+try:
+    import librosa
+    LIBROSA_AVAILABLE = True
+except ImportError:
+    LIBROSA_AVAILABLE = False
+
+from app.core.uploads import open_buffer
+
+logger = logging.getLogger(__name__)
+
+
+class DecodedAudio:
+    """
+    Mono float32 PCM decoded once per request.
+
+    Consumers ask for the rate they need with `at(sr)`; each resampled
+    view is computed on first use and cached, so Whisper (16 kHz) and
+    feature extraction (22.05 kHz) share a single decode.
+    """
+
+    def __init__(self, y: np.ndarray, sr: int):
+        self.y = np.ascontiguousarray(y, dtype=np.float32)
+        self.sr = int(sr)
+        self._views = {self.sr: self.y}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_bytes(cls, audio_bytes) -> "DecodedAudio":
+        """Decode an uploaded file (bytes or mmap) at its native sample rate"""
+        if not LIBROSA_AVAILABLE:
+            raise RuntimeError("librosa is not installed. Run: pip install librosa")
+
+        y, sr = librosa.load(open_buffer(audio_bytes), sr=None, mono=True)
+        return cls(y, sr)
+
+    @property
+    def duration(self) -> float:
+        return len(self.y) / self.sr if self.sr else 0.0
+
+    def at(self, sr: int) -> np.ndarray:
+        """PCM resampled to `sr` (cached and shared - do not modify in place)"""
+        view = self._views.get(sr)
+        if view is not None:
+            return view
+
+        with self._lock:
+            view = self._views.get(sr)
+            if view is None:
+                view = librosa.resample(self.y, orig_sr=self.sr, target_sr=sr).astype(np.float32, copy=False)
+                self._views[sr] = view
+        return view
+
+
+def as_decoded(audio) -> DecodedAudio:
+    """Accept either raw upload bytes or an already decoded buffer"""
+    if isinstance(audio, DecodedAudio):
+        return audio
+    return DecodedAudio.from_bytes(audio)
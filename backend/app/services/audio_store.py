@@ -0,0 +1,230 @@
+"""
+services/audio_store.py
+-----------------------
+Managed Store for Generated Audio
+Sharded directories, byte / file-count / age quota, background GC
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from app.core.cache import register_cache
+from app.core.config import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+STALE_TMP_SECONDS = 3600
+
+
+class AudioStore:
+    """
+    Files live in <root>/<first 2 chars of name>/<name>.
+
+    A file's mtime is its last-use time (bumped on every reuse), so the
+    store works across uvicorn workers: `collect()` rescans the disk,
+    drops files older than max_age and then the least recently used ones
+    until both the byte and the file-count quota hold. Pinned names
+    (pre-rendered static replies) are never evicted.
+    """
+
+    def __init__(self, name: str, root: str, url_prefix: str, max_bytes: int, max_files: int, max_age: float):
+        self.name = name
+        self.root = root
+        self.url_prefix = url_prefix.rstrip("/")
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.max_age = max_age
+
+        self._pinned = set()
+        self._lock = threading.Lock()
+        self._gc_lock = threading.Lock()
+
+        # Metrics (refreshed by every collect)
+        self.bytes_used = 0
+        self.files = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.expired = 0
+        self.gc_runs = 0
+        self.last_gc_at = None
+        self.last_gc_seconds = None
+
+        os.makedirs(self.root, exist_ok=True)
+
+    # ---------- paths ----------
+
+    @staticmethod
+    def _shard(name: str) -> str:
+        return name[:2]
+
+    def path_for(self, name: str) -> str:
+        return os.path.join(self.root, self._shard(name), name)
+
+    def url_for(self, name: str) -> str:
+        return f"{self.url_prefix}/{self._shard(name)}/{name}"
+
+    def temp_path(self, name: str) -> str:
+        path = self.path_for(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return f"{path}.{threading.get_ident()}.tmp"
+
+    # ---------- access ----------
+
+    def pin(self, name: str):
+        with self._lock:
+            self._pinned.add(name)
+
+    def touch(self, name: str) -> bool:
+        """True if the file exists; marks it as recently used"""
+        try:
+            os.utime(self.path_for(name))
+            return True
+        except OSError:
+            return False
+
+    def commit(self, name: str, tmp_path: str):
+        """Atomically move a finished temp file into place"""
+        path = self.path_for(name)
+        os.replace(tmp_path, path)
+
+        size = os.path.getsize(path)
+        with self._lock:
+            self.bytes_used += size
+            self.files += 1
+            over_quota = (
+                (self.max_bytes and self.bytes_used > self.max_bytes)
+                or (self.max_files and self.files > self.max_files)
+            )
+
+        # Bursts shouldn't wait for the next scheduled pass
+        if over_quota:
+            self.collect()
+
+    # ---------- garbage collection ----------
+
+    def _scan(self):
+        """[(mtime, size, path, name)] for every audio file, plus stale temp files"""
+        entries, stale_tmp = [], []
+        now = time.time()
+
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if filename.endswith(".tmp"):
+                    if now - stat.st_mtime > STALE_TMP_SECONDS:
+                        stale_tmp.append(path)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path, filename))
+
+        return entries, stale_tmp
+
+    def collect(self) -> dict:
+        """One GC pass: age limit first, then LRU until under quota"""
+        if not self._gc_lock.acquire(blocking=False):
+            return {"skipped": True}
+
+        try:
+            started = time.perf_counter()
+            entries, stale_tmp = self._scan()
+            entries.sort()  # oldest use first
+
+            with self._lock:
+                pinned = set(self._pinned)
+
+            now = time.time()
+            total_bytes = sum(size for _, size, _, _ in entries)
+            total_files = len(entries)
+            evicted = expired = evicted_bytes = 0
+
+            for mtime, size, path, name in entries:
+                if name in pinned:
+                    continue
+
+                too_old = self.max_age and now - mtime > self.max_age
+                over_bytes = self.max_bytes and total_bytes > self.max_bytes
+                over_files = self.max_files and total_files > self.max_files
+                if not (too_old or over_bytes or over_files):
+                    # Sorted by age: nothing later is older, and quota already holds
+                    break
+
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+
+                total_bytes -= size
+                total_files -= 1
+                evicted_bytes += size
+                if too_old:
+                    expired += 1
+                else:
+                    evicted += 1
+
+            for path in stale_tmp:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.bytes_used = total_bytes
+                self.files = total_files
+                self.evictions += evicted
+                self.expired += expired
+                self.evicted_bytes += evicted_bytes
+                self.gc_runs += 1
+                self.last_gc_at = time.time()
+                self.last_gc_seconds = round(elapsed, 4)
+
+            if evicted or expired:
+                logger.info(
+                    f"🧹 Audio GC: removed {evicted + expired} files "
+                    f"({evicted_bytes / 1024:.0f} KB), {total_files} left"
+                )
+            return {"evicted": evicted, "expired": expired, "evicted_bytes": evicted_bytes}
+        finally:
+            self._gc_lock.release()
+
+    async def gc_loop(self, interval: float):
+        """Background task: run collect() off the event loop every `interval` seconds"""
+        while True:
+            try:
+                await asyncio.to_thread(self.collect)
+            except Exception as e:
+                logger.error(f"❌ Audio GC failed: {e}")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "bytes_used": self.bytes_used,
+                "max_bytes": self.max_bytes,
+                "files": self.files,
+                "max_files": self.max_files,
+                "max_age_seconds": self.max_age,
+                "pinned": len(self._pinned),
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "evicted_bytes": self.evicted_bytes,
+                "gc_runs": self.gc_runs,
+                "last_gc_at": self.last_gc_at,
+                "last_gc_seconds": self.last_gc_seconds,
+            }
+
+
+audio_store = register_cache(AudioStore(
+    "tts_audio",
+    root="static/audio",
+    url_prefix="/static/audio",
+    max_bytes=env_int("AIRA_AUDIO_MAX_MB", 512) * 1024 * 1024,
+    max_files=env_int("AIRA_AUDIO_MAX_FILES", 5000),
+    max_age=env_float("AIRA_AUDIO_MAX_AGE_HOURS", 168.0) * 3600,
+))
@@ -1,39 +1,168 @@
 import numpy as np
-from fer import FER
-from PIL import Image
-import io
 
-# Load model ONCE (very important)
-detector = FER(mtcnn=True)
+from app.core.cache import content_key, make_result_cache
+from app.core.config import env_int, env_str
+from app.core.executor import run_in_pool
+from app.core.model_registry import register_model, get_model
+from app.services.image_decode import INGEST_MAX_SIDE, ImageTooLarge, decode_image
 
-def analyze_face_emotion(image_bytes: bytes):
-    try:
-        # Convert bytes → PIL → NumPy
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        frame = np.array(image)
+# Face detector in front of the FER emotion CNN:
+# - "mtcnn":   accurate, slow on big images (image pyramid)
+# - "cascade": OpenCV Haar cascade, much faster, frontal faces only
+# A client-supplied bounding box skips detection entirely.
+FACE_DETECTORS = ("mtcnn", "cascade")
+FACE_DETECTOR = env_str("AIRA_FACE_DETECTOR", "mtcnn")
 
-        # Detect emotions
-        results = detector.detect_emotions(frame)
+# Detection runs on a copy whose longest side is at most this many pixels;
+# boxes are mapped back and the emotion crop comes from the full image
+DETECT_MAX_SIDE = env_int("AIRA_FACE_DETECT_MAX_SIDE", 640)
 
-        if not results:
-            return {
-                "emotion": "no_face_detected",
-                "confidence": 0.0,
-                "scores": {}
-            }
+FACE_MODEL_VERSION = "fer-2"
+
+# Retried uploads (byte-identical) reuse the previous result
+face_cache = make_result_cache("face_analysis")
+
+
+def _load_detector(mode: str):
+    def load():
+        from fer import FER
+
+        return FER(mtcnn=mode == "mtcnn")
+    return load
+
+
+def _warmup_detector(detector):
+    detector.detect_emotions(np.zeros((160, 160, 3), dtype=np.uint8))
+
+
+# Loaded ONCE via the model registry (lazily or at startup); only the
+# configured detector loads eagerly, the other on first use
+for _mode in FACE_DETECTORS:
+    register_model(f"face_emotion:{_mode}", _load_detector(_mode), warmup=_warmup_detector,
+                   eager=_mode == FACE_DETECTOR)
+
+
+def _resolve_detector(detector: str = None) -> str:
+    detector = detector or FACE_DETECTOR
+    if detector not in FACE_DETECTORS:
+        raise ValueError(f"Unknown face detector '{detector}'. Choose from: {', '.join(FACE_DETECTORS)}")
+    return detector
+
+
+def _downscale(frame: np.ndarray, max_side: int):
+    """(smaller copy, scale factor back to the original) - no copy if already small"""
+    height, width = frame.shape[:2]
+    longest = max(height, width)
+    if not max_side or longest <= max_side:
+        return frame, 1.0
+
+    import cv2
+
+    scale = max_side / longest
+    small = cv2.resize(frame, (max(1, round(width * scale)), max(1, round(height * scale))),
+                       interpolation=cv2.INTER_AREA)
+    return small, 1.0 / scale
+
+
+def _detect_faces(detector, frame: np.ndarray, max_side: int = DETECT_MAX_SIDE) -> list:
+    """[(x, y, w, h)] in original-image coordinates, largest face first"""
+    small, back = _downscale(frame, max_side)
+    height, width = frame.shape[:2]
+
+    boxes = []
+    for x, y, w, h in detector.find_faces(small, bgr=False):
+        x, y = int(round(x * back)), int(round(y * back))
+        w, h = int(round(w * back)), int(round(h * back))
+        x, y = max(0, x), max(0, y)
+        w, h = min(w, width - x), min(h, height - y)
+        if w > 0 and h > 0:
+            boxes.append((x, y, w, h))
 
-        emotions = results[0]["emotions"]
+    boxes.sort(key=lambda box: box[2] * box[3], reverse=True)
+    return boxes
 
-        # Get top emotion + score
-        emotion, score = max(emotions.items(), key=lambda x: x[1])
 
+class BoxOutsideImage(ValueError):
+    """A client bbox that doesn't overlap the image"""
+
+
+def _clip_box(bbox, frame: np.ndarray):
+    x, y, w, h = (int(v) for v in bbox)
+    height, width = frame.shape[:2]
+    x, y = max(0, x), max(0, y)
+    w, h = min(w, width - x), min(h, height - y)
+    if w <= 0 or h <= 0:
+        raise BoxOutsideImage("Bounding box lies outside the image")
+    return x, y, w, h
+
+
+def analyze_frame(fer, frame: np.ndarray, bbox=None, max_side: int = DETECT_MAX_SIDE) -> dict:
+    """Emotion of the largest face in an RGB uint8 frame (see analyze_face_emotion)"""
+    # Find faces (or trust the client's box)
+    boxes = [_clip_box(bbox, frame)] if bbox is not None else _detect_faces(fer, frame, max_side)
+
+    # Classify the crop from the full-resolution image
+    results = fer.detect_emotions(frame, face_rectangles=boxes[:1]) if boxes else []
+
+    if not results:
         return {
-            "emotion": emotion,
-            "confidence": round(float(score), 3),
-            "scores": {k: round(float(v), 3) for k, v in emotions.items()}
+            "emotion": "no_face_detected",
+            "confidence": 0.0,
+            "scores": {}
         }
 
+    emotions = results[0]["emotions"]
+
+    # Get top emotion + score
+    emotion, score = max(emotions.items(), key=lambda x: x[1])
+
+    return {
+        "emotion": emotion,
+        "confidence": round(float(score), 3),
+        "scores": {k: round(float(v), 3) for k, v in emotions.items()},
+        "box": [int(v) for v in boxes[0]],
+    }
+
+
+def analyze_face_emotion(image_bytes: bytes, detector: str = None, bbox=None):
+    """
+    Emotion of the largest face. `bbox` = (x, y, w, h) from the client
+    skips detection; otherwise `detector` (default AIRA_FACE_DETECTOR)
+    finds faces on a downscaled copy.
+    """
+    try:
+        mode = _resolve_detector(detector)
+        fer = get_model(f"face_emotion:{mode}")
+        if fer is None:
+            return {
+                "error": "Face emotion model is not available"
+            }
+
+        # Reduced-size, upright RGB frame (boxes are in original pixels)
+        image = decode_image(image_bytes)
+
+        result = analyze_frame(fer, image.frame, bbox=image.to_frame(bbox) if bbox is not None else None)
+        if "box" in result:
+            result["box"] = image.to_original(result["box"])
+            result["detector"] = "client" if bbox is not None else mode
+        return result
+
+    except (ImageTooLarge, BoxOutsideImage):
+        raise
+
     except Exception as e:
         return {
             "error": str(e)
-        }
\ No newline at end of file
+        }
+
+
+async def analyze_face_emotion_async(image_bytes: bytes, detector: str = None, bbox=None):
+    # Cached by content hash; concurrent identical uploads share one run
+    mode = _resolve_detector(detector)
+    box = tuple(int(v) for v in bbox) if bbox is not None else None
+    key = content_key(image_bytes, "face", FACE_MODEL_VERSION, mode, INGEST_MAX_SIDE, DETECT_MAX_SIDE, box)
+    return await face_cache.get_or_compute(
+        key,
+        lambda: run_in_pool("face", analyze_face_emotion, image_bytes, mode, box),
+        cacheable=lambda result: "error" not in result,
+    )
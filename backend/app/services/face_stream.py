@@ -0,0 +1,320 @@
+"""
+services/face_stream.py
+-----------------------
+Live Face Sessions
+Webcam frames arrive over a WebSocket; mood feedback goes back per frame.
+
+- full detection (MTCNN / cascade) only every DETECT_EVERY frames, or
+  when the tracker loses the face; in between the box is followed by
+  template matching around its last position (a few ms on a small crop)
+- FER scores are smoothed with a time-based EMA, so the displayed mood
+  doesn't flicker and the smoothing is the same at any frame rate
+- latest frame wins: a frame that arrives while one is being analyzed
+  replaces the waiting one instead of queueing behind it
+- the session suggests a frame rate (AIMD on drops and face-pool load)
+  so well-behaved clients stop sending frames that would be dropped
+"""
+
+import asyncio
+import logging
+import math
+import time
+
+import numpy as np
+
+from app.core.config import env_float, env_int
+from app.core.executor import ExecutorSaturated, get_pool, run_in_pool
+from app.core.model_registry import get_model
+from app.core.stats import StreamStats
+from app.services.face_emotion import FACE_DETECTOR, FACE_DETECTORS, analyze_frame
+from app.services.image_decode import decode_image
+
+logger = logging.getLogger(__name__)
+
+DETECT_EVERY = env_int("AIRA_FACE_STREAM_DETECT_EVERY", 10)
+TRACK_MIN_CONFIDENCE = env_float("AIRA_FACE_STREAM_TRACK_MIN", 0.6)  # normalized correlation
+SMOOTHING_S = env_float("AIRA_FACE_STREAM_SMOOTHING_S", 0.6)         # EMA time constant
+NO_FACE_RESET_S = 1.5                                                # forget the mood after this long
+MAX_FRAME_ERRORS = 10                                                # consecutive failures before giving up
+
+MIN_FPS = env_float("AIRA_FACE_STREAM_MIN_FPS", 2.0)
+MAX_FPS = env_float("AIRA_FACE_STREAM_MAX_FPS", 15.0)
+START_FPS = min(MAX_FPS, 8.0)
+
+TRACK_SIDE = 64        # template size (px) tracking runs at
+SEARCH_MARGIN = 0.5    # search window = box grown by this much of its size per side
+
+
+# ============================================================
+# TRACKER
+# ============================================================
+
+class FaceTracker:
+    """
+    Follows one face box between detections: normalized cross-correlation
+    of the last face crop against a search window around it, both scaled
+    so the face is ~TRACK_SIDE px wide.
+    """
+
+    def __init__(self):
+        self.box = None          # (x, y, w, h) in frame pixels
+        self.confidence = 0.0
+        self._template = None
+        self._shape = None
+
+    def clear(self):
+        self.box = self._template = self._shape = None
+        self.confidence = 0.0
+
+    def reset(self, frame: np.ndarray, box):
+        """Start following `box` (from a full detection)"""
+        self.box = tuple(int(v) for v in box)
+        self._shape = frame.shape
+        self._template = self._crop(frame, self.box, self._scale())
+        self.confidence = 1.0
+
+    def update(self, frame: np.ndarray) -> float:
+        """Move the box to the best match in `frame`; returns the match score"""
+        import cv2
+
+        if self.box is None or frame.shape != self._shape:
+            self.clear()
+            return 0.0
+
+        x, y, w, h = self.box
+        height, width = frame.shape[:2]
+        dx, dy = int(w * SEARCH_MARGIN), int(h * SEARCH_MARGIN)
+        sx, sy = max(0, x - dx), max(0, y - dy)
+        ex, ey = min(width, x + w + dx), min(height, y + h + dy)
+
+        scale = self._scale()
+        window = self._crop(frame, (sx, sy, ex - sx, ey - sy), scale)
+        th, tw = self._template.shape
+        if window.shape[0] < th or window.shape[1] < tw:
+            self.clear()
+            return 0.0
+
+        scores = cv2.matchTemplate(window, self._template, cv2.TM_CCOEFF_NORMED)
+        _, best, _, (mx, my) = cv2.minMaxLoc(scores)
+        self.confidence = float(best)
+
+        nx = min(max(0, sx + int(round(mx / scale))), width - w)
+        ny = min(max(0, sy + int(round(my / scale))), height - h)
+        self.box = (nx, ny, w, h)
+        self._template = self._crop(frame, self.box, scale)
+        return self.confidence
+
+    def _scale(self) -> float:
+        return min(1.0, TRACK_SIDE / max(self.box[2], self.box[3]))
+
+    @staticmethod
+    def _crop(frame: np.ndarray, box, scale: float) -> np.ndarray:
+        import cv2
+
+        x, y, w, h = box
+        gray = cv2.cvtColor(np.ascontiguousarray(frame[y:y + h, x:x + w]), cv2.COLOR_RGB2GRAY)
+        size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+        return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+
+def analyze_stream_frame(mode: str, tracker: FaceTracker, image_bytes: bytes, detect: bool) -> dict:
+    """
+    One live frame: follow the tracked face (or detect when asked / lost),
+    then classify its crop. Runs in the face pool; the tracker belongs to
+    one session and sees one frame at a time (a process pool gets a copy,
+    so tracking degrades to detecting every frame).
+    """
+    fer = get_model(f"face_emotion:{mode}")
+    if fer is None:
+        return {"error": "Face emotion model is not available"}
+
+    image = decode_image(image_bytes)
+    frame = image.frame
+
+    tracked = False
+    if not detect and tracker.box is not None:
+        tracked = tracker.update(frame) >= TRACK_MIN_CONFIDENCE
+
+    if tracked:
+        result = analyze_frame(fer, frame, bbox=tracker.box)
+    else:
+        result = analyze_frame(fer, frame)
+        if "box" in result:
+            tracker.reset(frame, result["box"])
+        else:
+            tracker.clear()
+
+    if "box" in result:
+        result["box"] = image.to_original(result["box"])
+    result["tracked"] = tracked
+    result["track_confidence"] = round(tracker.confidence, 3)
+    return result
+
+
+# ============================================================
+# STATS
+# ============================================================
+
+_stats = StreamStats(
+    ("active", "sessions", "frames", "dropped", "detections", "tracked", "saturated"),
+    latency="frame",
+)
+
+
+def face_stream_stats() -> dict:
+    return _stats.snapshot()
+
+
+# ============================================================
+# SESSION
+# ============================================================
+
+class FaceStream:
+    """
+    One live face session. `submit(frame_bytes)` for every received
+    frame; `emit(event)` (async) gets:
+
+        {"type": "emotion", "frame", "emotion", "confidence", "scores",
+         "raw_emotion", "face_detected", "box", "tracked", "latency_ms"}
+        {"type": "rate", "fps"}              suggested client frame rate
+        {"type": "error", "frame", "detail"} a frame that couldn't be used
+        {"type": "error", "detail", "fatal"} MAX_FRAME_ERRORS frames in a
+                                             row failed; the session stops
+    """
+
+    def __init__(self, emit, detector: str = None, detect_every: int = DETECT_EVERY):
+        self.mode = detector or FACE_DETECTOR
+        if self.mode not in FACE_DETECTORS:
+            raise ValueError(f"Unknown face detector '{self.mode}'. Choose from: {', '.join(FACE_DETECTORS)}")
+        self.detect_every = max(1, detect_every)
+        self.fps = START_FPS
+
+        self._emit = emit
+        self._tracker = FaceTracker()
+        self._latest = None
+        self._waiting = asyncio.Event()
+        self._since_detect = self.detect_every
+        self._dropped = 0        # since the last processed frame
+        self._count = 0
+        self._errors = 0         # consecutive failed frames
+        self._announced = None
+
+        self._scores = {}        # smoothed
+        self._scores_at = None
+        self._face_seen_at = None
+
+        self._worker = asyncio.ensure_future(self._run())
+        _stats.add(active=1, sessions=1)
+
+    def submit(self, image_bytes: bytes):
+        """Queue a frame; one still waiting is replaced (latest frame wins)"""
+        if self._latest is not None:
+            self._dropped += 1
+            _stats.add(dropped=1)
+        self._latest = image_bytes
+        self._count += 1
+        self._waiting.set()
+
+    async def aclose(self):
+        self._worker.cancel()
+        await asyncio.gather(self._worker, return_exceptions=True)
+        _stats.add(active=-1)
+
+    async def _run(self):
+        await self._announce()
+        while True:
+            await self._waiting.wait()
+            self._waiting.clear()
+            image_bytes, self._latest = self._latest, None
+            if image_bytes is None:
+                continue
+            await self._process(image_bytes, self._count)
+            if self._errors >= MAX_FRAME_ERRORS:
+                await self._emit({"type": "error", "detail": f"{self._errors} frames in a row failed", "fatal": True})
+                return
+
+    async def _process(self, image_bytes: bytes, index: int):
+        detect = self._since_detect >= self.detect_every
+        started = time.perf_counter()
+        try:
+            result = await run_in_pool("face", analyze_stream_frame, self.mode, self._tracker, image_bytes, detect)
+        except ExecutorSaturated:
+            _stats.add(saturated=1)
+            await self._adapt(overloaded=True)
+            return
+        except (ValueError, OSError) as e:  # undecodable or oversized frame
+            await self._fail(index, str(e))
+            return
+        except Exception as e:  # cv2 / FER / PIL failures must not end the session
+            logger.error(f"❌ Face stream frame {index} failed: {e}")
+            await self._fail(index, "Frame analysis failed")
+            return
+        elapsed = time.perf_counter() - started
+
+        if "error" in result:
+            await self._fail(index, result["error"])
+            return
+        self._errors = 0
+
+        tracked = result["tracked"]
+        self._since_detect = self._since_detect + 1 if tracked else 1
+        _stats.observe(elapsed, frames=1, tracked=int(tracked), detections=int(not tracked))
+
+        emotion, confidence = self._smooth(result.get("scores") or {})
+        await self._emit({
+            "type": "emotion",
+            "frame": index,
+            "emotion": emotion,
+            "confidence": confidence,
+            "scores": {k: round(v, 3) for k, v in self._scores.items()},
+            "raw_emotion": result["emotion"],
+            "face_detected": "box" in result,
+            "box": result.get("box"),
+            "tracked": tracked,
+            "latency_ms": round(elapsed * 1000, 1),
+        })
+        await self._adapt(overloaded=elapsed > 1.0 / self.fps)
+
+    async def _fail(self, index: int, detail: str):
+        """Report a failed frame; the next one starts from a full detection"""
+        self._errors += 1
+        self._tracker.clear()
+        self._since_detect = self.detect_every
+        await self._emit({"type": "error", "frame": index, "detail": detail})
+
+    def _smooth(self, scores: dict) -> tuple:
+        """EMA with alpha = 1 - exp(-dt / SMOOTHING_S); keeps the last mood through brief face loss"""
+        now = time.monotonic()
+        if not scores:
+            if self._face_seen_at is not None and now - self._face_seen_at > NO_FACE_RESET_S:
+                self._scores, self._scores_at = {}, None
+            if not self._scores:
+                return "no_face_detected", 0.0
+        else:
+            self._face_seen_at = now
+            if self._scores_at is None:
+                self._scores = dict(scores)
+            else:
+                alpha = 1.0 - math.exp(-(now - self._scores_at) / SMOOTHING_S)
+                for name, value in scores.items():
+                    previous = self._scores.get(name, value)
+                    self._scores[name] = previous + alpha * (value - previous)
+            self._scores_at = now
+
+        emotion = max(self._scores, key=self._scores.get)
+        return emotion, round(self._scores[emotion], 3)
+
+    async def _adapt(self, overloaded: bool):
+        """AIMD: back off on drops / slow frames / a queued face pool, creep up otherwise"""
+        busy = overloaded or self._dropped > 0 or get_pool("face").stats()["queued"] > 0
+        self._dropped = 0
+        if busy:
+            self.fps = max(MIN_FPS, self.fps * 0.75)
+        else:
+            self.fps = min(MAX_FPS, self.fps + 0.5)
+        await self._announce()
+
+    async def _announce(self):
+        if self._announced is None or abs(self.fps - self._announced) >= 1.0:
+            self._announced = self.fps
+            await self._emit({"type": "rate", "fps": round(self.fps, 1)})
@@ -0,0 +1,267 @@
+"""
+services/fake_backends.py
+-------------------------
+Local Stand-in Backends
+Offline fakes for the LLM and TTS upstreams, for load tests and CI
+
+    AIRA_LLM_BACKEND=fake        LLM calls go to FakeLLMTransport (no network)
+    AIRA_TTS_BACKEND=fake        speech comes from fake_tts_stream (silent mp3)
+    AIRA_MEMORY_KV_URL=fake://   shared memory talks to FakeKV (in-process)
+
+Latency follows a log-normal distribution fitted to a median and a p95,
+and a configurable share of calls fail:
+
+    AIRA_FAKE_LLM_LATENCY_MS / _P95_MS / _FAILURE_RATE / _TOKEN_MS
+    AIRA_FAKE_TTS_LATENCY_MS / _P95_MS / _FAILURE_RATE
+    AIRA_FAKE_KV_LATENCY_MS / _P95_MS / _FAILURE_RATE   (per round trip)
+"""
+
+import asyncio
+import json
+import math
+import random
+import threading
+import time
+
+import httpx
+
+from app.core.config import env_float
+
+# z-score of the 95th percentile of a standard normal
+_Z95 = 1.6449
+
+FAKE_REPLIES = (
+    "I hear you. That sounds like a lot to carry right now.",
+    "Thanks for telling me. What do you think made today feel that way?",
+    "It makes sense to feel like that. Would it help to talk it through?",
+    "That's really good to hear! What made it go so well?",
+)
+
+
+class LatencyProfile:
+    """Log-normal latency (median / p95 in ms) plus a failure probability"""
+
+    def __init__(self, median_ms: float, p95_ms: float, failure_rate: float = 0.0, seed: int = None):
+        self.median_ms = max(0.0, median_ms)
+        self.p95_ms = max(self.median_ms, p95_ms)
+        self.failure_rate = min(max(failure_rate, 0.0), 1.0)
+        self._rng = random.Random(seed)
+
+        self._mu = math.log(self.median_ms) if self.median_ms > 0 else None
+        self._sigma = math.log(self.p95_ms / self.median_ms) / _Z95 if self.median_ms > 0 else 0.0
+
+    @classmethod
+    def from_env(cls, prefix: str, median_ms: float, p95_ms: float, failure_rate: float = 0.0):
+        return cls(
+            median_ms=env_float(f"{prefix}_LATENCY_MS", median_ms),
+            p95_ms=env_float(f"{prefix}_LATENCY_P95_MS", p95_ms),
+            failure_rate=env_float(f"{prefix}_FAILURE_RATE", failure_rate),
+        )
+
+    def sample(self) -> float:
+        """One latency draw, in seconds"""
+        if self._mu is None:
+            return 0.0
+        return self._rng.lognormvariate(self._mu, self._sigma) / 1000.0
+
+    def fails(self) -> bool:
+        return self._rng.random() < self.failure_rate
+
+
+# ---------- LLM ----------
+
+class _TokenStream(httpx.AsyncByteStream):
+    """SSE body that releases one token every `token_delay` seconds"""
+
+    def __init__(self, tokens: list, token_delay: float):
+        self.tokens = tokens
+        self.token_delay = token_delay
+
+    async def __aiter__(self):
+        for token in self.tokens:
+            chunk = {"choices": [{"delta": {"content": token}}]}
+            yield f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+            await asyncio.sleep(self.token_delay)
+        yield b"data: [DONE]\n\n"
+
+
+class FakeLLMTransport(httpx.AsyncBaseTransport):
+    """
+    Answers POST /chat/completions like an OpenAI-compatible server.
+
+    Plugged in underneath LLMClient, so pooling, the concurrency cap,
+    retries and metrics behave exactly as they do against the real API.
+    Failures come back as HTTP 503.
+    """
+
+    def __init__(self, profile: LatencyProfile, token_delay: float = 0.02):
+        self.profile = profile
+        self.token_delay = token_delay
+        self._rng = random.Random()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content or b"{}")
+        await asyncio.sleep(self.profile.sample())
+
+        if self.profile.fails():
+            return httpx.Response(503, json={"error": {"message": "fake upstream failure"}})
+
+        reply = self._rng.choice(FAKE_REPLIES)
+        if body.get("stream"):
+            tokens = [word + " " for word in reply.split(" ")]
+            tokens[-1] = tokens[-1].rstrip()
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                stream=_TokenStream(tokens, self.token_delay),
+            )
+
+        return httpx.Response(200, json={
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}}],
+        })
+
+
+def fake_llm_transport() -> FakeLLMTransport:
+    return FakeLLMTransport(
+        LatencyProfile.from_env("AIRA_FAKE_LLM", median_ms=400.0, p95_ms=1200.0),
+        token_delay=env_float("AIRA_FAKE_LLM_TOKEN_MS", 20.0) / 1000.0,
+    )
+
+
+# ---------- TTS ----------
+
+# One MPEG-1 Layer III frame (128 kbps, 44.1 kHz, mono, no padding) with an
+# empty payload: ~26 ms of silence that any mp3 decoder accepts
+_SILENT_FRAME = b"\xff\xfb\x90\xc4" + b"\x00" * 413
+_FRAMES_PER_CHAR = 3  # ~80 ms of audio per character, close to gTTS speed
+
+_tts_profile = None
+
+
+def fake_tts_stream(text: str, lang: str, tld: str):
+    """Yield silent mp3 bytes for text after a simulated synthesis delay"""
+    global _tts_profile
+    if _tts_profile is None:
+        _tts_profile = LatencyProfile.from_env("AIRA_FAKE_TTS", median_ms=300.0, p95_ms=900.0)
+
+    time.sleep(_tts_profile.sample())
+    if _tts_profile.fails():
+        raise RuntimeError("fake TTS failure")
+
+    frames = max(1, len(text) * _FRAMES_PER_CHAR)
+    for start in range(0, frames, 100):
+        yield _SILENT_FRAME * min(100, frames - start)
+
+
+# ---------- Key-value store ----------
+
+class FakeKV:
+    """
+    The Redis list commands the shared memory backend uses (rpush, lrange,
+    ltrim, expire, delete, pipeline) on an in-process dict. Every call, or
+    every pipeline execute(), costs one simulated network round trip.
+    Failures raise ConnectionError.
+    """
+
+    def __init__(self, profile: LatencyProfile):
+        self.profile = profile
+        self.round_trips = 0
+        self._lists = {}
+        self._deadlines = {}
+        self._lock = threading.Lock()
+
+    def _round_trip(self):
+        self.round_trips += 1
+        time.sleep(self.profile.sample())
+        if self.profile.fails():
+            raise ConnectionError("fake KV failure")
+
+    def _list(self, key: str, create: bool = False):
+        deadline = self._deadlines.get(key)
+        if deadline is not None and time.monotonic() >= deadline:
+            self._lists.pop(key, None)
+            self._deadlines.pop(key, None)
+        if create:
+            return self._lists.setdefault(key, [])
+        return self._lists.get(key, [])
+
+    def _apply(self, command: str, key: str, *args):
+        with self._lock:
+            if command == "rpush":
+                items = self._list(key, create=True)
+                items.extend(args)
+                return len(items)
+            if command == "lrange":
+                items = self._list(key)
+                start, stop = args
+                stop = len(items) + stop if stop < 0 else stop
+                return list(items[max(0, len(items) + start if start < 0 else start):stop + 1])
+            if command == "ltrim":
+                items = self._list(key)
+                start, stop = args
+                stop = len(items) + stop if stop < 0 else stop
+                kept = items[max(0, len(items) + start if start < 0 else start):stop + 1]
+                if kept:
+                    self._lists[key] = kept
+                else:
+                    self._lists.pop(key, None)
+                return True
+            if command == "expire":
+                if key not in self._lists:
+                    return False
+                self._deadlines[key] = time.monotonic() + args[0]
+                return True
+            if command == "delete":
+                self._deadlines.pop(key, None)
+                return int(self._lists.pop(key, None) is not None)
+        raise ValueError(f"Unsupported command: {command}")
+
+    def __getattr__(self, command: str):
+        if command not in ("rpush", "lrange", "ltrim", "expire", "delete"):
+            raise AttributeError(command)
+
+        def call(key, *args):
+            self._round_trip()
+            return self._apply(command, key, *args)
+        return call
+
+    def pipeline(self, transaction: bool = True) -> "_FakePipeline":
+        return _FakePipeline(self)
+
+    def close(self):
+        pass
+
+
+class _FakePipeline:
+    """Queues commands; execute() runs them all in one round trip"""
+
+    def __init__(self, kv: FakeKV):
+        self._kv = kv
+        self._commands = []
+
+    def __getattr__(self, command: str):
+        if command not in ("rpush", "lrange", "ltrim", "expire", "delete"):
+            raise AttributeError(command)
+
+        def queue(key, *args):
+            self._commands.append((command, key, args))
+            return self
+        return queue
+
+    def execute(self) -> list:
+        commands, self._commands = self._commands, []
+        self._kv._round_trip()
+        return [self._kv._apply(command, key, *args) for command, key, args in commands]
+
+
+_fake_kvs = {}
+_fake_kvs_lock = threading.Lock()
+
+
+def fake_kv(url: str = "fake://") -> FakeKV:
+    """One FakeKV per URL, so stores on the same fake:// URL share data like Redis clients do"""
+    with _fake_kvs_lock:
+        kv = _fake_kvs.get(url)
+        if kv is None:
+            kv = _fake_kvs[url] = FakeKV(LatencyProfile.from_env("AIRA_FAKE_KV", median_ms=0.5, p95_ms=2.0))
+        return kv
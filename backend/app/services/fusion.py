@@ -12,6 +12,17 @@ logger = logging.getLogger(__name__)
 
 EMOTIONS = ["sad", "calm", "neutral", "happy", "excited", "angry", "fearful"]
 
+# Model labels -> EMOTIONS. The text model (j-hartmann distilroberta) and
+# FER use Ekman-style labels; voice already speaks EMOTIONS
+LABEL_MAP = {
+    "joy": "happy",
+    "sadness": "sad",
+    "anger": "angry",
+    "disgust": "angry",
+    "fear": "fearful",
+    "surprise": "excited",
+}
+
 # Weights for each modality
 WEIGHTS = {
     "text": 1.0,
@@ -20,6 +31,17 @@ WEIGHTS = {
 }
 
 
+def to_fusion_labels(scores: Optional[Dict[str, float]]) -> Optional[Dict[str, float]]:
+    """Scores keyed by EMOTIONS; labels that map together are summed"""
+    if not scores:
+        return scores
+    mapped = {}
+    for label, score in scores.items():
+        emotion = LABEL_MAP.get(label, label)
+        mapped[emotion] = round(mapped.get(emotion, 0.0) + score, 4)
+    return mapped
+
+
 def fuse_emotions(
     text_scores: Optional[Dict[str, float]] = None,
     voice_scores: Optional[Dict[str, float]] = None,
@@ -32,11 +54,16 @@ def fuse_emotions(
         text_scores: Emotion scores from text analysis
         voice_scores: Emotion scores from voice analysis
         face_scores: Emotion scores from face analysis
+        (model labels such as "joy" or "fear" are mapped via LABEL_MAP)
     
     Returns:
         Dict with fused emotion, confidence, and breakdown
     """
     
+    text_scores = to_fusion_labels(text_scores)
+    voice_scores = to_fusion_labels(voice_scores)
+    face_scores = to_fusion_labels(face_scores)
+
     # Check what modalities are available
     available_modalities = []
     if text_scores:
@@ -0,0 +1,107 @@
+"""
+services/image_decode.py
+------------------------
+Image ingest for face analysis: header check, reduced-size decode,
+EXIF orientation, one contiguous RGB uint8 array
+"""
+
+import logging
+import math
+
+import numpy as np
+from PIL import Image
+
+from app.core.config import env_int
+from app.core.uploads import open_buffer
+
+logger = logging.getLogger(__name__)
+
+# Rejected from the header alone, before any pixel is decoded
+MAX_IMAGE_PIXELS = env_int("AIRA_MAX_IMAGE_PIXELS", 50_000_000)
+MAX_IMAGE_SIDE = env_int("AIRA_MAX_IMAGE_SIDE", 12_000)
+
+# Target longest side of the decoded frame (lands in [max, 2 * max)). FER
+# crops are 48x48 and detection runs at ~640 px, so phone photos never
+# need their full resolution.
+INGEST_MAX_SIDE = env_int("AIRA_IMAGE_INGEST_MAX_SIDE", 1280)
+
+_EXIF_ORIENTATION = 0x0112
+
+# EXIF orientation -> transpose that makes the image upright (as ImageOps.exif_transpose)
+_UPRIGHT = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+
+class ImageTooLarge(ValueError):
+    """Declared dimensions exceed the ingest limits"""
+
+
+class DecodedImage:
+    """
+    RGB uint8 frame (H, W, 3), C-contiguous, already upright.
+
+    `scale` maps original (upright) pixel coordinates to frame
+    coordinates, so boxes can travel both ways between the client's
+    image and the decoded frame.
+    """
+
+    def __init__(self, frame: np.ndarray, scale: float, original_size: tuple):
+        self.frame = frame
+        self.scale = scale
+        self.original_size = original_size  # (width, height), upright
+
+    def to_frame(self, box) -> tuple:
+        return tuple(int(round(v * self.scale)) for v in box)
+
+    def to_original(self, box) -> list:
+        return [int(round(v / self.scale)) for v in box]
+
+
+def decode_image(image_bytes, max_side: int = INGEST_MAX_SIDE) -> DecodedImage:
+    """
+    Decode an upload for analysis.
+
+    - size limits are checked from the header (no decode yet)
+    - JPEGs decode straight at 1/2, 1/4 or 1/8 scale (DCT draft mode)
+      when that still covers `max_side`; anything still 2x too big gets an
+      integer box reduction, so the longest side ends below 2 * max_side
+    - EXIF orientation is applied, so boxes match what the user sees
+    - the result is a single read-only buffer (no PIL -> numpy copy)
+    """
+    image = Image.open(open_buffer(image_bytes))
+    width, height = image.size
+    if width * height > MAX_IMAGE_PIXELS or max(width, height) > MAX_IMAGE_SIDE:
+        raise ImageTooLarge(
+            f"Image is {width}x{height}; max {MAX_IMAGE_SIDE}px per side and "
+            f"{MAX_IMAGE_PIXELS // 1_000_000} MP"
+        )
+
+    orientation = image.getexif().get(_EXIF_ORIENTATION, 1)
+    upright = (height, width) if orientation in (5, 6, 7, 8) else (width, height)
+
+    if max_side and max(width, height) > max_side:
+        if image.format == "JPEG":
+            # Decode straight at the smallest DCT scale (1/2, 1/4, 1/8) still >= max_side
+            ratio = max_side / max(width, height)
+            image.draft("RGB", (math.ceil(width * ratio), math.ceil(height * ratio)))
+        # Integer box reduction is cheap; finer resampling is left to the detector
+        factor = max(image.size) // max_side
+        if factor >= 2:
+            image = image.reduce(factor)
+
+    # Orientation was read from the header: reduce() drops the EXIF block
+    if orientation in _UPRIGHT:
+        image = image.transpose(_UPRIGHT[orientation])
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+
+    frame = np.asarray(image)
+    scale = frame.shape[1] / upright[0]
+    return DecodedImage(frame, scale, upright)
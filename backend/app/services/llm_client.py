@@ -0,0 +1,281 @@
+"""
+services/llm_client.py
+----------------------
+Async LLM Client
+OpenAI-compatible chat completions (Groq by default) over one pooled
+HTTP client, with timeouts, a cap on in-flight calls, jittered retries
+and latency / error metrics.
+
+Point AIRA_LLM_BASE_URL at any compatible server, or set
+AIRA_LLM_BACKEND=fake to use the in-process stand-in
+(services/fake_backends.py), to test without the real upstream.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import deque
+
+import httpx
+
+from app.core.config import env_float, env_int, env_str
+from app.core.executor import ExecutorSaturated
+from app.core.stats import percentile_ms
+from app.services.fake_backends import fake_llm_transport
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class LLMError(RuntimeError):
+    """Upstream completion failed after all retries"""
+
+
+def _message_content(response) -> str:
+    """choices[0].message.content of a completion body; LLMError if it isn't one"""
+    try:
+        content = response.json()["choices"][0]["message"]["content"]
+    except (ValueError, LookupError, TypeError, AttributeError) as e:
+        raise LLMError(f"LLM returned a malformed response: {response.text[:200]}") from e
+    if not isinstance(content, str):
+        raise LLMError("LLM returned a malformed response: no message content")
+    return content
+
+
+def _delta_content(data: str):
+    """Text delta of one stream chunk (None if it carries none); LLMError if malformed"""
+    try:
+        choices = json.loads(data).get("choices") or []
+        delta = choices[0].get("delta", {}).get("content") if choices else None
+    except (ValueError, LookupError, TypeError, AttributeError) as e:
+        raise LLMError(f"LLM stream sent a malformed chunk: {data[:200]}") from e
+    if delta is not None and not isinstance(delta, str):
+        raise LLMError("LLM stream sent a malformed chunk: non-text delta")
+    return delta
+
+
+class LLMClient:
+
+    def __init__(self, base_url: str, api_key: str, timeout: float = 30.0,
+                 connect_timeout: float = 5.0, max_concurrency: int = 16,
+                 queue_timeout: float = 10.0, max_retries: int = 2,
+                 backoff_base: float = 0.25, backoff_max: float = 4.0,
+                 max_connections: int = 32, transport: httpx.AsyncBaseTransport = None):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_timeout = queue_timeout
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+        )
+
+        self.transport = transport
+
+        self._http = None
+        self._semaphore = None
+
+        # Metrics
+        self.in_flight = 0
+        self.requests = 0
+        self.successes = 0
+        self.retries = 0
+        self.rejected = 0
+        self.errors = {}
+        self._latencies = deque(maxlen=1000)
+        self._first_token = deque(maxlen=1000)
+
+    # ---------- plumbing ----------
+
+    def _client(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                headers={"Authorization": f"Bearer {self.api_key or ''}"},
+                transport=self.transport,
+            )
+        return self._http
+
+    async def _acquire(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise ExecutorSaturated("llm")
+        self.in_flight += 1
+
+    def _release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def _error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    async def _backoff(self, attempt: int, retry_after: str = None):
+        """Full-jitter exponential backoff (or the server's Retry-After)"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after:
+            try:
+                delay = min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        self.retries += 1
+        await asyncio.sleep(delay)
+
+    def _payload(self, messages, model, temperature, max_tokens, stream):
+        return {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": stream,
+        }
+
+    # ---------- public API ----------
+
+    async def complete(self, messages: list, model: str, temperature: float = 0.7, max_tokens: int = 200) -> str:
+        """Full completion text"""
+        await self._acquire()
+        self.requests += 1
+        started = time.perf_counter()
+        try:
+            for attempt in range(self.max_retries + 1):
+                last_attempt = attempt == self.max_retries
+                try:
+                    response = await self._client().post(
+                        "/chat/completions",
+                        json=self._payload(messages, model, temperature, max_tokens, False),
+                    )
+                except httpx.TimeoutException as e:
+                    self._error("timeout")
+                    if last_attempt:
+                        raise LLMError(f"LLM timed out: {e}") from e
+                    await self._backoff(attempt)
+                    continue
+                except httpx.TransportError as e:
+                    self._error("transport")
+                    if last_attempt:
+                        raise LLMError(f"LLM connection failed: {e}") from e
+                    await self._backoff(attempt)
+                    continue
+
+                if response.status_code >= 400:
+                    self._error(f"http_{response.status_code}")
+                    if response.status_code in RETRYABLE_STATUS and not last_attempt:
+                        await self._backoff(attempt, response.headers.get("retry-after"))
+                        continue
+                    raise LLMError(f"LLM returned HTTP {response.status_code}: {response.text[:200]}")
+
+                try:
+                    content = _message_content(response)
+                except LLMError:
+                    self._error("malformed")
+                    raise
+                self.successes += 1
+                self._latencies.append(time.perf_counter() - started)
+                return content
+        finally:
+            self._release()
+
+    async def stream(self, messages: list, model: str, temperature: float = 0.7, max_tokens: int = 200):
+        """Async generator of text deltas; retries only before the first delta"""
+        await self._acquire()
+        self.requests += 1
+        started = time.perf_counter()
+        try:
+            for attempt in range(self.max_retries + 1):
+                last_attempt = attempt == self.max_retries
+                emitted = False
+                try:
+                    async with self._client().stream(
+                        "POST",
+                        "/chat/completions",
+                        json=self._payload(messages, model, temperature, max_tokens, True),
+                    ) as response:
+                        if response.status_code >= 400:
+                            await response.aread()
+                            self._error(f"http_{response.status_code}")
+                            if response.status_code in RETRYABLE_STATUS and not last_attempt:
+                                await self._backoff(attempt, response.headers.get("retry-after"))
+                                continue
+                            raise LLMError(f"LLM returned HTTP {response.status_code}: {response.text[:200]}")
+
+                        async for line in response.aiter_lines():
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[5:].strip()
+                            if data == "[DONE]":
+                                break
+                            try:
+                                delta = _delta_content(data)
+                            except LLMError:
+                                self._error("malformed")
+                                raise
+                            if delta:
+                                if not emitted:
+                                    self._first_token.append(time.perf_counter() - started)
+                                    emitted = True
+                                yield delta
+
+                    self.successes += 1
+                    self._latencies.append(time.perf_counter() - started)
+                    return
+
+                except (httpx.TimeoutException, httpx.TransportError) as e:
+                    self._error("timeout" if isinstance(e, httpx.TimeoutException) else "transport")
+                    # Once text reached the caller a retry would duplicate it
+                    if emitted or last_attempt:
+                        raise LLMError(f"LLM stream failed: {e}") from e
+                    await self._backoff(attempt)
+        finally:
+            self._release()
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def stats(self) -> dict:
+        latencies = list(self._latencies)
+        first_token = list(self._first_token)
+        return {
+            "base_url": self.base_url,
+            "backend": "fake" if self.transport is not None else "http",
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "successes": self.successes,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "errors": dict(self.errors),
+            "latency_p50_ms": percentile_ms(latencies, 50),
+            "latency_p95_ms": percentile_ms(latencies, 95),
+            "latency_p99_ms": percentile_ms(latencies, 99),
+            "first_token_p50_ms": percentile_ms(first_token, 50),
+            "first_token_p95_ms": percentile_ms(first_token, 95),
+        }
+
+
+llm_client = LLMClient(
+    base_url=env_str("AIRA_LLM_BASE_URL", "https://api.groq.com/openai/v1"),
+    api_key=os.getenv("GROQ_API_KEY"),
+    timeout=env_float("AIRA_LLM_TIMEOUT", 30.0),
+    connect_timeout=env_float("AIRA_LLM_CONNECT_TIMEOUT", 5.0),
+    max_concurrency=env_int("AIRA_LLM_MAX_CONCURRENCY", 16),
+    queue_timeout=env_float("AIRA_LLM_QUEUE_TIMEOUT", 10.0),
+    max_retries=env_int("AIRA_LLM_MAX_RETRIES", 2),
+    max_connections=env_int("AIRA_LLM_MAX_CONNECTIONS", 32),
+    transport=fake_llm_transport() if env_str("AIRA_LLM_BACKEND", "http") == "fake" else None,
+)
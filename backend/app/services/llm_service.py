@@ -1,12 +1,9 @@
-import os
-from groq import Groq
-from dotenv import load_dotenv
-from app.services.memory import add_message, get_conversation
+from app.core.config import env_str
+from app.services.llm_client import llm_client
+from app.services.memory import add_message, aget_conversation
 from app.core.tone_manager import get_tone_config
 
-load_dotenv()
-
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+LLM_MODEL = env_str("AIRA_LLM_MODEL", "llama-3.1-8b-instant")
 
 SYSTEM_PROMPT = """
 You are AIRA, an emotionally intelligent and empathetic AI assistant.
@@ -52,11 +49,11 @@ IMPORTANT:
 """
 
 
-def generate_response(
+async def _build_messages(
     user_text: str,
     detected_emotion: str,
     emotion_history: list,
-    user_id: str = "default"
+    user_id: str
 ):
 
     # Optional tone config (if used elsewhere)
@@ -65,7 +62,7 @@ def generate_response(
     # Save user message into memory
     add_message(user_id, "user", user_text)
 
-    conversation_history = get_conversation(user_id)
+    conversation_history = await aget_conversation(user_id)
 
     # -------------------------------
     # 🔥 Smart Feature Suggestion Layer
@@ -122,20 +119,57 @@ If not necessary, continue normal emotional support.
     # Add past conversation memory
     messages.extend(conversation_history)
 
+    return messages
+
+
+async def generate_response(
+    user_text: str,
+    detected_emotion: str,
+    emotion_history: list,
+    user_id: str = "default"
+):
+
+    messages = await _build_messages(user_text, detected_emotion, emotion_history, user_id)
+
     # -------------------------------
-    # 🤖 Call Groq LLM
+    # 🤖 Call LLM (pooled async client)
     # -------------------------------
 
-    completion = client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=messages,
+    assistant_reply = await llm_client.complete(
+        messages,
+        model=LLM_MODEL,
         temperature=0.7,
         max_tokens=200,
     )
 
-    assistant_reply = completion.choices[0].message.content
-
     # Save assistant reply in memory
     add_message(user_id, "assistant", assistant_reply)
 
-    return assistant_reply
\ No newline at end of file
+    return assistant_reply
+
+
+async def stream_response(
+    user_text: str,
+    detected_emotion: str,
+    emotion_history: list,
+    user_id: str = "default"
+):
+    """
+    Same as generate_response, but yields text deltas as the LLM produces
+    them. The assistant reply is saved to memory once the stream ends.
+    """
+
+    messages = await _build_messages(user_text, detected_emotion, emotion_history, user_id)
+
+    parts = []
+    async for delta in llm_client.stream(
+        messages,
+        model=LLM_MODEL,
+        temperature=0.7,
+        max_tokens=200,
+    ):
+        parts.append(delta)
+        yield delta
+
+    # Save assistant reply in memory
+    add_message(user_id, "assistant", "".join(parts))
@@ -6,6 +6,13 @@ CRISIS_TEMPLATES = [
     """I’m really glad you told me this. That takes strength, even if it doesn’t feel like it. When things feel this dark, support matters more than anything else. If you're in immediate danger, please reach out to emergency services or a crisis helpline in your area right now. You matter more than this moment. Tell me what’s been building up inside."""
 ]
 
+# Fixed voice-mode replies
+NO_SPEECH_RESPONSE = "I couldn't hear what you said. Could you try again?"
+LLM_FAILURE_RESPONSE = "I heard you, but I'm having trouble responding right now."
+
+# Every reply whose audio can be rendered ahead of time
+STATIC_RESPONSES = CRISIS_TEMPLATES + [NO_SPEECH_RESPONSE, LLM_FAILURE_RESPONSE]
+
 def generate_local_response(emotion: str):
     if emotion not in RESPONSES:
         emotion = "neutral"
@@ -1,32 +1,479 @@
-from collections import defaultdict
+"""
+services/memory.py
+------------------
+Bounded Per-User Memory
+Recent conversation turns and detected emotions, per user.
 
-# Conversation history
-conversation_memory = defaultdict(list)
+- fixed-size deques per user (appends never re-slice or copy)
+- at most AIRA_MEMORY_MAX_USERS users, least recently active evicted
+  first; users idle longer than AIRA_MEMORY_TTL_S are dropped
+- compact records: (role, content) tuples with interned roles and
+  emotion labels, content capped at AIRA_MEMORY_MAX_CHARS
+- reads never create a user; counters show up in /health/caches
 
-# Emotion history
-emotion_memory = defaultdict(list)
+AIRA_MEMORY_BACKEND picks where memory lives:
+- "local"  (default) this process only; fine for a single worker
+- "sqlite" shared file (AIRA_MEMORY_SQLITE_PATH), every worker on a host
+- "kv"     Redis (AIRA_MEMORY_KV_URL), every worker on every node
 
+Shared backends sit behind SharedMemoryStore: reads go through a short
+per-user cache, writes land in that cache at once and reach the backend
+in batches from a background thread.
+"""
 
-def add_message(user_id: str, role: str, content: str):
-    conversation_memory[user_id].append({
-        "role": role,
-        "content": content
-    })
+import asyncio
+import itertools
+import logging
+import secrets
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+from app.core.cache import LRUCache, register_cache
+from app.core.config import env_float, env_int, env_str
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGES = 6     # conversation turns kept per user
+MAX_EMOTIONS = 10    # emotion labels kept per user
+
+
+class _UserMemory:
+    __slots__ = ("messages", "emotions", "touched")
+
+    def __init__(self, max_messages: int, max_emotions: int):
+        self.messages = deque(maxlen=max_messages)
+        self.emotions = deque(maxlen=max_emotions)
+        self.touched = time.monotonic()
+
+
+def _conversation(memory) -> list:
+    return [{"role": role, "content": content} for role, content in memory.messages]
+
+
+def _emotions(memory) -> list:
+    return list(memory.emotions)
+
+
+class MemoryStore:
+    """Per-user deques behind one LRU (ordered by last activity) with an idle TTL"""
+
+    def __init__(self, name: str, max_users: int, ttl: float = 0.0, max_messages: int = MAX_MESSAGES,
+                 max_emotions: int = MAX_EMOTIONS, max_chars: int = 0):
+        self.name = name
+        self.max_users = max(1, max_users)
+        self.ttl = max(0.0, ttl)
+        self.max_messages = max_messages
+        self.max_emotions = max_emotions
+        self.max_chars = max(0, max_chars)
+
+        self._users = OrderedDict()  # user_id -> _UserMemory, least recently active first
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expired(self, memory: _UserMemory, now: float) -> bool:
+        return bool(self.ttl) and now - memory.touched > self.ttl
+
+    def _lookup(self, user_id: str):
+        """Existing, unexpired memory (lock held); does not count as activity"""
+        memory = self._users.get(user_id)
+        if memory is not None and self._expired(memory, time.monotonic()):
+            del self._users[user_id]
+            self.expirations += 1
+            memory = None
+        if memory is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return memory
+
+    def _for_write(self, user_id: str) -> _UserMemory:
+        """Memory for a write (lock held): created if needed, marked most recent"""
+        now = time.monotonic()
+        memory = self._users.get(user_id)
+        if memory is not None and not self._expired(memory, now):
+            memory.touched = now
+            self._users.move_to_end(user_id)
+            return memory
+
+        if memory is not None:
+            self.expirations += 1
+        memory = self._users[user_id] = _UserMemory(self.max_messages, self.max_emotions)
+        self._users.move_to_end(user_id)
+
+        # Only inserts grow the store. Oldest activity sits at the front:
+        # drop idle users, then enforce the cap
+        while self._users:
+            oldest = next(iter(self._users.values()))
+            if not self._expired(oldest, now):
+                break
+            self._users.popitem(last=False)
+            self.expirations += 1
+        while len(self._users) > self.max_users:
+            self._users.popitem(last=False)
+            self.evictions += 1
+        return memory
+
+    # === CONVERSATION ===
+
+    def add_message(self, user_id: str, role: str, content: str):
+        if self.max_chars and len(content) > self.max_chars:
+            content = content[:self.max_chars]
+        with self._lock:
+            self._for_write(user_id).messages.append((sys.intern(role), content))
+
+    def get_conversation(self, user_id: str) -> list:
+        with self._lock:
+            memory = self._lookup(user_id)
+            return _conversation(memory) if memory is not None else []
+
+    # === EMOTIONS ===
+
+    def add_emotion(self, user_id: str, emotion: str):
+        with self._lock:
+            self._for_write(user_id).emotions.append(sys.intern(emotion))
+
+    def get_emotion_history(self, user_id: str) -> list:
+        with self._lock:
+            memory = self._lookup(user_id)
+            return _emotions(memory) if memory is not None else []
+
+    async def aget_conversation(self, user_id: str) -> list:
+        return self.get_conversation(user_id)
+
+    async def aget_emotion_history(self, user_id: str) -> list:
+        return self.get_emotion_history(user_id)
+
+    def forget(self, user_id: str):
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    async def aforget(self, user_id: str):
+        self.forget(user_id)
+
+    def close(self):
+        """Nothing to flush (in-process)"""
+
+    def __len__(self):
+        return len(self._users)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "users": len(self._users),
+                "max_users": self.max_users,
+                "ttl_seconds": self.ttl,
+                "messages": sum(len(m.messages) for m in self._users.values()),
+                "emotions": sum(len(m.emotions) for m in self._users.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SharedMemoryStore:
+    """
+    MemoryStore API over a shared backend (see memory_backends).
+
+    - read-through: a user's memory is loaded once, then served from an
+      LRU for `cache_ttl` seconds, after which the next read reloads it
+      and picks up what other workers wrote
+    - write-behind: appends update the cached copy immediately and queue
+      an op; a flusher thread sends queued ops every `flush_interval`
+      seconds (or once `flush_max` pile up) as one backend batch
+    - a load merges ops still queued or in flight here, so a worker always
+      sees its own writes; loads never wait for a flush. Every op carries
+      an id, so one that reached the backend while being replayed is
+      skipped instead of counted twice
+    - async readers (aget_*) load on a worker thread, off the event loop
+    """
+
+    MAX_PENDING = 10000  # ops kept for retry while the backend is down
+    LOAD_RETRY_S = 1.0   # how long a failed load is served as empty
+
+    def __init__(self, name: str, backend, max_users: int, cache_ttl: float, flush_interval: float,
+                 flush_max: int = 256, max_messages: int = MAX_MESSAGES, max_emotions: int = MAX_EMOTIONS,
+                 max_chars: int = 0):
+        self.name = name
+        self.backend = backend
+        self.max_messages = max_messages
+        self.max_emotions = max_emotions
+        self.max_chars = max(0, max_chars)
+        self.flush_interval = max(0.001, flush_interval)
+        self.flush_max = max(1, flush_max)
+
+        self._cache = LRUCache(name, max_entries=max_users, ttl=cache_ttl)
+        self._pending = []                   # (user_id, kind, value, op_id), oldest first
+        self._inflight = []                  # the batch a flush is sending
+        self._epoch = 0                      # bumped whenever the backend changes under loads
+        self._lock = threading.Lock()        # cache contents + pending + inflight
+        self._flush_lock = threading.Lock()  # one flush at a time
+        self._origin = secrets.token_hex(4)  # op ids are unique across workers
+        self._op_ids = itertools.count()
+
+        self.loads = 0
+        self.load_errors = 0
+        self.flushes = 0
+        self.flushed_ops = 0
+        self.flush_errors = 0
+        self.dropped_ops = 0
+
+        self._closed = False
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, name=f"aira-{name}-flush", daemon=True)
+        self._thread.start()
+
+    # === READS ===
+
+    def _local_ops(self, user_id: str) -> list:
+        """This user's ops not yet confirmed by the backend (lock held)"""
+        return [op for op in self._inflight + self._pending if op[0] == user_id]
 
-    # Keep last 6 messages only
-    conversation_memory[user_id] = conversation_memory[user_id][-6:]
+    def _load(self, user_id: str) -> _UserMemory:
+        """
+        Backend read, then replay of ops queued or in flight here (as of
+        the start of the read and now), minus those the read already
+        returned. If a batch lands mid-read the read is retried once.
+        A failed read is cached as empty for LOAD_RETRY_S so an outage
+        doesn't stall every call.
+        """
+        for attempt in range(2):
+            with self._lock:
+                epoch = self._epoch
+                before = self._local_ops(user_id)
+            try:
+                messages, emotions = self.backend.load(user_id)
+            except Exception as e:
+                logger.warning(f"⚠️ Memory backend load failed ({self.backend.name}): {e}")
+                self.load_errors += 1
+                messages, emotions, ttl = [], [], self.LOAD_RETRY_S
+            else:
+                self.loads += 1
+                ttl = None
+                if attempt == 0 and self._epoch != epoch:
+                    continue  # a batch landed mid-read
+
+            memory = _UserMemory(self.max_messages, self.max_emotions)
+            memory.messages.extend((sys.intern(role), content) for role, content, _ in messages)
+            memory.emotions.extend(sys.intern(emotion) for emotion, _ in emotions)
+            seen = {op_id for *_, op_id in messages}
+            seen.update(op_id for _, op_id in emotions)
+
+            with self._lock:
+                for _, kind, value, op_id in before + self._local_ops(user_id):
+                    if op_id not in seen:
+                        seen.add(op_id)
+                        (memory.messages if kind == "message" else memory.emotions).append(value)
+                self._cache.set(user_id, memory, ttl=ttl)
+            return memory
+
+    def _snapshot(self, memory: _UserMemory, read) -> list:
+        with self._lock:
+            return read(memory)
+
+    def get_conversation(self, user_id: str) -> list:
+        memory = self._cache.get(user_id)
+        if memory is None:
+            memory = self._load(user_id)
+        return self._snapshot(memory, _conversation)
+
+    def get_emotion_history(self, user_id: str) -> list:
+        memory = self._cache.get(user_id)
+        if memory is None:
+            memory = self._load(user_id)
+        return self._snapshot(memory, _emotions)
+
+    async def aget_conversation(self, user_id: str) -> list:
+        """get_conversation for the event loop: a cache miss loads in a thread"""
+        memory = self._cache.get(user_id)
+        if memory is None:
+            memory = await asyncio.to_thread(self._load, user_id)
+        return self._snapshot(memory, _conversation)
+
+    async def aget_emotion_history(self, user_id: str) -> list:
+        memory = self._cache.get(user_id)
+        if memory is None:
+            memory = await asyncio.to_thread(self._load, user_id)
+        return self._snapshot(memory, _emotions)
+
+    # === WRITES ===
+
+    def _write(self, user_id: str, kind: str, value):
+        with self._lock:
+            # Cached copies are updated in place (their freshness still counts from the load)
+            memory = self._cache.peek(user_id)
+            if memory is not None:
+                (memory.messages if kind == "message" else memory.emotions).append(value)
+            self._pending.append((user_id, kind, value, f"{self._origin}:{next(self._op_ids)}"))
+            if len(self._pending) > self.MAX_PENDING:
+                del self._pending[0]
+                self.dropped_ops += 1
+            wake = len(self._pending) >= self.flush_max
+        if wake:
+            self._wake.set()
+
+    def add_message(self, user_id: str, role: str, content: str):
+        if self.max_chars and len(content) > self.max_chars:
+            content = content[:self.max_chars]
+        self._write(user_id, "message", (sys.intern(role), content))
+
+    def add_emotion(self, user_id: str, emotion: str):
+        self._write(user_id, "emotion", sys.intern(emotion))
+
+    def forget(self, user_id: str):
+        self.flush()
+        with self._flush_lock:
+            self.backend.forget(user_id)
+            with self._lock:
+                self._cache.pop(user_id)
+                self._epoch += 1
+
+    async def aforget(self, user_id: str):
+        await asyncio.to_thread(self.forget, user_id)
+
+    # === FLUSHING ===
+
+    def flush(self):
+        """Send every queued op to the backend as one batch"""
+        with self._flush_lock:
+            with self._lock:
+                ops, self._pending = self._pending, []
+                self._inflight = ops
+            if not ops:
+                return
+            try:
+                self.backend.append(ops)
+            except Exception as e:
+                logger.error(f"Memory backend flush failed ({self.backend.name}), will retry: {e}")
+                self.flush_errors += 1
+                with self._lock:
+                    self._inflight = []
+                    self._pending[:0] = ops
+                    overflow = len(self._pending) - self.MAX_PENDING
+                    if overflow > 0:
+                        del self._pending[:overflow]
+                        self.dropped_ops += overflow
+                return
+            with self._lock:
+                self._inflight = []
+                self._epoch += 1
+            self.flushes += 1
+            self.flushed_ops += len(ops)
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """Stop the flusher, write what is left and release the backend"""
+        self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=5.0)
+        self.flush()
+        self.backend.close()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        with self._lock:
+            pending = len(self._pending)
+        stats.update({
+            "backend": self.backend.name,
+            "pending_ops": pending,
+            "loads": self.loads,
+            "load_errors": self.load_errors,
+            "flushes": self.flushes,
+            "flushed_ops": self.flushed_ops,
+            "avg_batch": round(self.flushed_ops / self.flushes, 2) if self.flushes else 0.0,
+            "flush_errors": self.flush_errors,
+            "dropped_ops": self.dropped_ops,
+        })
+        return stats
+
+
+MEMORY_BACKENDS = ("local", "sqlite", "kv")
+
+
+def _build_store():
+    backend = env_str("AIRA_MEMORY_BACKEND", "local")
+    max_users = env_int("AIRA_MEMORY_MAX_USERS", 10000)
+    ttl = env_float("AIRA_MEMORY_TTL_S", 24 * 3600)
+    max_chars = env_int("AIRA_MEMORY_MAX_CHARS", 4000)
+
+    if backend not in MEMORY_BACKENDS:
+        logger.warning(f"⚠️ Unknown AIRA_MEMORY_BACKEND '{backend}', using local memory")
+        backend = "local"
+    if backend == "local":
+        return MemoryStore("user_memory", max_users=max_users, ttl=ttl, max_chars=max_chars)
+
+    from app.services.memory_backends import KVMemoryBackend, SQLiteMemoryBackend, kv_client
+
+    if backend == "sqlite":
+        shared = SQLiteMemoryBackend(env_str("AIRA_MEMORY_SQLITE_PATH", "aira_memory.db"),
+                                     MAX_MESSAGES, MAX_EMOTIONS, ttl=ttl)
+    else:
+        shared = KVMemoryBackend(kv_client(env_str("AIRA_MEMORY_KV_URL", "redis://localhost:6379/0")),
+                                 MAX_MESSAGES, MAX_EMOTIONS, ttl=ttl)
+
+    logger.info(f"🧠 Shared user memory: {shared.name}")
+    return SharedMemoryStore(
+        "user_memory", shared,
+        max_users=max_users,
+        cache_ttl=env_float("AIRA_MEMORY_CACHE_TTL_S", 2.0),
+        flush_interval=env_int("AIRA_MEMORY_FLUSH_MS", 50) / 1000,
+        flush_max=env_int("AIRA_MEMORY_FLUSH_MAX", 256),
+        max_chars=max_chars,
+    )
+
+
+user_memory = register_cache(_build_store())
+
+
+def close_memory():
+    """Flush pending writes on shutdown"""
+    user_memory.close()
+
+
+def add_message(user_id: str, role: str, content: str):
+    user_memory.add_message(user_id, role, content)
 
 
 def get_conversation(user_id: str):
-    return conversation_memory[user_id]
+    return user_memory.get_conversation(user_id)
 
 
-def add_emotion(user_id: str, emotion: str):
-    emotion_memory[user_id].append(emotion)
+async def aget_conversation(user_id: str):
+    """get_conversation for async handlers (a shared-store miss loads off the loop)"""
+    return await user_memory.aget_conversation(user_id)
 
-    # Keep last 10 emotions
-    emotion_memory[user_id] = emotion_memory[user_id][-10:]
+
+def add_emotion(user_id: str, emotion: str):
+    user_memory.add_emotion(user_id, emotion)
 
 
 def get_emotion_history(user_id: str):
-    return emotion_memory[user_id]
\ No newline at end of file
+    return user_memory.get_emotion_history(user_id)
+
+
+async def aget_emotion_history(user_id: str):
+    return await user_memory.aget_emotion_history(user_id)
+
+
+def forget_user(user_id: str):
+    user_memory.forget(user_id)
+
+
+async def aforget_user(user_id: str):
+    await user_memory.aforget(user_id)
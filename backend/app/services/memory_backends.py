@@ -0,0 +1,208 @@
+"""
+services/memory_backends.py
+---------------------------
+Shared Memory Backends
+Where per-user conversation memory lives when several uvicorn workers
+(or pods) must see the same history.
+
+- SQLiteMemoryBackend: one WAL-mode SQLite file, shared by every worker
+  on the host (or a shared volume)
+- KVMemoryBackend: Redis lists, shared across nodes; any client with
+  Redis' list commands works, including fake_backends.FakeKV
+
+Both store only the last max_messages / max_emotions per user, expire
+idle users after `ttl` seconds, and apply a batch of appends in one
+transaction / one pipelined round trip.
+
+    load(user_id)  -> ([(role, content, op_id), ...], [(emotion, op_id), ...])  oldest first
+    append(ops)    ops = [(user_id, "message", (role, content), op_id) | (user_id, "emotion", label, op_id)]
+
+op_id is the writer's id for the op, handed back by load so a writer can
+tell which of its unconfirmed ops already landed.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 300.0  # seconds between sweeps of idle users (SQLite)
+
+
+class SQLiteMemoryBackend:
+    name = "sqlite"
+
+    def __init__(self, path: str, max_messages: int, max_emotions: int, ttl: float = 0.0):
+        self.path = path
+        self.max_messages = max_messages
+        self.max_emotions = max_emotions
+        self.ttl = ttl
+        self._last_purge = 0.0
+        self._lock = threading.Lock()
+
+        # One connection, serialized; other workers coordinate through SQLite's file locks
+        self._db = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS memory_messages (
+                id INTEGER PRIMARY KEY, user_id TEXT NOT NULL, role TEXT NOT NULL,
+                content TEXT NOT NULL, op_id TEXT NOT NULL, created_at REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS ix_memory_messages_user ON memory_messages (user_id, id);
+            CREATE TABLE IF NOT EXISTS memory_emotions (
+                id INTEGER PRIMARY KEY, user_id TEXT NOT NULL, emotion TEXT NOT NULL,
+                op_id TEXT NOT NULL, created_at REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS ix_memory_emotions_user ON memory_emotions (user_id, id);
+        """)
+        for table in ("memory_messages", "memory_emotions"):  # files from before op ids
+            columns = {row[1] for row in self._db.execute(f"PRAGMA table_info({table})")}
+            if "op_id" not in columns:
+                self._db.execute(f"ALTER TABLE {table} ADD COLUMN op_id TEXT NOT NULL DEFAULT ''")
+
+    def load(self, user_id: str) -> tuple:
+        with self._lock:
+            messages = self._db.execute(
+                "SELECT role, content, op_id FROM (SELECT id, role, content, op_id FROM memory_messages "
+                "WHERE user_id = ? ORDER BY id DESC LIMIT ?) ORDER BY id",
+                (user_id, self.max_messages),
+            ).fetchall()
+            emotions = self._db.execute(
+                "SELECT emotion, op_id FROM (SELECT id, emotion, op_id FROM memory_emotions "
+                "WHERE user_id = ? ORDER BY id DESC LIMIT ?) ORDER BY id",
+                (user_id, self.max_emotions),
+            ).fetchall()
+        return messages, emotions
+
+    def append(self, ops: list):
+        now = time.time()
+        messages = [(uid, value[0], value[1], op_id, now) for uid, kind, value, op_id in ops if kind == "message"]
+        emotions = [(uid, value, op_id, now) for uid, kind, value, op_id in ops if kind == "emotion"]
+        message_users = {row[0] for row in messages}
+        emotion_users = {row[0] for row in emotions}
+
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "INSERT INTO memory_messages (user_id, role, content, op_id, created_at) VALUES (?, ?, ?, ?, ?)",
+                    messages)
+                self._db.executemany(
+                    "INSERT INTO memory_emotions (user_id, emotion, op_id, created_at) VALUES (?, ?, ?, ?)", emotions)
+
+                # Keep only each user's newest rows
+                self._db.executemany(
+                    "DELETE FROM memory_messages WHERE user_id = ? AND id <= "
+                    "(SELECT id FROM memory_messages WHERE user_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    [(uid, uid, self.max_messages) for uid in message_users])
+                self._db.executemany(
+                    "DELETE FROM memory_emotions WHERE user_id = ? AND id <= "
+                    "(SELECT id FROM memory_emotions WHERE user_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    [(uid, uid, self.max_emotions) for uid in emotion_users])
+
+                if self.ttl and now - self._last_purge > PURGE_INTERVAL:
+                    self._purge(now - self.ttl)
+                    self._last_purge = now
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def _purge(self, cutoff: float):
+        """Drop users whose newest row is older than cutoff"""
+        for table in ("memory_messages", "memory_emotions"):
+            self._db.execute(
+                f"DELETE FROM {table} WHERE user_id IN "
+                f"(SELECT user_id FROM {table} GROUP BY user_id HAVING MAX(created_at) < ?)",
+                (cutoff,),
+            )
+
+    def forget(self, user_id: str):
+        with self._lock:
+            self._db.execute("DELETE FROM memory_messages WHERE user_id = ?", (user_id,))
+            self._db.execute("DELETE FROM memory_emotions WHERE user_id = ?", (user_id,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def _message(raw: str) -> tuple:
+    role, content, *op_id = json.loads(raw)  # entries from before op ids have none
+    return role, content, op_id[0] if op_id else ""
+
+
+def _emotion(raw: str) -> tuple:
+    if not raw.startswith("["):
+        return raw, ""  # plain label, from before op ids
+    emotion, op_id = json.loads(raw)
+    return emotion, op_id
+
+
+class KVMemoryBackend:
+    name = "kv"
+
+    def __init__(self, client, max_messages: int, max_emotions: int, ttl: float = 0.0,
+                 prefix: str = "aira:memory:"):
+        self.client = client
+        self.max_messages = max_messages
+        self.max_emotions = max_emotions
+        self.ttl = int(ttl)
+        self.prefix = prefix
+
+    def _keys(self, user_id: str) -> tuple:
+        return f"{self.prefix}{user_id}:messages", f"{self.prefix}{user_id}:emotions"
+
+    def load(self, user_id: str) -> tuple:
+        messages_key, emotions_key = self._keys(user_id)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.lrange(messages_key, -self.max_messages, -1)
+        pipe.lrange(emotions_key, -self.max_emotions, -1)
+        messages, emotions = pipe.execute()
+        return [_message(m) for m in messages], [_emotion(e) for e in emotions]
+
+    def append(self, ops: list):
+        """Every push, trim and expiry of the batch in one pipelined round trip"""
+        pipe = self.client.pipeline(transaction=False)
+        trims = {}
+        for user_id, kind, value, op_id in ops:
+            messages_key, emotions_key = self._keys(user_id)
+            if kind == "message":
+                pipe.rpush(messages_key, json.dumps([value[0], value[1], op_id]))
+                trims[messages_key] = self.max_messages
+            else:
+                pipe.rpush(emotions_key, json.dumps([value, op_id]))
+                trims[emotions_key] = self.max_emotions
+        for key, keep in trims.items():
+            pipe.ltrim(key, -keep, -1)
+            if self.ttl:
+                pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def forget(self, user_id: str):
+        pipe = self.client.pipeline(transaction=False)
+        for key in self._keys(user_id):
+            pipe.delete(key)
+        pipe.execute()
+
+    def close(self):
+        self.client.close()
+
+
+def kv_client(url: str):
+    """Redis client for url; fake:// gives the in-process stand-in"""
+    if url.startswith("fake://"):
+        from app.services.fake_backends import fake_kv
+
+        return fake_kv(url)
+    if not REDIS_AVAILABLE:
+        raise RuntimeError("redis is not installed. Run: pip install redis")
+    return redis.Redis.from_url(url, decode_responses=True, socket_timeout=2.0)
@@ -0,0 +1,145 @@
+"""
+services/pitch.py
+-----------------
+Selectable Pitch (F0) Backends
+
+- "yin":  vectorized YIN over a speech F0 band (default, request path)
+- "pyin": librosa.pyin over C2-C7 (accurate mode, Viterbi HMM, slow)
+
+Select with AIRA_PITCH_BACKEND or the `backend` argument.
+See benchmarks/bench_pitch.py for the accuracy / latency comparison.
+"""
+
+import logging
+
+import numpy as np
+
+from app.core.config import env_str
+
+try:
+    import librosa
+    LIBROSA_AVAILABLE = True
+except ImportError:
+    LIBROSA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+PITCH_BACKENDS = ("yin", "pyin")
+DEFAULT_PITCH_BACKEND = env_str("AIRA_PITCH_BACKEND", "yin")
+
+# Speaking F0 rarely leaves 65-500 Hz; a narrow band means short lags
+SPEECH_FMIN = 65.0
+SPEECH_FMAX = 500.0
+
+HOP_LENGTH = 512               # same frame rate as librosa.pyin defaults
+YIN_TROUGH_THRESHOLD = 0.1     # absolute threshold from the YIN paper
+YIN_VOICING_THRESHOLD = 0.3    # aperiodicity above this -> unvoiced
+YIN_SILENCE_DB = 45.0          # frames this far below the loudest are unvoiced
+
+
+def _yin(y: np.ndarray, sr: int, fmin: float = SPEECH_FMIN, fmax: float = SPEECH_FMAX):
+    """Vectorized YIN: all frames and lags at once via one batched FFT"""
+    min_lag = max(2, int(np.floor(sr / fmax)))
+    max_lag = int(np.ceil(sr / fmin))
+
+    # Integration window must cover the longest period
+    win = 1 << int(np.ceil(np.log2(max_lag + 2)))
+    frame_length = 2 * win
+
+    padded = np.pad(y.astype(np.float64), frame_length // 2, mode="constant")
+    frames = np.lib.stride_tricks.sliding_window_view(padded, frame_length)[::HOP_LENGTH]
+    n_frames = frames.shape[0]
+
+    # Cross term sum_j x[j] * x[j + lag] for every frame, via FFT correlation
+    n_fft = 1 << int(np.ceil(np.log2(frame_length + win)))
+    head = np.fft.rfft(frames[:, :win], n_fft, axis=1)
+    full = np.fft.rfft(frames, n_fft, axis=1)
+    cross = np.fft.irfft(np.conj(head) * full, n_fft, axis=1)[:, : max_lag + 1]
+
+    # Window energies via cumulative sums
+    energy = np.concatenate((np.zeros((n_frames, 1)), np.cumsum(frames ** 2, axis=1)), axis=1)
+    lags = np.arange(max_lag + 1)
+    energy_0 = energy[:, win][:, None]
+    energy_lag = energy[:, lags + win] - energy[:, lags]
+
+    # Difference function and cumulative-mean normalization
+    diff = np.maximum(energy_0 + energy_lag - 2.0 * cross, 0.0)
+    diff[:, 0] = 0.0
+    running = np.cumsum(diff[:, 1:], axis=1)
+    cmnd = np.ones_like(diff)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cmnd[:, 1:] = np.where(running > 0, diff[:, 1:] * lags[1:] / running, 1.0)
+
+    # First trough under the threshold, else the global minimum
+    band = cmnd[:, min_lag : max_lag + 1]
+    trough = np.zeros_like(band, dtype=bool)
+    trough[:, 1:-1] = (band[:, 1:-1] < band[:, :-2]) & (band[:, 1:-1] <= band[:, 2:])
+    trough[:, 0] = band[:, 0] < band[:, 1]
+    candidates = trough & (band < YIN_TROUGH_THRESHOLD)
+    best = np.where(candidates.any(axis=1), np.argmax(candidates, axis=1), np.argmin(band, axis=1))
+
+    # Parabolic interpolation around the chosen lag
+    rows = np.arange(n_frames)
+    centre = np.clip(best, 1, band.shape[1] - 2)
+    left, mid, right = band[rows, centre - 1], band[rows, centre], band[rows, centre + 1]
+    denom = left - 2.0 * mid + right
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shift = np.where(np.abs(denom) > 1e-12, 0.5 * (left - right) / denom, 0.0)
+    shift = np.where(best == centre, np.clip(shift, -1.0, 1.0), 0.0)
+
+    f0 = sr / (min_lag + best + shift)
+
+    # Voicing: periodic enough and not silence
+    rms = np.sqrt(energy_0[:, 0] / win)
+    loud = rms > (rms.max() * 10 ** (-YIN_SILENCE_DB / 20.0) if rms.size else 0.0)
+    voiced = (band[rows, best] < YIN_VOICING_THRESHOLD) & loud & (f0 >= fmin) & (f0 <= fmax)
+
+    f0 = np.where(voiced, f0, np.nan)
+    return f0, voiced
+
+
+def _pyin(y: np.ndarray, sr: int):
+    f0, voiced_flag, _ = librosa.pyin(
+        y,
+        fmin=librosa.note_to_hz("C2"),  # ~65 Hz
+        fmax=librosa.note_to_hz("C7"),  # ~2093 Hz
+        sr=sr,
+    )
+    return f0, voiced_flag
+
+
+def estimate_pitch(y: np.ndarray, sr: int, backend: str = None):
+    """Return (f0 per frame with NaN when unvoiced, voiced flags)"""
+    backend = backend or DEFAULT_PITCH_BACKEND
+    if backend not in PITCH_BACKENDS:
+        raise ValueError(f"Unknown pitch backend '{backend}'. Options: {', '.join(PITCH_BACKENDS)}")
+
+    if backend == "pyin":
+        if not LIBROSA_AVAILABLE:
+            raise RuntimeError("librosa is not installed. Run: pip install librosa")
+        return _pyin(y, sr)
+    return _yin(y, sr)
+
+
+def pitch_stats(f0: np.ndarray, voiced_flag: np.ndarray) -> dict:
+    """Reduce a pitch track to the scalars used by the emotion scorer"""
+    voiced_f0 = f0[voiced_flag] if voiced_flag is not None and np.any(voiced_flag) else np.array([])
+
+    if len(voiced_f0) > 0:
+        mean_pitch = float(np.nanmean(voiced_f0))
+        pitch_std = float(np.nanstd(voiced_f0))
+        pitch_range = float(np.nanmax(voiced_f0) - np.nanmin(voiced_f0))
+        # Pitch coefficient of variation
+        pitch_cv = pitch_std / (mean_pitch + 1e-8)
+    else:
+        mean_pitch = 0.0
+        pitch_std = 0.0
+        pitch_range = 0.0
+        pitch_cv = 0.0
+
+    return {
+        "mean_pitch": mean_pitch,
+        "pitch_std": pitch_std,
+        "pitch_range": pitch_range,
+        "pitch_cv": pitch_cv,
+    }
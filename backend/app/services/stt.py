@@ -0,0 +1,140 @@
+"""
+services/stt.py
+---------------
+Speech-to-Text Profiles (Whisper)
+
+A profile = model size + optional int8 dynamic quantization + decoding
+options. Fast profiles decode greedily at temperature 0, with no
+temperature fallback and no conditioning on previous text.
+
+- "tiny-int8-greedy": realtime tier, lowest latency
+- "base-int8-greedy": balanced
+- "base":             Whisper defaults (temperature fallback), the old behaviour
+- "small-beam":       accuracy tier, beam search 5
+
+Deployment default: AIRA_STT_PROFILE. Requests may pass another profile.
+Only the default loads at startup; others load on first use.
+See benchmarks/bench_stt.py for real-time factor per profile.
+"""
+
+import logging
+
+import numpy as np
+
+from app.core.config import env_str
+from app.core.model_registry import get_model, is_ready, register_model
+
+try:
+    import whisper
+    WHISPER_AVAILABLE = True
+except ImportError:
+    WHISPER_AVAILABLE = False
+    logging.warning("⚠️ Whisper not installed. STT will not work. Run: pip install openai-whisper")
+
+logger = logging.getLogger(__name__)
+
+WHISPER_SR = 16000
+
+# Greedy, single pass: one decode per 30 s window, no fallback re-decodes
+_GREEDY = {
+    "temperature": 0.0,
+    "condition_on_previous_text": False,
+    "without_timestamps": True,
+}
+
+
+class STTProfile:
+
+    def __init__(self, name: str, model_size: str, quantize: bool = False, decode: dict = None):
+        self.name = name
+        self.model_size = model_size
+        self.quantize = quantize
+        self.decode = dict(decode or {})
+
+    @property
+    def model_name(self) -> str:
+        """Model registry name"""
+        return f"whisper:{self.name}"
+
+    def describe(self) -> dict:
+        return {"model_size": self.model_size, "int8": self.quantize, "decode": self.decode}
+
+
+STT_PROFILES = {
+    profile.name: profile
+    for profile in (
+        STTProfile("tiny-int8-greedy", "tiny", quantize=True, decode=_GREEDY),
+        STTProfile("base-int8-greedy", "base", quantize=True, decode=_GREEDY),
+        STTProfile("base", "base"),
+        STTProfile("small-beam", "small", decode={"beam_size": 5, "best_of": 5}),
+    )
+}
+DEFAULT_STT_PROFILE = env_str("AIRA_STT_PROFILE", "base")
+
+
+def resolve_profile(name: str = None) -> STTProfile:
+    """Profile by name (None -> deployment default); ValueError if unknown"""
+    name = name or DEFAULT_STT_PROFILE
+    profile = STT_PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"Unknown STT profile '{name}'. Choose from: {', '.join(STT_PROFILES)}")
+    return profile
+
+
+def _quantize_linear(model):
+    """int8 dynamic quantization of every Linear layer (weights int8, activations fp32)"""
+    import torch
+
+    # Whisper's Linear subclass only adds an fp16 cast; on CPU (fp32) it is a
+    # plain Linear, and quantize_dynamic only maps the exact nn.Linear type
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear) and type(module) is not torch.nn.Linear:
+            module.__class__ = torch.nn.Linear
+
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _loader(profile: STTProfile):
+    def load():
+        if not WHISPER_AVAILABLE:
+            raise RuntimeError("openai-whisper is not installed")
+        model = whisper.load_model(profile.model_size, device="cpu")
+        if profile.quantize:
+            model = _quantize_linear(model)
+        return model
+    return load
+
+
+def _warmup(profile: STTProfile):
+    def warmup(model):
+        _run(model, profile, np.zeros(WHISPER_SR, dtype=np.float32))
+    return warmup
+
+
+def _run(model, profile: STTProfile, audio_16k: np.ndarray) -> str:
+    result = model.transcribe(audio_16k, language="en", fp16=False, **profile.decode)
+    return result["text"].strip()
+
+
+for _profile in STT_PROFILES.values():
+    register_model(
+        _profile.model_name,
+        _loader(_profile),
+        warmup=_warmup(_profile),
+        eager=_profile.name == DEFAULT_STT_PROFILE,
+    )
+
+
+def stt_ready(profile_name: str = None) -> bool:
+    """Loaded and usable (without triggering a load)"""
+    return is_ready([resolve_profile(profile_name).model_name])
+
+
+def transcribe(audio_16k: np.ndarray, profile_name: str = None) -> str:
+    """Transcribe 16 kHz mono float audio; "" when Whisper is unavailable"""
+    profile = resolve_profile(profile_name)
+    model = get_model(profile.model_name)
+    if model is None:
+        logger.warning(f"Whisper ({profile.name}) not available, returning empty transcription")
+        return ""
+    return _run(model, profile, audio_16k)
@@ -15,23 +15,143 @@ print("✅ SSL fix applied for text emotion model...")
 # ====== SSL FIX END ======
 
 
-from transformers import pipeline
 import logging
+import unicodedata
+
+from app.core.batcher import MicroBatcher, register_batcher
+from app.core.cache import LRUCache, register_cache
+from app.core.config import env_float, env_int, env_str
+from app.core.executor import run_in_pool
+from app.core.model_registry import register_model, get_model
 
 logger = logging.getLogger(__name__)
 
-# Load model with error handling
-try:
-    print("📥 Downloading/Loading emotion model from HuggingFace...")
-    emotion_pipeline = pipeline(
+MODEL_NAME = "j-hartmann/emotion-english-distilroberta-base"
+
+# Inference runtime for the same weights:
+# - "torch":      fp32 eager PyTorch (reference)
+# - "torch-int8": dynamic int8 quantization of every Linear layer
+# - "onnx":       exported ONNX graph on onnxruntime (needs optimum[onnxruntime])
+# benchmarks/bench_text.py checks label parity and measures each one
+TEXT_BACKENDS = ("torch", "torch-int8", "onnx")
+TEXT_BACKEND = env_str("AIRA_TEXT_BACKEND", "torch")
+ONNX_EXPORT_DIR = env_str("AIRA_TEXT_ONNX_DIR", "cache/onnx/text_emotion")
+
+# Backends can differ in the last decimals, so they never share cache entries
+MODEL_VERSION = f"{MODEL_NAME}@{TEXT_BACKEND}"
+
+# Repeated short messages ("ok", "thank you") skip the model entirely
+text_cache = register_cache(LRUCache(
+    "text_emotion",
+    max_entries=env_int("AIRA_TEXT_CACHE_SIZE", 4096),
+    ttl=env_float("AIRA_TEXT_CACHE_TTL", 0.0),
+))
+
+
+def _onnx_model():
+    """Exported model, converted once and reused from ONNX_EXPORT_DIR"""
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    if os.path.exists(os.path.join(ONNX_EXPORT_DIR, "model.onnx")):
+        return ORTModelForSequenceClassification.from_pretrained(ONNX_EXPORT_DIR)
+
+    logger.info(f"📦 Exporting {MODEL_NAME} to ONNX ({ONNX_EXPORT_DIR})...")
+    model = ORTModelForSequenceClassification.from_pretrained(MODEL_NAME, export=True)
+    model.save_pretrained(ONNX_EXPORT_DIR)
+    return model
+
+
+def build_pipeline(backend: str = TEXT_BACKEND):
+    """text-classification pipeline for one backend (all scores per input)"""
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer, pipeline
+
+    if backend not in TEXT_BACKENDS:
+        raise ValueError(f"Unknown text backend '{backend}'. Choose from: {', '.join(TEXT_BACKENDS)}")
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, use_fast=True)
+
+    if backend == "onnx":
+        from optimum.pipelines import pipeline as ort_pipeline
+
+        return ort_pipeline(
+            "text-classification",
+            model=_onnx_model(),
+            tokenizer=tokenizer,
+            accelerator="ort",
+            return_all_scores=True
+        )
+
+    model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+    model.eval()
+    if backend == "torch-int8":
+        import torch
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+    return pipeline(
         "text-classification",
-        model="j-hartmann/emotion-english-distilroberta-base",
+        model=model,
+        tokenizer=tokenizer,
         return_all_scores=True
     )
-    print("✅ Emotion model loaded successfully!")
-except Exception as e:
-    logger.error(f"❌ Failed to load emotion model: {e}")
-    emotion_pipeline = None
+
+
+def _load_pipeline():
+    return build_pipeline(TEXT_BACKEND)
+
+
+def _warmup_pipeline(model):
+    model("warming up")
+
+
+register_model("text_emotion", _load_pipeline, warmup=_warmup_pipeline)
+
+
+def _cache_key(text: str) -> tuple:
+    """Model version + text with Unicode/whitespace differences folded away"""
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    return (MODEL_VERSION, normalized)
+
+
+def _cached(text: str):
+    result = text_cache.get(_cache_key(text))
+    return dict(result) if result is not None else None
+
+
+def _best(results: list) -> dict:
+    best = max(results, key=lambda x: x["score"])
+    return {
+        "emotion": best["label"],
+        "confidence": round(best["score"], 3),
+        "all_scores": {r["label"]: round(r["score"], 4) for r in results}
+    }
+
+
+def _classify_batch(texts: list) -> list:
+    """One padded forward pass for a list of non-empty texts"""
+    emotion_pipeline = get_model("text_emotion")
+    if emotion_pipeline is None:
+        logger.warning("Model not available, returning neutral emotion")
+        return [{"emotion": "neutral", "confidence": 0.5} for _ in texts]
+
+    try:
+        results = [_best(r) for r in emotion_pipeline(texts, batch_size=len(texts), truncation=True)]
+    except Exception as e:
+        logger.error(f"Error in emotion analysis: {e}")
+        return [{"emotion": "neutral", "confidence": 0.0} for _ in texts]
+
+    # Only real model outputs are cached, never fallbacks
+    for text, result in zip(texts, results):
+        text_cache.set(_cache_key(text), dict(result))
+    return results
+
+
+text_batcher = register_batcher(MicroBatcher(
+    "text_emotion",
+    _classify_batch,
+    pool_name="text",
+    max_batch_size=env_int("AIRA_TEXT_BATCH_SIZE", 16),
+    max_wait_ms=env_float("AIRA_TEXT_BATCH_WAIT_MS", 5.0),
+))
 
 
 def analyze_text_emotion(text: str):
@@ -40,20 +160,26 @@ def analyze_text_emotion(text: str):
     # Validation
     if not text or text.strip() == "":
         return {"emotion": "neutral", "confidence": 0.0}
+
+    cached = _cached(text)
+    if cached is not None:
+        return cached
     
-    # Fallback if model failed to load
-    if emotion_pipeline is None:
-        logger.warning("Model not available, returning neutral emotion")
-        return {"emotion": "neutral", "confidence": 0.5}
-    
-    try:
-        results = emotion_pipeline(text)[0]
-        best = max(results, key=lambda x: x["score"])
-        
-        return {
-            "emotion": best["label"],
-            "confidence": round(best["score"], 3)
-        }
-    except Exception as e:
-        logger.error(f"Error in emotion analysis: {e}")
-        return {"emotion": "neutral", "confidence": 0.0}
\ No newline at end of file
+    return _classify_batch([text])[0]
+
+
+async def analyze_text_emotion_async(text: str):
+    """Same as analyze_text_emotion, micro-batched with concurrent callers"""
+
+    # Validation
+    if not text or text.strip() == "":
+        return {"emotion": "neutral", "confidence": 0.0}
+
+    cached = _cached(text)
+    if cached is not None:
+        return cached
+
+    if text_batcher.max_batch_size <= 1:
+        return (await run_in_pool("text", _classify_batch, [text]))[0]
+
+    return await text_batcher.submit(text)
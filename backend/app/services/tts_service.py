@@ -1,16 +1,166 @@
 from gtts import gTTS
+from gtts.lang import tts_langs
+import base64
+import hashlib
+import json
+import logging
 import os
-import uuid
+import threading
+import zlib
 
-AUDIO_DIR = "static/audio"
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+    FERNET_AVAILABLE = True
+except ImportError:
+    FERNET_AVAILABLE = False
 
-os.makedirs(AUDIO_DIR, exist_ok=True)
+from app.core.config import env_int, env_str
+from app.core.executor import run_in_pool
+from app.services.audio_store import audio_store
+from app.services.fake_backends import fake_tts_stream
+from app.services.local_responses import STATIC_RESPONSES
 
-def generate_audio(text: str):
-    filename = f"{uuid.uuid4()}.mp3"
-    file_path = os.path.join(AUDIO_DIR, filename)
+logger = logging.getLogger(__name__)
 
-    tts = gTTS(text=text, lang="en")
-    tts.save(file_path)
+DEFAULT_LANG = "en"
+DEFAULT_TLD = "com"  # gTTS accent / voice
 
-    return f"/static/audio/{filename}"
\ No newline at end of file
+# gTTS requests translate.google.<tld>, so only known Google hosts are allowed
+TTS_TLDS = frozenset({
+    "com", "com.au", "co.uk", "us", "ca", "co.in", "ie", "co.za", "com.ng",
+    "com.br", "pt", "es", "com.mx", "fr", "de", "it", "co.jp", "co.kr", "com.hk",
+})
+TTS_LANGS = frozenset(tts_langs())
+
+# "stream": replies get a /tts/stream/<handle> URL, synthesized while sent
+# "file":   replies are synthesized to static/audio before responding
+TTS_MODE = env_str("AIRA_TTS_MODE", "stream")
+# "gtts": Google TTS; "fake": offline silent mp3 with simulated latency
+TTS_BACKEND = env_str("AIRA_TTS_BACKEND", "gtts")
+STREAM_HANDLE_TTL = env_int("AIRA_TTS_STREAM_TTL", 600)
+
+# Handles carry the text encrypted and authenticated (Fernet) under
+# AIRA_STREAM_SECRET, so any worker or pod with the same secret can serve
+# them and the reply text never shows in URLs or logs. Without the secret
+# (or the cryptography package) replies fall back to file mode.
+_STREAM_SECRET = env_str("AIRA_STREAM_SECRET", "")
+_fernet = None
+if TTS_MODE == "stream":
+    if not _STREAM_SECRET:
+        logger.warning("⚠️ AIRA_STREAM_SECRET is not set: TTS stream handles disabled, using AIRA_TTS_MODE=file")
+        TTS_MODE = "file"
+    elif not FERNET_AVAILABLE:
+        logger.warning("⚠️ cryptography is not installed: TTS stream handles disabled, using AIRA_TTS_MODE=file. "
+                       "Run: pip install cryptography")
+        TTS_MODE = "file"
+    else:
+        _fernet = Fernet(base64.urlsafe_b64encode(hashlib.sha256(_STREAM_SECRET.encode()).digest()))
+
+# Striped locks: concurrent requests for the same text synthesize it once
+_locks = [threading.Lock() for _ in range(64)]
+
+
+def _audio_filename(text: str, lang: str, tld: str) -> str:
+    """Content address: identical (text, lang, voice) -> identical file"""
+    key = f"{lang}\0{tld}\0{text}"
+    if TTS_BACKEND != "gtts":
+        # Never let stand-in audio be served once the real backend is back
+        key = f"{TTS_BACKEND}\0{key}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return f"{digest[:32]}.mp3"
+
+
+def _synthesize(text: str, lang: str, tld: str):
+    """Iterator of mp3 bytes from the configured TTS backend"""
+    if TTS_BACKEND == "fake":
+        return fake_tts_stream(text, lang, tld)
+    return gTTS(text=text, lang=lang, tld=tld).stream()
+
+
+def cached_audio_url(text: str, lang: str = DEFAULT_LANG, tld: str = DEFAULT_TLD):
+    """URL of already-synthesized audio for this text, or None (no network)"""
+    filename = _audio_filename(text, lang, tld)
+    if audio_store.touch(filename):
+        return audio_store.url_for(filename)
+    return None
+
+
+def generate_audio(text: str, lang: str = DEFAULT_LANG, tld: str = DEFAULT_TLD):
+    filename = _audio_filename(text, lang, tld)
+    url = audio_store.url_for(filename)
+
+    if audio_store.touch(filename):
+        return url
+
+    with _locks[int(filename[:8], 16) % len(_locks)]:
+        if audio_store.touch(filename):
+            return url
+
+        # Write-then-rename so a half-written mp3 is never served
+        tmp_path = audio_store.temp_path(filename)
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in _synthesize(text, lang, tld):
+                    f.write(chunk)
+            audio_store.commit(filename, tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    return url
+
+
+def prerender_static_audio():
+    """Synthesize every fixed reply (crisis templates etc.) ahead of time"""
+    rendered = 0
+    for text in STATIC_RESPONSES:
+        audio_store.pin(_audio_filename(text, DEFAULT_LANG, DEFAULT_TLD))
+        try:
+            generate_audio(text)
+            rendered += 1
+        except Exception as e:
+            logger.warning(f"⚠️ Could not pre-render static audio: {e}")
+    logger.info(f"🔊 Static response audio ready ({rendered}/{len(STATIC_RESPONSES)})")
+
+
+# ---------- streaming ----------
+
+def make_stream_handle(text: str, lang: str = DEFAULT_LANG, tld: str = DEFAULT_TLD) -> str:
+    """Encrypted, expiring token carrying the text to synthesize"""
+    payload = json.dumps({"t": text, "l": lang, "v": tld}).encode("utf-8")
+    return _fernet.encrypt(zlib.compress(payload)).decode("ascii")
+
+
+def read_stream_handle(handle: str) -> tuple:
+    """(text, lang, tld) from a handle; ValueError if forged, malformed or expired"""
+    if _fernet is None:
+        raise ValueError("stream handles are disabled")
+    try:
+        payload = json.loads(zlib.decompress(_fernet.decrypt(handle.encode("ascii"), ttl=STREAM_HANDLE_TTL)))
+        return payload["t"], payload["l"], payload["v"]
+    except InvalidToken:
+        raise ValueError("invalid or expired handle")
+    except Exception as e:
+        raise ValueError(f"malformed handle: {e}")
+
+
+def stream_audio(text: str, lang: str = DEFAULT_LANG, tld: str = DEFAULT_TLD):
+    """Yield mp3 bytes per synthesized text segment, no file involved"""
+    filename = _audio_filename(text, lang, tld)
+    if audio_store.touch(filename):
+        with open(audio_store.path_for(filename), "rb") as f:
+            while chunk := f.read(64 * 1024):
+                yield chunk
+        return
+
+    yield from _synthesize(text, lang, tld)
+
+
+async def reply_audio_url(text: str):
+    """Audio URL for a reply: cached file, stream handle, or freshly written file"""
+    url = cached_audio_url(text)
+    if url:
+        return url
+    if TTS_MODE == "stream":
+        return f"/tts/stream/{make_stream_handle(text)}"
+    return await run_in_pool("tts", generate_audio, text)
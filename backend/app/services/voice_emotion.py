@@ -9,7 +9,7 @@ import logging
 import numpy as np
 import tempfile
 import os
-import uuid
+import wave
 
 # ====== SSL FIX ======
 import ssl
@@ -25,60 +25,81 @@ except ImportError:
     LIBROSA_AVAILABLE = False
     logging.warning("librosa not installed. Voice emotion will return fallback.")
 
-try:
-    import whisper
-    WHISPER_AVAILABLE = True
-    print("📥 Loading Whisper model for Speech-to-Text...")
-    whisper_model = whisper.load_model("base")  # Options: tiny, base, small, medium, large
-    print("✅ Whisper model loaded successfully!")
-except ImportError:
-    WHISPER_AVAILABLE = False
-    whisper_model = None
-    logging.warning("⚠️ Whisper not installed. STT will not work. Run: pip install openai-whisper")
-except Exception as e:
-    WHISPER_AVAILABLE = False
-    whisper_model = None
-    logging.error(f"❌ Failed to load Whisper model: {e}")
+from app.core.cache import content_key, make_result_cache
+from app.core.executor import run_in_pool
+from app.core.model_registry import register_model
+from app.services.audio_decode import DecodedAudio, as_decoded
+from app.services.voice_features import compute_spectral_features
+from app.services.pitch import DEFAULT_PITCH_BACKEND, estimate_pitch, pitch_stats
+from app.services.stt import WHISPER_SR, resolve_profile, stt_ready, transcribe
 
 logger = logging.getLogger(__name__)
 
 TARGET_SR = 22050
 EMOTIONS = ["sad", "calm", "neutral", "happy", "excited", "angry", "fearful"]
 
-def _transcribe_audio(audio_bytes: bytes) -> str:
-    """Convert speech to text using Whisper (using librosa, no FFmpeg needed)"""
-    if not WHISPER_AVAILABLE or whisper_model is None:
-        logger.warning("Whisper not available, returning empty transcription")
-        return ""
-    
+# Retried uploads (byte-identical) reuse the previous result
+voice_cache = make_result_cache("voice_analysis")
+
+
+def _synthetic_wav(seconds: float = 1.0, sr: int = TARGET_SR) -> bytes:
+    """A short voiced-like tone encoded as 16-bit WAV (used for warmup)"""
+    t = np.arange(int(seconds * sr)) / sr
+    f0 = 150 + 20 * np.sin(2 * np.pi * 3 * t)
+    y = 0.3 * np.sin(2 * np.pi * np.cumsum(f0) / sr) * (0.6 + 0.4 * np.sin(2 * np.pi * 2 * t))
+    pcm = (y * 32767).astype("<i2")
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sr)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def _load_librosa():
+    if not LIBROSA_AVAILABLE:
+        raise RuntimeError("librosa is not installed")
+    return librosa
+
+
+def _warmup_librosa(_):
+    # Triggers librosa/numba JIT (pitch tracker, tempo) so the first request doesn't pay it
+    _extract_features(DecodedAudio.from_bytes(_synthetic_wav()))
+
+
+register_model("librosa", _load_librosa, warmup=_warmup_librosa)
+
+def _transcribe_audio(audio, stt_profile: str = None) -> tuple:
+    """
+    Convert speech to text using Whisper (using librosa, no FFmpeg needed).
+    Returns (text, failed); a Whisper error gives ("", True) so the
+    result isn't mistaken for silence or cached.
+    """
     try:
         logger.info("🎤 Transcribing audio...")
         
-        # Load audio from bytes using librosa (no FFmpeg dependency!)
-        audio_file = io.BytesIO(audio_bytes)
-        audio_array, sr = librosa.load(audio_file, sr=16000, mono=True)
-        
-        # Transcribe directly from numpy array
-        result = whisper_model.transcribe(audio_array, language="en", fp16=False)
-        transcription = result["text"].strip()
+        # Shared decode (librosa, no FFmpeg dependency!) resampled to 16 kHz
+        transcription = transcribe(as_decoded(audio).at(WHISPER_SR), stt_profile)
         
         logger.info(f"📝 Transcription: '{transcription}'")
-        return transcription
+        return transcription, False
         
     except Exception as e:
         logger.error(f"Error in transcription: {e}")
         import traceback
         logger.error(traceback.format_exc())
-        return ""
+        return "", True
 
 
-def _extract_features(audio_bytes: bytes) -> dict:
-    """Extract acoustic features from audio"""
+def _extract_features(audio, pitch_backend: str = None) -> dict:
+    """Extract acoustic features from audio (bytes or DecodedAudio)"""
     if not LIBROSA_AVAILABLE:
         raise RuntimeError("librosa is not installed. Run: pip install librosa")
 
-    audio_file = io.BytesIO(audio_bytes)
-    y, sr = librosa.load(audio_file, sr=TARGET_SR, mono=True)
+    sr = TARGET_SR
+    y = as_decoded(audio).at(sr)
 
     if len(y) < sr * 0.3:
         raise ValueError("Audio too short for emotion analysis.")
@@ -90,71 +111,28 @@ def _extract_features(audio_bytes: bytes) -> dict:
     if len(y_trimmed) < sr * 0.2:
         y_trimmed = y  # Use original if too much was trimmed
     
-    # === ENERGY FEATURES ===
-    rms = librosa.feature.rms(y=y_trimmed)[0]
-    mean_energy = float(np.mean(rms))
-    energy_std = float(np.std(rms))
-    energy_max = float(np.max(rms))
-    
-    # Dynamic range (ratio of max to mean)
-    dynamic_range = energy_max / (mean_energy + 1e-8)
-    
-    # Coefficient of variation (normalized variance)
-    energy_cv = energy_std / (mean_energy + 1e-8)
+    # === ENERGY / SPECTRAL / MFCC / TEMPO (one shared STFT) ===
+    spectral = compute_spectral_features(y_trimmed, sr)
 
     # === PITCH FEATURES ===
-    f0, voiced_flag, _ = librosa.pyin(
-        y_trimmed,
-        fmin=librosa.note_to_hz("C2"),  # ~65 Hz
-        fmax=librosa.note_to_hz("C7"),  # ~2093 Hz
-        sr=sr,
-    )
-
-    voiced_f0 = f0[voiced_flag] if voiced_flag is not None and np.any(voiced_flag) else np.array([])
+    f0, voiced_flag = estimate_pitch(y_trimmed, sr, backend=pitch_backend)
+    pitch = pitch_stats(f0, voiced_flag)
 
-    if len(voiced_f0) > 0:
-        mean_pitch = float(np.nanmean(voiced_f0))
-        pitch_std = float(np.nanstd(voiced_f0))
-        pitch_range = float(np.nanmax(voiced_f0) - np.nanmin(voiced_f0))
-        # Pitch coefficient of variation
-        pitch_cv = pitch_std / (mean_pitch + 1e-8)
-    else:
-        mean_pitch = 0.0
-        pitch_std = 0.0
-        pitch_range = 0.0
-        pitch_cv = 0.0
-
-    # === SPECTRAL FEATURES ===
-    spectral_centroids = librosa.feature.spectral_centroid(y=y_trimmed, sr=sr)[0]
-    mean_spectral_centroid = float(np.mean(spectral_centroids))
-    
-    spectral_rolloff = librosa.feature.spectral_rolloff(y=y_trimmed, sr=sr)[0]
-    mean_spectral_rolloff = float(np.mean(spectral_rolloff))
-    
-    # === TEMPORAL FEATURES ===
-    zcr = librosa.feature.zero_crossing_rate(y_trimmed)[0]
-    mean_zcr = float(np.mean(zcr))
+    mfcc_mean = spectral["mfcc_mean"]
 
-    # === MFCC (first few coefficients) ===
-    mfccs = librosa.feature.mfcc(y=y_trimmed, sr=sr, n_mfcc=13)
-    mfcc_mean = [float(np.mean(mfcc)) for mfcc in mfccs]
-    
-    # === TEMPO ===
-    tempo, _ = librosa.beat.beat_track(y=y_trimmed, sr=sr)
-    
     return {
-        "mean_energy": mean_energy,
-        "energy_std": energy_std,
-        "energy_cv": energy_cv,
-        "dynamic_range": dynamic_range,
-        "mean_pitch": mean_pitch,
-        "pitch_std": pitch_std,
-        "pitch_cv": pitch_cv,
-        "pitch_range": pitch_range,
-        "mean_spectral_centroid": mean_spectral_centroid,
-        "mean_spectral_rolloff": mean_spectral_rolloff,
-        "mean_zcr": mean_zcr,
-        "tempo": float(tempo),
+        "mean_energy": spectral["mean_energy"],
+        "energy_std": spectral["energy_std"],
+        "energy_cv": spectral["energy_cv"],
+        "dynamic_range": spectral["dynamic_range"],
+        "mean_pitch": pitch["mean_pitch"],
+        "pitch_std": pitch["pitch_std"],
+        "pitch_cv": pitch["pitch_cv"],
+        "pitch_range": pitch["pitch_range"],
+        "mean_spectral_centroid": spectral["mean_spectral_centroid"],
+        "mean_spectral_rolloff": spectral["mean_spectral_rolloff"],
+        "mean_zcr": spectral["mean_zcr"],
+        "tempo": spectral["tempo"],
         "mfcc_1": mfcc_mean[0] if len(mfcc_mean) > 0 else 0.0,
         "mfcc_2": mfcc_mean[1] if len(mfcc_mean) > 1 else 0.0,
     }
@@ -329,14 +307,9 @@ def _score_emotions(features: dict) -> dict:
     return scores
 
 
-def analyze_voice(audio_bytes: bytes) -> dict:
-    """Main function to analyze voice emotion + transcribe speech"""
-    
-    # 1. Speech-to-Text
-    transcription = _transcribe_audio(audio_bytes)
-    
-    # 2. Emotion Detection
-    features = _extract_features(audio_bytes)
+def _voice_emotion(audio, pitch_backend: str = None) -> dict:
+    """Acoustic features -> emotion scores (no STT)"""
+    features = _extract_features(audio, pitch_backend=pitch_backend)
     all_scores = _score_emotions(features)
 
     emotion = max(all_scores, key=all_scores.get)
@@ -347,9 +320,55 @@ def analyze_voice(audio_bytes: bytes) -> dict:
     )
 
     return {
-        "transcription": transcription,  # ⭐ NEW: Speech-to-text
         "emotion": emotion,
         "confidence": round(confidence, 4),
         "features": {k: round(v, 6) for k, v in features.items()},
         "all_scores": all_scores,
-    }
\ No newline at end of file
+    }
+
+
+def analyze_voice(audio_bytes: bytes, pitch_backend: str = None, stt_profile: str = None) -> dict:
+    """Main function to analyze voice emotion + transcribe speech"""
+
+    # 0. Decode once, shared by STT and feature extraction
+    audio = DecodedAudio.from_bytes(audio_bytes)
+
+    # 1. Speech-to-Text
+    transcription, failed = _transcribe_audio(audio, stt_profile)
+    
+    # 2. Emotion Detection
+    return {
+        "transcription": transcription,  # ⭐ NEW: Speech-to-text
+        "transcription_failed": failed,
+        "stt_profile": resolve_profile(stt_profile).name,
+        **_voice_emotion(audio, pitch_backend),
+    }
+
+
+def analyze_voice_window(y: np.ndarray, sr: int, pitch_backend: str = None) -> dict:
+    """
+    Emotion of raw mono PCM (a live stream's sliding window or utterance).
+    Raises ValueError when there is too little audio.
+    """
+    return _voice_emotion(DecodedAudio(y, sr), pitch_backend)
+
+
+async def analyze_voice_async(audio_bytes: bytes, pitch_backend: str = None, stt_profile: str = None) -> dict:
+    """
+    analyze_voice in the voice pool, cached by content hash + model config.
+    Concurrent identical uploads share one computation.
+    Raises ValueError for an unknown stt_profile.
+    """
+    pitch_backend = pitch_backend or DEFAULT_PITCH_BACKEND
+    profile = resolve_profile(stt_profile)
+    key = content_key(
+        audio_bytes, "voice", profile.name, profile.model_size, profile.quantize,
+        sorted(profile.decode.items()), pitch_backend, TARGET_SR,
+    )
+
+    return await voice_cache.get_or_compute(
+        key,
+        lambda: run_in_pool("voice", analyze_voice, audio_bytes, pitch_backend, profile.name),
+        # An empty transcription from a missing or failing Whisper must not stick
+        cacheable=lambda result: stt_ready(profile.name) and not result.get("transcription_failed"),
+    )
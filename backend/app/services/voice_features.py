@@ -0,0 +1,147 @@
+"""
+services/voice_features.py
+--------------------------
+Shared Spectral Feature Engine
+One STFT per clip; energy, spectral, MFCC and tempo stats are derived from it
+
+Matches the per-feature librosa calls it replaces (rms, spectral_centroid,
+spectral_rolloff, zero_crossing_rate, mfcc, beat_track tempo) with their
+default parameters. Every value agrees within
+
+    |new - old| <= FEATURE_ATOL + FEATURE_RTOL * |old|
+
+(float32 vs float64 accumulation order is the only source of drift);
+see benchmarks/bench_voice_features.py.
+"""
+
+import logging
+from functools import lru_cache
+
+import numpy as np
+
+try:
+    import librosa
+    LIBROSA_AVAILABLE = True
+except ImportError:
+    LIBROSA_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 128
+N_MFCC = 13
+ROLL_PERCENT = 0.85
+ZCR_THRESHOLD = 1e-10
+TOP_DB = 80.0
+AMIN = 1e-10
+
+FEATURE_RTOL = 1e-4
+FEATURE_ATOL = 1e-3
+
+
+@lru_cache(maxsize=8)
+def _mel_basis(sr: int) -> np.ndarray:
+    return librosa.filters.mel(sr=sr, n_fft=N_FFT, n_mels=N_MELS)
+
+
+@lru_cache(maxsize=8)
+def _fft_freqs(sr: int) -> np.ndarray:
+    return np.fft.rfftfreq(N_FFT, d=1.0 / sr)
+
+
+@lru_cache(maxsize=4)
+def _dct_basis(n_mfcc: int, n_mels: int) -> np.ndarray:
+    """First n_mfcc rows of the orthonormal DCT-II matrix"""
+    n = np.arange(n_mels)
+    k = np.arange(n_mfcc)[:, None]
+    basis = np.cos(np.pi * k * (2 * n + 1) / (2 * n_mels)) * np.sqrt(2.0 / n_mels)
+    basis[0] *= np.sqrt(0.5)
+    return basis.astype(np.float32)
+
+
+def _frame_sums(x: np.ndarray, frame_length: int, hop_length: int) -> np.ndarray:
+    """Per-frame sums of x, framed exactly like librosa.util.frame"""
+    n_frames = 1 + (len(x) - frame_length) // hop_length
+    csum = np.concatenate(([0.0], np.cumsum(x, dtype=np.float64)))
+    starts = np.arange(n_frames) * hop_length
+    return csum[starts + frame_length] - csum[starts]
+
+
+def _rms(y: np.ndarray) -> np.ndarray:
+    padded = np.pad(y, N_FFT // 2, mode="constant")
+    power = _frame_sums(np.square(padded, dtype=np.float64), N_FFT, HOP_LENGTH) / N_FFT
+    return np.sqrt(np.maximum(power, 0.0))
+
+
+def _zero_crossing_rate(y: np.ndarray) -> np.ndarray:
+    padded = np.pad(y, N_FFT // 2, mode="edge")
+    signs = np.signbit(np.where(np.abs(padded) <= ZCR_THRESHOLD, 0.0, padded))
+    crossings = signs[1:] != signs[:-1]
+    return _frame_sums(crossings, N_FFT - 1, HOP_LENGTH) / N_FFT
+
+
+def _onset_envelope(log_mel: np.ndarray) -> np.ndarray:
+    """Spectral-flux onset strength (median over mel bands, as beat_track uses)"""
+    flux = np.maximum(0.0, log_mel[:, 1:] - log_mel[:, :-1])
+    env = np.median(flux, axis=0)
+    env = np.pad(env, (1 + N_FFT // (2 * HOP_LENGTH), 0), mode="constant")
+    return env[: log_mel.shape[1]]
+
+
+def compute_spectral_features(y: np.ndarray, sr: int) -> dict:
+    """
+    Energy, spectral, ZCR, MFCC and tempo statistics for a trimmed clip.
+
+    The magnitude STFT is computed once; centroid/rolloff use it directly,
+    the log-mel spectrogram (for MFCC and onset strength) is built from it
+    with a cached mel basis.
+    """
+    if not LIBROSA_AVAILABLE:
+        raise RuntimeError("librosa is not installed. Run: pip install librosa")
+
+    # === ENERGY / TEMPORAL (time domain, O(n)) ===
+    rms = _rms(y)
+    mean_energy = float(np.mean(rms))
+    energy_std = float(np.std(rms))
+    energy_max = float(np.max(rms))
+    zcr = _zero_crossing_rate(y)
+
+    # === SINGLE STFT ===
+    magnitude = np.abs(librosa.stft(y, n_fft=N_FFT, hop_length=HOP_LENGTH, center=True, pad_mode="constant"))
+    freqs = _fft_freqs(sr)
+
+    # Centroid (columns with ~zero energy are left unnormalized, like librosa)
+    column_sums = magnitude.sum(axis=0)
+    norm = np.where(column_sums < np.finfo(magnitude.dtype).tiny, 1.0, column_sums)
+    centroid = (freqs @ magnitude) / norm
+
+    # Rolloff: first bin where cumulative magnitude reaches ROLL_PERCENT
+    cumulative = np.cumsum(magnitude, axis=0)
+    rolloff = freqs[np.argmax(cumulative >= ROLL_PERCENT * cumulative[-1], axis=0)]
+
+    # === LOG-MEL (shared by MFCC + onset strength) ===
+    mel = _mel_basis(sr) @ np.square(magnitude)
+    log_mel = 10.0 * np.log10(np.maximum(AMIN, mel))
+    log_mel = np.maximum(log_mel, log_mel.max() - TOP_DB)
+
+    mfcc_mean = (_dct_basis(N_MFCC, N_MELS) @ log_mel).mean(axis=1)
+
+    # === TEMPO ===
+    onset_env = _onset_envelope(log_mel)
+    if onset_env.any():
+        tempo = float(librosa.feature.tempo(onset_envelope=onset_env, sr=sr, hop_length=HOP_LENGTH)[0])
+    else:
+        tempo = 0.0
+
+    return {
+        "mean_energy": mean_energy,
+        "energy_std": energy_std,
+        "energy_cv": energy_std / (mean_energy + 1e-8),
+        "dynamic_range": energy_max / (mean_energy + 1e-8),
+        "mean_spectral_centroid": float(np.mean(centroid)),
+        "mean_spectral_rolloff": float(np.mean(rolloff)),
+        "mean_zcr": float(np.mean(zcr)),
+        "tempo": tempo,
+        "mfcc_mean": [float(v) for v in mfcc_mean],
+    }
@@ -0,0 +1,400 @@
+"""
+services/voice_stream.py
+------------------------
+Live Voice Sessions
+Audio arrives as small frames (WebSocket) instead of one uploaded file.
+
+    frames ─► decoder ─► rolling 16 kHz buffer ─► energy VAD (30 ms frames)
+                                   │
+    while speaking ────────────────┼─► partial STT of the unstable tail (every PARTIAL_MS)
+    short pause (STABLE_PAUSE_MS) ─┼─► segment is stable: transcribed once, text committed
+    every EMOTION_HOP_S ───────────┼─► features + scores over the last EMOTION_WINDOW_S
+    silence (ENDPOINT_MS) ─────────┴─► final transcript + utterance emotion -> on_final
+
+Whisper only ever sees audio since the last stable point (at most
+MAX_SEGMENT_S), so decode cost stays flat however long the user talks,
+and at the endpoint only the short tail is left to transcribe. Partials
+and window emotions are best effort: while one runs, the next is
+skipped rather than queued.
+"""
+
+import asyncio
+import logging
+import time
+
+import numpy as np
+
+try:
+    import opuslib
+    OPUS_AVAILABLE = True
+except ImportError:
+    OPUS_AVAILABLE = False
+
+from app.core.config import env_float, env_int, env_str
+from app.core.executor import ExecutorSaturated, run_in_pool
+from app.core.stats import StreamStats
+from app.services.stt import DEFAULT_STT_PROFILE, WHISPER_SR, resolve_profile, transcribe
+from app.services.voice_emotion import analyze_voice_window
+
+logger = logging.getLogger(__name__)
+
+STREAM_SR = WHISPER_SR
+STREAM_FORMATS = ("pcm16", "f32", "opus")
+
+# Realtime tier recommended (e.g. tiny-int8-greedy); defaults to the upload profile
+STREAM_STT_PROFILE = env_str("AIRA_STREAM_STT_PROFILE", DEFAULT_STT_PROFILE)
+
+FRAME_MS = 30
+PRE_ROLL_MS = 200            # kept before the first voiced frame so onsets aren't clipped
+MIN_SEGMENT_S = 1.0          # shorter stable segments stay in the tail (Whisper guesses on slivers)
+
+VAD_DB = env_float("AIRA_STREAM_VAD_DB", -45.0)                  # frame RMS (dBFS) counted as speech
+ENDPOINT_MS = env_int("AIRA_STREAM_ENDPOINT_MS", 700)            # silence that ends an utterance
+STABLE_PAUSE_MS = env_int("AIRA_STREAM_STABLE_PAUSE_MS", 250)    # pause that makes a segment stable
+PARTIAL_MS = env_int("AIRA_STREAM_PARTIAL_MS", 1000)
+MAX_SEGMENT_S = env_float("AIRA_STREAM_MAX_SEGMENT_S", 8.0)
+MAX_UTTERANCE_S = env_float("AIRA_STREAM_MAX_UTTERANCE_S", 30.0)
+EMOTION_WINDOW_S = env_float("AIRA_STREAM_EMOTION_WINDOW_S", 4.0)
+EMOTION_HOP_S = env_float("AIRA_STREAM_EMOTION_HOP_S", 1.0)
+
+_NO_EMOTION = {"emotion": "neutral", "confidence": 0.0, "features": {}, "all_scores": {}}
+
+
+# ============================================================
+# FRAME DECODERS
+# ============================================================
+
+class _PCMDecoder:
+    """Raw little-endian mono PCM; a sample split across messages is carried over"""
+
+    def __init__(self, dtype: str, scale: float):
+        self._dtype = np.dtype(dtype)
+        self._scale = scale
+        self._carry = b""
+
+    def decode(self, data: bytes) -> np.ndarray:
+        data = self._carry + data
+        usable = len(data) - len(data) % self._dtype.itemsize
+        self._carry = data[usable:]
+        return np.frombuffer(data[:usable], dtype=self._dtype).astype(np.float32) * self._scale
+
+
+class _OpusDecoder:
+    """One Opus packet per message, decoded straight at 16 kHz"""
+
+    MAX_FRAME = STREAM_SR * 120 // 1000  # longest Opus frame (120 ms)
+
+    def __init__(self):
+        self._decoder = opuslib.Decoder(STREAM_SR, 1)
+
+    def decode(self, packet: bytes) -> np.ndarray:
+        pcm = self._decoder.decode(packet, self.MAX_FRAME)
+        return np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+
+
+def make_decoder(audio_format: str, sample_rate: int = STREAM_SR):
+    """Frame decoder for a session; ValueError for unsupported input"""
+    if audio_format not in STREAM_FORMATS:
+        raise ValueError(f"Unknown audio format '{audio_format}'. Choose from: {', '.join(STREAM_FORMATS)}")
+    if audio_format == "opus":
+        if not OPUS_AVAILABLE:
+            raise ValueError("Opus frames need opuslib on the server. Send pcm16 instead")
+        return _OpusDecoder()  # any encoder rate; the decoder resamples to 16 kHz
+    if sample_rate != STREAM_SR:
+        raise ValueError(f"{audio_format} frames must be mono {STREAM_SR} Hz (got {sample_rate})")
+    if audio_format == "pcm16":
+        return _PCMDecoder("<i2", 1.0 / 32768.0)
+    return _PCMDecoder("<f4", 1.0)
+
+
+# ============================================================
+# ROLLING BUFFER
+# ============================================================
+
+class RollingBuffer:
+    """Preallocated ring of the newest samples, addressed by absolute sample index"""
+
+    def __init__(self, seconds: float, sr: int = STREAM_SR):
+        self._data = np.zeros(int(seconds * sr), dtype=np.float32)
+        self.end = 0  # absolute index one past the newest sample
+
+    @property
+    def start(self) -> int:
+        """Oldest absolute index still held"""
+        return max(0, self.end - len(self._data))
+
+    def append(self, samples: np.ndarray):
+        capacity = len(self._data)
+        kept = samples[-capacity:]
+        pos = (self.end + len(samples) - len(kept)) % capacity
+        first = min(len(kept), capacity - pos)
+        self._data[pos:pos + first] = kept[:first]
+        self._data[:len(kept) - first] = kept[first:]
+        self.end += len(samples)
+
+    def slice(self, start: int, end: int) -> np.ndarray:
+        """Copy of samples [start, end) (clamped to what is still held)"""
+        start, end = max(start, self.start), min(end, self.end)
+        if end <= start:
+            return np.zeros(0, dtype=np.float32)
+        capacity = len(self._data)
+        a, b = start % capacity, end % capacity
+        if a < b:
+            return self._data[a:b].copy()
+        return np.concatenate((self._data[a:], self._data[:b]))
+
+
+# ============================================================
+# STATS
+# ============================================================
+
+_stats = StreamStats(
+    ("active", "sessions", "utterances", "partials", "partials_skipped", "emotion_updates", "audio_seconds"),
+    latency="finalize",  # endpoint detected -> final sent
+    window=500,
+)
+
+
+def stream_stats() -> dict:
+    return _stats.snapshot()
+
+
+# ============================================================
+# SESSION
+# ============================================================
+
+class _Utterance:
+    """Per-utterance state; in-flight jobs keep a reference, not the session's"""
+
+    def __init__(self, index: int, start: int):
+        self.index = index
+        self.start = start
+        self.stable_from = start     # first sample of the unstable tail
+        self.last_voiced = start
+        self.segments = []           # tasks -> text of each stable segment, in order
+        self.paused = False
+        self.next_partial = start + int(PARTIAL_MS * STREAM_SR / 1000)
+        self.next_emotion = start + int(EMOTION_HOP_S * STREAM_SR)
+
+    def stable_text(self) -> str:
+        """Committed text so far (stops at the first segment still decoding)"""
+        texts = []
+        for task in self.segments:
+            if not task.done():
+                break
+            texts.append(task.result())
+        return " ".join(t for t in texts if t)
+
+
+class VoiceStream:
+    """
+    One live voice session. Feed it raw frames; it calls `emit(event)`
+    (an async callable) with:
+
+        {"type": "speech_start", "utterance", "at_s"}
+        {"type": "partial", "utterance", "stable", "text"}
+        {"type": "emotion", "utterance", "emotion", "confidence", "all_scores", "window_s"}
+        {"type": "final", "utterance", "transcription", "emotion", "confidence",
+         "all_scores", "features", "duration_s", "finalize_ms"}
+
+    and `on_final(result)` (optional, async) once per utterance, right
+    after its final event, without holding up the session.
+    """
+
+    def __init__(self, emit, on_final=None, audio_format: str = "pcm16", sample_rate: int = STREAM_SR,
+                 stt_profile: str = None, pitch_backend: str = None):
+        self.profile = resolve_profile(stt_profile or STREAM_STT_PROFILE)
+        self.pitch_backend = pitch_backend
+        self._decoder = make_decoder(audio_format, sample_rate)
+        self._emit = emit
+        self._on_final = on_final
+
+        self.buffer = RollingBuffer(MAX_UTTERANCE_S + 2 * PRE_ROLL_MS / 1000)
+        self._frame = STREAM_SR * FRAME_MS // 1000
+        self._remainder = np.zeros(0, dtype=np.float32)  # samples short of a full VAD frame
+
+        self._utterance = None
+        self._count = 0
+        self._partial = None
+        self._emotion = None
+        self._last_final = None
+        self._tasks = set()
+
+        _stats.add(active=1, sessions=1)
+
+    # === INPUT ===
+
+    async def feed(self, data: bytes):
+        """Decode one message of audio and advance the session"""
+        samples = self._decoder.decode(data)
+        if not len(samples):
+            return
+        self.buffer.append(samples)
+        _stats.add(audio_seconds=len(samples) / STREAM_SR)
+
+        pending = np.concatenate((self._remainder, samples))
+        usable = len(pending) - len(pending) % self._frame
+        self._remainder = pending[usable:]
+        if not usable:
+            return
+
+        frames = pending[:usable].reshape(-1, self._frame)
+        first = self.buffer.end - len(self._remainder) - usable
+        rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+        voiced = 20 * np.log10(rms + 1e-10) > VAD_DB
+
+        for i, is_voiced in enumerate(voiced):
+            start = first + i * self._frame
+            if is_voiced:
+                await self._voiced(start, start + self._frame)
+            elif self._utterance is not None:
+                self._silence(start + self._frame)
+
+        if self._utterance is not None:
+            self._schedule_updates()
+
+    async def flush(self):
+        """End the current utterance now (push-to-talk release, end of input)"""
+        if self._utterance is not None:
+            self._finish(self._utterance.last_voiced)
+
+    async def aclose(self):
+        """Finish pending finals, then drop anything still running"""
+        await self.flush()
+        if self._last_final is not None:
+            await asyncio.gather(self._last_final, return_exceptions=True)
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        _stats.add(active=-1)
+
+    # === VAD ===
+
+    async def _voiced(self, start: int, end: int):
+        utterance = self._utterance
+        if utterance is None:
+            begin = max(self.buffer.start, start - STREAM_SR * PRE_ROLL_MS // 1000)
+            utterance = self._utterance = _Utterance(self._count, begin)
+            self._count += 1
+            await self._emit({"type": "speech_start", "utterance": utterance.index,
+                              "at_s": round(start / STREAM_SR, 2)})
+
+        utterance.last_voiced = end
+        utterance.paused = False
+
+        if end - utterance.start >= MAX_UTTERANCE_S * STREAM_SR:
+            self._finish(end)
+        elif end - utterance.stable_from >= MAX_SEGMENT_S * STREAM_SR:
+            self._commit(utterance, end)
+
+    def _silence(self, end: int):
+        utterance = self._utterance
+        silence = end - utterance.last_voiced
+        if silence >= ENDPOINT_MS * STREAM_SR // 1000:
+            self._finish(utterance.last_voiced)
+        elif (not utterance.paused and silence >= STABLE_PAUSE_MS * STREAM_SR // 1000
+              and utterance.last_voiced - utterance.stable_from >= MIN_SEGMENT_S * STREAM_SR):
+            utterance.paused = True
+            self._commit(utterance, utterance.last_voiced)
+
+    # === JOBS ===
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _transcribe(self, audio: np.ndarray) -> str:
+        try:
+            return await run_in_pool("voice", transcribe, audio, self.profile.name)
+        except ExecutorSaturated:
+            logger.warning("⚠️ Voice pool saturated, stream segment dropped")
+        except Exception as e:
+            logger.error(f"Stream transcription failed: {e}")
+        return ""
+
+    async def _window_emotion(self, audio: np.ndarray) -> dict:
+        try:
+            return await run_in_pool("voice", analyze_voice_window, audio, STREAM_SR, self.pitch_backend)
+        except ValueError:
+            return None  # too little audio yet
+        except Exception as e:
+            logger.warning(f"⚠️ Stream emotion update failed: {e}")
+            return None
+
+    def _commit(self, utterance: _Utterance, end: int):
+        """Audio up to `end` won't change any more: transcribe it once"""
+        audio = self.buffer.slice(utterance.stable_from, end)
+        utterance.segments.append(self._spawn(self._transcribe(audio)))
+        utterance.stable_from = end
+
+    def _schedule_updates(self):
+        utterance, end = self._utterance, self.buffer.end
+
+        if end >= utterance.next_partial and end > utterance.stable_from:
+            utterance.next_partial = end + PARTIAL_MS * STREAM_SR // 1000
+            if self._partial is None or self._partial.done():
+                self._partial = self._spawn(self._send_partial(utterance, self.buffer.slice(utterance.stable_from, end)))
+            else:
+                _stats.add(partials_skipped=1)
+
+        if end >= utterance.next_emotion:
+            utterance.next_emotion = end + int(EMOTION_HOP_S * STREAM_SR)
+            if self._emotion is None or self._emotion.done():
+                window = self.buffer.slice(max(utterance.start, end - int(EMOTION_WINDOW_S * STREAM_SR)), end)
+                self._emotion = self._spawn(self._send_emotion(utterance, window))
+
+    async def _send_partial(self, utterance: _Utterance, tail: np.ndarray):
+        text = await self._transcribe(tail)
+        if utterance is not self._utterance:
+            return  # already finalized
+        stable = utterance.stable_text()
+        _stats.add(partials=1)
+        await self._emit({"type": "partial", "utterance": utterance.index, "stable": stable,
+                          "text": " ".join(t for t in (stable, text) if t)})
+
+    async def _send_emotion(self, utterance: _Utterance, window: np.ndarray):
+        result = await self._window_emotion(window)
+        if result is None or utterance is not self._utterance:
+            return
+        _stats.add(emotion_updates=1)
+        await self._emit({"type": "emotion", "utterance": utterance.index, "emotion": result["emotion"],
+                          "confidence": result["confidence"], "all_scores": result["all_scores"],
+                          "window_s": round(len(window) / STREAM_SR, 2)})
+
+    # === ENDPOINT ===
+
+    def _finish(self, end: int):
+        """Close the utterance; its final is produced in the background, in order"""
+        utterance, self._utterance = self._utterance, None
+        if end > utterance.stable_from:
+            self._commit(utterance, end)
+        audio = self.buffer.slice(utterance.start, end)  # before the ring moves on
+        previous = self._last_final
+        self._last_final = self._spawn(self._send_final(utterance, audio, previous))
+
+    async def _send_final(self, utterance: _Utterance, audio: np.ndarray, previous):
+        detected = time.perf_counter()
+        emotion, texts = await asyncio.gather(
+            self._window_emotion(audio),
+            asyncio.gather(*utterance.segments),
+        )
+        emotion = emotion or _NO_EMOTION
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+
+        result = {
+            "transcription": " ".join(t for t in texts if t),
+            "stt_profile": self.profile.name,
+            **emotion,
+            "duration_s": round(len(audio) / STREAM_SR, 2),
+        }
+        finalize_ms = round((time.perf_counter() - detected) * 1000, 1)
+        _stats.observe(finalize_ms / 1000, utterances=1)
+        logger.info(f"🎙️ Utterance {utterance.index} final in {finalize_ms} ms: '{result['transcription']}'")
+
+        await self._emit({"type": "final", "utterance": utterance.index, "finalize_ms": finalize_ms, **result})
+        if self._on_final is not None:
+            self._spawn(self._on_final(result))
@@ -0,0 +1,134 @@
+"""
+benchmarks/bench_face.py
+------------------------
+Face detector modes: latency and accuracy on small and phone-sized images
+
+Run from backend/:
+    python -m benchmarks.bench_face [--images photos/*.jpg] [--repeats 3]
+
+Modes compared (detection + emotion crop, decode excluded):
+- mtcnn full-res     the previous behaviour, used as the accuracy reference
+- mtcnn @ N px       detection on a copy downscaled to N px (default mode)
+- cascade @ N px     OpenCV Haar cascade on the downscaled copy
+- client bbox        detection skipped, box supplied by the caller
+
+Per mode: median latency per image size, face detection rate, box IoU
+against the truth box, and top-emotion agreement with the reference.
+
+Without --images, synthetic faces with a known box are pasted onto
+noise canvases of several sizes. For real accuracy numbers, pass photos;
+`photo.json` next to `photo.jpg` may hold {"box": [x, y, w, h]}.
+"""
+
+import argparse
+import json
+import os
+import statistics
+
+import numpy as np
+
+from app.core.model_registry import get_model
+from app.services.face_emotion import DETECT_MAX_SIDE, analyze_frame
+from benchmarks.signals import synthetic_face, timed
+
+CANVASES = ((480, 640), (1080, 1920), (3024, 4032))
+
+
+def synthetic_scene(height: int, width: int, seed: int = 0) -> tuple:
+    """(RGB frame, truth box): a synthetic face filling ~half the short side"""
+    rng = np.random.default_rng(seed)
+    frame = rng.integers(20, 60, size=(height, width), dtype=np.uint8)
+
+    side = min(height, width) // 2
+    face = synthetic_face(256, seed=seed)
+    rows = np.arange(side) * 256 // side
+    face = face[rows][:, rows]
+
+    top, left = (height - side) // 3, (width - side) // 2
+    frame[top:top + side, left:left + side] = face
+    box = (left + int(0.18 * side), top + int(0.08 * side), int(0.64 * side), int(0.84 * side))
+    return np.repeat(frame[:, :, None], 3, axis=2), box
+
+
+def load_images(paths: list) -> list:
+    """[(name, RGB frame, truth box or None)]"""
+    if not paths:
+        return [(f"{w}x{h}", *synthetic_scene(h, w, seed=i)) for i, (h, w) in enumerate(CANVASES)]
+
+    from PIL import Image, ImageOps
+
+    images = []
+    for path in paths:
+        frame = np.asarray(ImageOps.exif_transpose(Image.open(path)).convert("RGB"))
+        box = None
+        sidecar = os.path.splitext(path)[0] + ".json"
+        if os.path.exists(sidecar):
+            with open(sidecar) as f:
+                box = tuple(json.load(f)["box"])
+        images.append((os.path.basename(path), frame, box))
+    return images
+
+
+def iou(a, b) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = w * h
+    return inter / float(aw * ah + bw * bh - inter) if inter else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Face detector mode benchmark")
+    parser.add_argument("--images", nargs="*", default=[])
+    parser.add_argument("--max-side", type=int, default=DETECT_MAX_SIDE)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    fer = {mode: get_model(f"face_emotion:{mode}") for mode in ("mtcnn", "cascade")}
+    images = load_images(args.images)
+
+    modes = [
+        ("mtcnn full-res", "mtcnn", 0, False),
+        (f"mtcnn @ {args.max_side}", "mtcnn", args.max_side, False),
+        (f"cascade @ {args.max_side}", "cascade", args.max_side, False),
+        ("client bbox", "mtcnn", 0, True),
+    ]
+
+    names = [name for name, _, _ in images]
+    print(f"{'mode':>18} " + " ".join(f"{n[:12]:>12}" for n in names) + f" {'detected':>9} {'IoU':>6} {'agree':>6}")
+
+    reference = {}
+    for label, mode, max_side, use_bbox in modes:
+        if fer[mode] is None:
+            print(f"{label:>18}  model unavailable")
+            continue
+
+        latencies, detected, ious, agree = [], 0, [], 0
+        for name, frame, truth in images:
+            bbox = truth if use_bbox else None
+            if use_bbox and bbox is None:
+                latencies.append(float("nan"))
+                continue
+
+            result, timings = timed(analyze_frame, fer[mode], frame, bbox=bbox, max_side=max_side,
+                                    repeats=args.repeats)
+            latencies.append(statistics.median(timings) * 1000)
+
+            if "box" in result:
+                detected += 1
+                if truth is not None:
+                    ious.append(iou(result["box"], truth))
+            if label == "mtcnn full-res":
+                reference[name] = result["emotion"]
+            agree += reference.get(name) == result["emotion"]
+
+        mean_iou = f"{statistics.fmean(ious):>6.2f}" if ious else "   n/a"
+        print(
+            f"{label:>18} " + " ".join(f"{ms:>10.0f}ms" for ms in latencies)
+            + f" {detected:>4}/{len(images):<4} {mean_iou} {agree:>3}/{len(images)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+benchmarks/bench_face_stream.py
+-------------------------------
+Live face: detect every frame vs detect every N frames + tracking
+
+Run from backend/:
+    python -m benchmarks.bench_face_stream [--frames 120] [--detect-every 1,5,10] [--detector mtcnn]
+
+A synthetic face drifts across a 640x480 webcam-sized canvas (JPEG
+frames, as a browser would send them). For each detection interval
+reports median / p95 per-frame latency, achievable frames per second on
+one worker, how many frames ran full detection, and box IoU against the
+true position (tracking drift).
+"""
+
+import argparse
+import io
+import statistics
+import time
+
+import numpy as np
+from PIL import Image
+
+from app.services.face_stream import FaceTracker, analyze_stream_frame
+from benchmarks.bench_face import iou
+from benchmarks.signals import synthetic_face
+
+WIDTH, HEIGHT, FACE = 640, 480, 200
+
+
+def synthetic_video(frames: int) -> list:
+    """[(jpeg bytes, truth box)] - the face moves on a slow ellipse"""
+    face = synthetic_face(256)
+    rows = np.arange(FACE) * 256 // FACE
+    face = face[rows][:, rows]
+    rng = np.random.default_rng(0)
+    background = rng.integers(20, 60, size=(HEIGHT, WIDTH), dtype=np.uint8)
+
+    video = []
+    for i in range(frames):
+        angle = 2 * np.pi * i / 90
+        left = int(WIDTH / 2 - FACE / 2 + 120 * np.cos(angle))
+        top = int(HEIGHT / 2 - FACE / 2 + 60 * np.sin(angle))
+        frame = background.copy()
+        frame[top:top + FACE, left:left + FACE] = face
+
+        buffer = io.BytesIO()
+        Image.fromarray(np.repeat(frame[:, :, None], 3, axis=2)).save(buffer, "JPEG", quality=80)
+        box = (left + int(0.18 * FACE), top + int(0.08 * FACE), int(0.64 * FACE), int(0.84 * FACE))
+        video.append((buffer.getvalue(), box))
+    return video
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live face stream benchmark")
+    parser.add_argument("--frames", type=int, default=120)
+    parser.add_argument("--detect-every", default="1,5,10")
+    parser.add_argument("--detector", default="mtcnn")
+    args = parser.parse_args()
+
+    video = synthetic_video(args.frames)
+    warm = analyze_stream_frame(args.detector, FaceTracker(), video[0][0], True)  # load + warm
+    if "error" in warm:
+        print(warm["error"])
+        return
+
+    print(f"{'detect every':>12} {'p50 ms':>8} {'p95 ms':>8} {'max fps':>8} {'detections':>11} {'IoU':>6}")
+    for every in (int(n) for n in args.detect_every.split(",")):
+        tracker = FaceTracker()
+        latencies, detections, ious = [], 0, []
+        since = every
+        for image_bytes, truth in video:
+            started = time.perf_counter()
+            result = analyze_stream_frame(args.detector, tracker, image_bytes, since >= every)
+            latencies.append(time.perf_counter() - started)
+
+            since = since + 1 if result["tracked"] else 1
+            detections += not result["tracked"]
+            if "box" in result:
+                ious.append(iou(result["box"], truth))
+
+        ordered = sorted(latencies)
+        p50 = statistics.median(ordered) * 1000
+        p95 = ordered[int(0.95 * (len(ordered) - 1))] * 1000
+        mean_iou = f"{statistics.fmean(ious):>6.2f}" if ious else "   n/a"
+        print(f"{every:>12} {p50:>8.1f} {p95:>8.1f} {1 / statistics.fmean(ordered):>8.1f} "
+              f"{detections:>5}/{len(video):<5} {mean_iou}")
+
+
+if __name__ == "__main__":
+    main()
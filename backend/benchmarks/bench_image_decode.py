@@ -0,0 +1,121 @@
+"""
+benchmarks/bench_image_decode.py
+--------------------------------
+Image ingest: legacy full decode + copy vs draft-mode decode_image
+
+Run from backend/:
+    python -m benchmarks.bench_image_decode [--images photos/*.jpg] [--repeats 5]
+
+Per image reports decode time (median ms) and peak memory growth of a
+fresh worker process decoding it once (ru_maxrss delta, MB):
+- legacy: Image.open(...).convert("RGB") then np.array(image)
+- ingest: app.services.image_decode.decode_image (draft + EXIF + asarray)
+
+Without --images, photo-like JPEGs (smooth gradients, a face, EXIF
+orientation 6 like a portrait phone shot) are generated at 2, 12 and 48 MP.
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import resource
+import statistics
+
+import numpy as np
+from PIL import Image
+
+from app.services.image_decode import decode_image
+from benchmarks.signals import synthetic_face, timed
+
+SIZES = ((1200, 1600), (3024, 4032), (6000, 8000))
+
+
+def synthetic_photo(height: int, width: int, seed: int = 0) -> bytes:
+    """Smooth, compressible 'photo' with a face and EXIF orientation 6"""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = 90 + 60 * np.sin(xx / width * 3.1) * np.cos(yy / height * 2.3)
+    rgb = np.stack([base, base * 0.9 + 20, base * 0.8 + 30], axis=2)
+
+    side = min(height, width) // 2
+    rows = np.arange(side) * 256 // side
+    face = synthetic_face(256, seed=seed)[rows][:, rows].astype(np.float32)
+    top, left = (height - side) // 3, (width - side) // 2
+    rgb[top:top + side, left:left + side] = face[:, :, None]
+
+    rgb += rng.normal(0, 3, rgb.shape).astype(np.float32)
+    image = Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8))
+    exif = image.getexif()
+    exif[0x0112] = 6
+
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90, exif=exif)
+    return buffer.getvalue()
+
+
+def legacy_decode(image_bytes: bytes) -> np.ndarray:
+    image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
+    return np.array(image)
+
+
+def ingest_decode(image_bytes: bytes) -> np.ndarray:
+    return decode_image(image_bytes).frame
+
+
+DECODERS = {"legacy": legacy_decode, "ingest": ingest_decode}
+
+
+def _peak_child(name: str, image_bytes: bytes, queue):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    frame = DECODERS[name](image_bytes)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put(((after - before) / 1024, frame.shape))  # ru_maxrss is KB on Linux
+
+
+def peak_memory_mb(name: str, image_bytes: bytes) -> tuple:
+    """(peak RSS growth in MB, output shape) measured in a fresh process"""
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    process = context.Process(target=_peak_child, args=(name, image_bytes, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def load_inputs(paths: list) -> list:
+    if not paths:
+        return [(f"{w * h / 1e6:.0f} MP", synthetic_photo(h, w, seed=i)) for i, (h, w) in enumerate(SIZES)]
+    inputs = []
+    for path in paths:
+        with open(path, "rb") as f:
+            inputs.append((os.path.basename(path), f.read()))
+    return inputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Image ingest benchmark")
+    parser.add_argument("--images", nargs="*", default=[])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'image':>10} {'KB':>7} {'legacy ms':>10} {'ingest ms':>10} {'speedup':>8} "
+          f"{'legacy MB':>10} {'ingest MB':>10}  output")
+    for name, data in load_inputs(args.images):
+        _, legacy_t = timed(legacy_decode, data, repeats=args.repeats)
+        _, ingest_t = timed(ingest_decode, data, repeats=args.repeats)
+        legacy_mb, legacy_shape = peak_memory_mb("legacy", data)
+        ingest_mb, ingest_shape = peak_memory_mb("ingest", data)
+
+        legacy_ms = statistics.median(legacy_t) * 1000
+        ingest_ms = statistics.median(ingest_t) * 1000
+        print(
+            f"{name[:10]:>10} {len(data) / 1024:>7.0f} {legacy_ms:>10.1f} {ingest_ms:>10.1f} "
+            f"{legacy_ms / ingest_ms:>7.1f}x {legacy_mb:>10.1f} {ingest_mb:>10.1f}  "
+            f"{legacy_shape[1]}x{legacy_shape[0]} -> {ingest_shape[1]}x{ingest_shape[0]}"
+        )
+
+
+if __name__ == "__main__":
+    main()
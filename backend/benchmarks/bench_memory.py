@@ -0,0 +1,158 @@
+"""
+benchmarks/bench_memory.py
+--------------------------
+Per-user memory under user churn: legacy defaultdict(list) vs MemoryStore,
+then the shared backends (SQLite file, fake KV with network latency)
+
+Run from backend/:
+    python -m benchmarks.bench_memory [--users 200000] [--turns 4] [--max-users 10000]
+    python -m benchmarks.bench_memory --shared-users 2000 --kv-latency-ms 0.5
+
+Each simulated user chats for a few turns (user + assistant message and
+an emotion per turn) and never comes back. Reports traced heap after the
+run (tracemalloc), users still held, and operations per second.
+
+Shared section: the same churn through SharedMemoryStore (read-through
+cache + batched writes) vs the bare backend called on every operation,
+with ops/s and, for the KV store, network round trips per chat turn.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+from app.services.fake_backends import FakeKV, LatencyProfile
+from app.services.memory import MAX_EMOTIONS, MAX_MESSAGES, MemoryStore, SharedMemoryStore
+from app.services.memory_backends import KVMemoryBackend, SQLiteMemoryBackend
+
+REPLY = "That sounds like a lot to carry. What part of it feels heaviest right now? " * 3
+EMOTIONS = ("sad", "calm", "neutral", "happy", "excited", "angry", "fearful")
+
+
+class LegacyMemory:
+    """The previous module-level implementation"""
+
+    def __init__(self):
+        self.conversation_memory = defaultdict(list)
+        self.emotion_memory = defaultdict(list)
+
+    def add_message(self, user_id, role, content):
+        self.conversation_memory[user_id].append({"role": role, "content": content})
+        self.conversation_memory[user_id] = self.conversation_memory[user_id][-6:]
+
+    def get_conversation(self, user_id):
+        return self.conversation_memory[user_id]
+
+    def add_emotion(self, user_id, emotion):
+        self.emotion_memory[user_id].append(emotion)
+        self.emotion_memory[user_id] = self.emotion_memory[user_id][-10:]
+
+    def get_emotion_history(self, user_id):
+        return self.emotion_memory[user_id]
+
+    def __len__(self):
+        return len(self.conversation_memory)
+
+
+def churn(store, users: int, turns: int) -> tuple:
+    """(seconds, operations)"""
+    operations = 0
+    started = time.perf_counter()
+    for u in range(users):
+        user_id = f"user-{u}"
+        for t in range(turns):
+            store.add_emotion(user_id, EMOTIONS[(u + t) % len(EMOTIONS)])
+            store.get_emotion_history(user_id)
+            store.add_message(user_id, "user", f"message {t} from {user_id}")
+            store.get_conversation(user_id)
+            store.add_message(user_id, "assistant", REPLY)
+            operations += 5
+    return time.perf_counter() - started, operations
+
+
+class Unbatched:
+    """Every write and read goes straight to the backend"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.ops = 0
+
+    def _op_id(self):
+        self.ops += 1
+        return str(self.ops)
+
+    def add_message(self, user_id, role, content):
+        self.backend.append([(user_id, "message", (role, content), self._op_id())])
+
+    def get_conversation(self, user_id):
+        return self.backend.load(user_id)[0]
+
+    def add_emotion(self, user_id, emotion):
+        self.backend.append([(user_id, "emotion", emotion, self._op_id())])
+
+    def get_emotion_history(self, user_id):
+        return self.backend.load(user_id)[1]
+
+    def close(self):
+        self.backend.close()
+
+
+def shared(args):
+    directory = tempfile.mkdtemp()
+    profile = LatencyProfile(args.kv_latency_ms, args.kv_latency_ms * 3)
+
+    def sqlite_backend(name):
+        return SQLiteMemoryBackend(os.path.join(directory, f"{name}.db"), MAX_MESSAGES, MAX_EMOTIONS)
+
+    def kv_backend(_):
+        return KVMemoryBackend(FakeKV(profile), MAX_MESSAGES, MAX_EMOTIONS)
+
+    def batched(backend):
+        return SharedMemoryStore("bench", backend, max_users=args.max_users, cache_ttl=2.0, flush_interval=0.05)
+
+    print(f"\nShared backends: {args.shared_users} users x {args.turns} turns, "
+          f"KV round trip ~{args.kv_latency_ms:g} ms\n")
+    print(f"{'store':>22} {'ops/s':>10} {'trips/turn':>11}")
+    for label, make_backend in (("sqlite", sqlite_backend), ("kv", kv_backend)):
+        for mode, wrap in (("unbatched", Unbatched), ("cached+batched", batched)):
+            backend = make_backend(mode)
+            store = wrap(backend)
+            seconds, operations = churn(store, args.shared_users, args.turns)
+            store.close()
+            trips = getattr(getattr(backend, "client", None), "round_trips", None)
+            per_turn = f"{trips / (args.shared_users * args.turns):>11.2f}" if trips is not None else f"{'-':>11}"
+            print(f"{label + ' ' + mode:>22} {operations / seconds:>10.0f} {per_turn}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-user memory benchmark")
+    parser.add_argument("--users", type=int, default=200000)
+    parser.add_argument("--turns", type=int, default=4)
+    parser.add_argument("--max-users", type=int, default=10000)
+    parser.add_argument("--shared-users", type=int, default=2000)
+    parser.add_argument("--kv-latency-ms", type=float, default=0.5)
+    args = parser.parse_args()
+
+    stores = {
+        "legacy": LegacyMemory,
+        "bounded": lambda: MemoryStore("bench", max_users=args.max_users),
+    }
+
+    print(f"{args.users} users x {args.turns} turns\n")
+    print(f"{'store':>8} {'heap MB':>8} {'users held':>11} {'ops/s':>10}")
+    for name, factory in stores.items():
+        tracemalloc.start()
+        store = factory()
+        seconds, operations = churn(store, args.users, args.turns)
+        heap, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:>8} {heap / 1e6:>8.1f} {len(store):>11} {operations / seconds:>10.0f}")
+
+    shared(args)
+
+
+if __name__ == "__main__":
+    main()
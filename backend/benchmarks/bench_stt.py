@@ -0,0 +1,118 @@
+"""
+benchmarks/bench_stt.py
+-----------------------
+Whisper STT profiles: real-time factor (and WER when references exist)
+
+Run from backend/:
+    python -m benchmarks.bench_stt --audio samples/*.wav [--profiles tiny-int8-greedy,base]
+    python -m benchmarks.bench_stt --threads 4
+
+RTF = processing seconds / audio seconds (below 1.0 is faster than
+real time). For each profile reports load + warmup time, parameter
+memory, median latency per clip and aggregate RTF. If `clip.wav` has a
+`clip.txt` next to it, word error rate against that reference is
+reported too.
+
+Without --audio, synthetic voiced clips are used. They contain no words,
+so Whisper stops early and the RTF is optimistic - use real recordings
+for numbers you quote.
+"""
+
+import argparse
+import os
+import re
+import statistics
+
+import numpy as np
+
+from app.core.model_registry import get_model, model_status
+from app.services.audio_decode import DecodedAudio
+from app.services.stt import STT_PROFILES, WHISPER_SR, transcribe
+from benchmarks.signals import synthetic_voice, timed
+
+
+def load_clips(paths: list) -> list:
+    """[(name, audio_16k, reference_text or None)]"""
+    if not paths:
+        return [
+            (f"synthetic {seconds:.0f}s", synthetic_voice(seconds, WHISPER_SR, seed=int(seconds))[0], None)
+            for seconds in (3.0, 10.0, 30.0)
+        ]
+
+    clips = []
+    for path in paths:
+        with open(path, "rb") as f:
+            audio = DecodedAudio.from_bytes(f.read()).at(WHISPER_SR)
+        reference = None
+        sidecar = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(sidecar):
+            with open(sidecar) as f:
+                reference = f.read()
+        clips.append((os.path.basename(path), audio.astype(np.float32), reference))
+    return clips
+
+
+def _words(text: str) -> list:
+    return re.sub(r"[^a-z0-9' ]+", " ", text.lower()).split()
+
+
+def word_errors(reference: str, hypothesis: str) -> tuple:
+    """(edit distance in words, reference length)"""
+    ref, hyp = _words(reference), _words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1], len(ref)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Whisper STT profile benchmark")
+    parser.add_argument("--audio", nargs="*", default=[], help="WAV/MP3 clips (optional .txt references)")
+    parser.add_argument("--profiles", default=",".join(STT_PROFILES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    args = parser.parse_args()
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    clips = load_clips(args.audio)
+    audio_seconds = sum(len(audio) for _, audio, _ in clips) / WHISPER_SR
+    print(f"{len(clips)} clips, {audio_seconds:.1f}s of audio\n")
+
+    print(f"{'profile':>18} {'load s':>7} {'MB':>7} {'median ms':>10} {'RTF':>6} {'WER':>6}")
+    for name in args.profiles.split(","):
+        profile = STT_PROFILES[name.strip()]
+        if get_model(profile.model_name) is None:
+            print(f"{profile.name:>18}  failed to load: {model_status()[profile.model_name]['error']}")
+            continue
+        status = model_status()[profile.model_name]
+
+        per_clip, processing, errors, ref_words = [], 0.0, 0, 0
+        for _, audio, reference in clips:
+            text, timings = timed(transcribe, audio, profile.name, repeats=args.repeats)
+            per_clip.append(statistics.median(timings))
+            processing += statistics.median(timings)
+            if reference is not None:
+                distance, length = word_errors(reference, text)
+                errors += distance
+                ref_words += length
+
+        memory_mb = (status["memory_bytes"] or 0) / 1e6
+        wer = f"{errors / ref_words * 100:>5.1f}%" if ref_words else "   n/a"
+        print(
+            f"{profile.name:>18} {status['load_seconds'] + (status['warmup_seconds'] or 0):>7.1f} "
+            f"{memory_mb:>7.0f} {statistics.median(per_clip) * 1000:>10.0f} "
+            f"{processing / audio_seconds:>6.3f} {wer}"
+        )
+
+    if not args.audio:
+        print("\nSynthetic clips have no words: RTF is a lower bound. Pass --audio for real numbers.")
+
+
+if __name__ == "__main__":
+    main()
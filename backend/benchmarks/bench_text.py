@@ -0,0 +1,145 @@
+"""
+benchmarks/bench_text.py
+------------------------
+Text emotion backends: accuracy parity vs fp32 torch, latency, throughput
+
+Run from backend/:
+    python -m benchmarks.bench_text [--backends torch,torch-int8,onnx] [--repeats 3]
+
+Every backend classifies the same fixed sample set. Against the "torch"
+reference it reports:
+- label agreement (share of samples with the same top emotion)
+- max / mean absolute difference of the per-class probabilities
+- single-text latency (median ms) and batched throughput (texts / s)
+
+Exits 1 if any backend's agreement falls below --min-agreement, so it
+can gate a config change to AIRA_TEXT_BACKEND.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from app.services.text_emotion import TEXT_BACKENDS, build_pipeline
+from benchmarks.signals import timed
+
+# Fixed parity set: every class, short and long, negations, mixed feelings
+SAMPLES = (
+    "I am so happy today, everything went perfectly!",
+    "This is the best news I've heard all year.",
+    "We finally got the keys to our new home!",
+    "I can't stop smiling after that phone call.",
+    "I feel so alone and nobody seems to care.",
+    "My dog died this morning and I can't stop crying.",
+    "I miss how things used to be.",
+    "Nothing I do ever seems to matter.",
+    "How dare they cancel without even telling me!",
+    "I'm furious that they lied to my face again.",
+    "Stop interrupting me, I'm sick of it.",
+    "This traffic is driving me absolutely insane.",
+    "I'm terrified of the results coming back tomorrow.",
+    "There's someone walking behind me and I'm scared.",
+    "What if I fail the exam and lose everything?",
+    "My hands are shaking, I don't know what's going to happen.",
+    "Wait, you did WHAT? I did not see that coming.",
+    "Wow, I never expected to win that!",
+    "I can't believe she's actually moving to Japan.",
+    "That smell is revolting, I think I'm going to be sick.",
+    "People who treat animals like that disgust me.",
+    "Ugh, there's hair in my food.",
+    "I went to the store and bought some milk.",
+    "The meeting is scheduled for three o'clock.",
+    "It's raining outside.",
+    "ok",
+    "thanks",
+    "I'm not sad, just tired I guess.",
+    "I thought I'd be happy about it, but honestly I feel empty.",
+    "I'm excited about the trip but nervous about flying.",
+    "It's fine. Really. Everything is totally fine.",
+    "I don't hate it, but I don't love it either.",
+    "Honestly I'm proud of myself for getting through this week, even though parts of it were "
+    "really hard and I nearly gave up twice.",
+    "I keep replaying the conversation in my head and wondering whether I said something wrong, "
+    "and it's keeping me up at night.",
+    "After months of waiting, the letter finally arrived and I got in!",
+    "I'm so done with people pretending to be my friends.",
+)
+
+BATCH_SIZES = (1, 8, 32)
+
+
+def scores(pipeline, texts: list, batch_size: int) -> tuple:
+    """(labels, probability matrix in a fixed label order)"""
+    outputs = pipeline(list(texts), batch_size=batch_size, truncation=True)
+    label_order = sorted(item["label"] for item in outputs[0])
+    matrix = np.array([[{i["label"]: i["score"] for i in out}[label] for label in label_order] for out in outputs])
+    labels = [label_order[i] for i in matrix.argmax(axis=1)]
+    return labels, matrix
+
+
+def throughput(pipeline, batch_size: int, repeats: int) -> float:
+    texts = list(SAMPLES) * max(1, 64 // len(SAMPLES) + 1)
+    best = 0.0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        pipeline(texts, batch_size=batch_size, truncation=True)
+        best = max(best, len(texts) / (time.perf_counter() - started))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Text emotion backend parity + speed benchmark")
+    parser.add_argument("--backends", default=",".join(TEXT_BACKENDS))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--min-agreement", type=float, default=0.95)
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(",")]
+    if "torch" not in backends:
+        backends.insert(0, "torch")
+
+    reference = None
+    failed = False
+    header = f"{'backend':>11} {'load s':>7} {'agree':>7} {'max dp':>8} {'mean dp':>8} {'1-text ms':>10}"
+    header += "".join(f" {f'b{b} txt/s':>11}" for b in BATCH_SIZES)
+    print(header)
+
+    for backend in backends:
+        started = time.perf_counter()
+        try:
+            pipeline = build_pipeline(backend)
+        except Exception as e:
+            print(f"{backend:>11}  unavailable: {type(e).__name__}: {e}")
+            continue
+        load_seconds = time.perf_counter() - started
+        pipeline("warming up")
+
+        labels, matrix = scores(pipeline, SAMPLES, batch_size=8)
+        if reference is None:
+            reference = (labels, matrix)
+        ref_labels, ref_matrix = reference
+
+        agreement = float(np.mean([a == b for a, b in zip(labels, ref_labels)]))
+        diff = np.abs(matrix - ref_matrix)
+        failed |= agreement < args.min_agreement
+
+        _, single = timed(pipeline, SAMPLES[0], repeats=max(5, args.repeats))
+        rates = [throughput(pipeline, b, args.repeats) for b in BATCH_SIZES]
+
+        print(
+            f"{backend:>11} {load_seconds:>7.1f} {agreement * 100:>6.1f}% {diff.max():>8.4f} {diff.mean():>8.4f} "
+            f"{statistics.median(single) * 1000:>10.1f}" + "".join(f" {r:>11.1f}" for r in rates)
+        )
+        if agreement < 1.0:
+            for text, a, b in zip(SAMPLES, ref_labels, labels):
+                if a != b:
+                    print(f"{'':>13}{a} -> {b}: {text[:60]}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
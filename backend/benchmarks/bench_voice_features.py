@@ -0,0 +1,106 @@
+"""
+benchmarks/bench_voice_features.py
+----------------------------------
+Shared-STFT feature engine vs the original per-feature librosa calls
+
+Run from backend/:
+    python -m benchmarks.bench_voice_features [--repeats 5]
+
+Prints per-clip latency and speedup, and fails (exit 1) if any feature
+drifts beyond FEATURE_ATOL + FEATURE_RTOL * |reference|.
+"""
+
+import argparse
+import statistics
+import sys
+
+import librosa
+import numpy as np
+
+from app.services.voice_features import (
+    FEATURE_ATOL,
+    FEATURE_RTOL,
+    compute_spectral_features,
+)
+from benchmarks.signals import synthetic_voice, timed
+
+SR = 22050
+DURATIONS = (2.0, 5.0, 15.0, 30.0)
+
+
+def legacy_spectral_features(y: np.ndarray, sr: int) -> dict:
+    """The non-pitch part of the original _extract_features, verbatim"""
+    rms = librosa.feature.rms(y=y)[0]
+    mean_energy = float(np.mean(rms))
+    energy_std = float(np.std(rms))
+    energy_max = float(np.max(rms))
+
+    spectral_centroids = librosa.feature.spectral_centroid(y=y, sr=sr)[0]
+    spectral_rolloff = librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
+    zcr = librosa.feature.zero_crossing_rate(y)[0]
+    mfccs = librosa.feature.mfcc(y=y, sr=sr, n_mfcc=13)
+    tempo, _ = librosa.beat.beat_track(y=y, sr=sr)
+
+    return {
+        "mean_energy": mean_energy,
+        "energy_std": energy_std,
+        "energy_cv": energy_std / (mean_energy + 1e-8),
+        "dynamic_range": energy_max / (mean_energy + 1e-8),
+        "mean_spectral_centroid": float(np.mean(spectral_centroids)),
+        "mean_spectral_rolloff": float(np.mean(spectral_rolloff)),
+        "mean_zcr": float(np.mean(zcr)),
+        "tempo": float(np.atleast_1d(tempo)[0]),
+        "mfcc_mean": [float(np.mean(m)) for m in mfccs],
+    }
+
+
+def _flatten(features: dict) -> dict:
+    flat = {k: v for k, v in features.items() if k != "mfcc_mean"}
+    for i, v in enumerate(features["mfcc_mean"]):
+        flat[f"mfcc_{i + 1}"] = v
+    return flat
+
+
+def compare(reference: dict, candidate: dict) -> list:
+    """Return [(key, ref, new)] for values outside the documented tolerance"""
+    ref, new = _flatten(reference), _flatten(candidate)
+    return [
+        (key, ref[key], new[key])
+        for key in ref
+        if abs(new[key] - ref[key]) > FEATURE_ATOL + FEATURE_RTOL * abs(ref[key])
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-STFT feature engine benchmark")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    # Warm numba / caches so neither side pays first-call costs
+    y_warm, _, _ = synthetic_voice(1.0, SR)
+    legacy_spectral_features(y_warm, SR)
+    compute_spectral_features(y_warm, SR)
+
+    print(f"{'clip':>8} {'legacy ms':>10} {'engine ms':>10} {'speedup':>8}  mismatches")
+    failed = False
+    for seconds in DURATIONS:
+        y, _, _ = synthetic_voice(seconds, SR, seed=int(seconds))
+
+        reference, legacy_t = timed(legacy_spectral_features, y, SR, repeats=args.repeats)
+        candidate, engine_t = timed(compute_spectral_features, y, SR, repeats=args.repeats)
+
+        legacy_ms = statistics.median(legacy_t) * 1000
+        engine_ms = statistics.median(engine_t) * 1000
+        mismatches = compare(reference, candidate)
+        failed |= bool(mismatches)
+
+        print(
+            f"{seconds:>7.1f}s {legacy_ms:>10.1f} {engine_ms:>10.1f} "
+            f"{legacy_ms / engine_ms:>7.2f}x  {mismatches or '-'}"
+        )
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
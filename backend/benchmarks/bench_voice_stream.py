@@ -0,0 +1,111 @@
+"""
+benchmarks/bench_voice_stream.py
+--------------------------------
+Live voice: time from end of speech to final transcript + emotion
+
+Run from backend/:
+    python -m benchmarks.bench_voice_stream [--audio samples/*.wav] [--profile tiny-int8-greedy]
+
+Per clip compares:
+- upload: the whole clip is analyzed after the user stops (analyze_voice)
+- stream: the clip is fed in 20 ms frames at --speed x real time; the
+  stable segments are already transcribed when the endpoint is detected,
+  so only the tail is left (finalize_ms, summed over the clip's utterances)
+
+Also reports partial / emotion update counts per clip. Without --audio,
+synthetic voiced clips with 300 ms pauses are used (no words, so Whisper
+returns early; use real recordings for numbers you quote).
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import numpy as np
+
+from app.core.model_registry import get_model
+from app.services.audio_decode import DecodedAudio
+from app.services.stt import STT_PROFILES, WHISPER_SR
+from app.services.voice_emotion import analyze_voice
+from app.services.voice_stream import VoiceStream
+from benchmarks.signals import synthetic_voice, to_wav_bytes
+
+FRAME_S = 0.02
+
+
+def synthetic_speech(seconds: float, seed: int = 0) -> np.ndarray:
+    """Voiced phrases of ~2 s separated by 300 ms pauses"""
+    parts = []
+    for i in range(max(1, int(seconds // 2.3))):
+        parts.append(synthetic_voice(2.0, WHISPER_SR, noise=0.001, seed=seed + i)[0])
+        parts.append(np.zeros(int(0.3 * WHISPER_SR), dtype=np.float32))
+    return np.concatenate(parts)
+
+
+def load_clips(paths: list) -> list:
+    if not paths:
+        return [(f"synthetic {s:.0f}s", synthetic_speech(s, seed=int(s))) for s in (3.0, 10.0, 25.0)]
+    clips = []
+    for path in paths:
+        with open(path, "rb") as f:
+            clips.append((os.path.basename(path), DecodedAudio.from_bytes(f.read()).at(WHISPER_SR)))
+    return clips
+
+
+async def stream_clip(y: np.ndarray, profile: str, speed: float) -> dict:
+    events = []
+
+    async def emit(event):
+        events.append(event)
+
+    stream = VoiceStream(emit, audio_format="f32", stt_profile=profile)
+    frame = int(FRAME_S * WHISPER_SR)
+    padded = np.concatenate((y, np.zeros(WHISPER_SR, dtype=np.float32)))  # trailing silence -> endpoint
+    for i in range(0, len(padded), frame):
+        await stream.feed(padded[i:i + frame].astype("<f4").tobytes())
+        await asyncio.sleep(FRAME_S / speed)
+    await stream.aclose()
+
+    finals = [e for e in events if e["type"] == "final"]
+    return {
+        "finalize_ms": sum(e["finalize_ms"] for e in finals),
+        "partials": sum(e["type"] == "partial" for e in events),
+        "emotions": sum(e["type"] == "emotion" for e in events),
+        "utterances": len(finals),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live voice stream benchmark")
+    parser.add_argument("--audio", nargs="*", default=[])
+    parser.add_argument("--profile", default="tiny-int8-greedy", choices=list(STT_PROFILES))
+    parser.add_argument("--speed", type=float, default=1.0, help="feed rate, multiples of real time")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    profile = args.profile
+    get_model(STT_PROFILES[profile].model_name)  # load outside the timings
+
+    print(f"STT profile: {profile}, feed {args.speed:g}x real time\n")
+    print(f"{'clip':>16} {'seconds':>8} {'upload ms':>10} {'stream ms':>10} {'utts':>5} {'partials':>9} {'emotions':>9}")
+    for name, y in load_clips(args.audio):
+        wav = to_wav_bytes(y, WHISPER_SR)
+        upload = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            analyze_voice(wav, stt_profile=profile)
+            upload.append(time.perf_counter() - started)
+
+        runs = [asyncio.run(stream_clip(y, profile, args.speed)) for _ in range(args.repeats)]
+        last = runs[-1]
+        print(
+            f"{name[:16]:>16} {len(y) / WHISPER_SR:>8.1f} {statistics.median(upload) * 1000:>10.0f} "
+            f"{statistics.median(r['finalize_ms'] for r in runs):>10.0f} {last['utterances']:>5} "
+            f"{last['partials']:>9} {last['emotions']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+benchmarks/loadgen.py
+---------------------
+End-to-end load generator for the public endpoints
+
+Run from backend/:
+    # against a running server
+    python -m benchmarks.loadgen --url http://localhost:8000 --duration 30 --concurrency 16
+
+    # in-process (no uvicorn), LLM + TTS replaced by the local fakes
+    python -m benchmarks.loadgen --duration 30 --mix chat=4,analyze=2
+
+For the remote mode, start the server with the fakes to stay offline:
+    AIRA_LLM_BACKEND=fake AIRA_TTS_BACKEND=fake uvicorn app.main:app
+
+Drives /api/chat, /analyze, /analyze-voice and /face-emotion with
+synthetic text, WAVs and images, then reports per endpoint:
+throughput, p50 / p95 / p99 latency and error rate (by status).
+
+Closed loop by default (`--concurrency` workers back to back). With
+`--rate` requests arrive open loop (Poisson) and latency is measured
+from the scheduled arrival, so queueing in the server is not hidden.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from collections import defaultdict
+
+import httpx
+
+from app.core.stats import percentile_ms
+from benchmarks.signals import synthetic_face, synthetic_voice, to_png_bytes, to_wav_bytes
+
+ENDPOINTS = ("chat", "analyze", "voice", "face")
+
+TEXTS = (
+    "I finally finished the project and I feel great about it",
+    "I don't know, everything just feels heavy today",
+    "Why does nobody ever listen to what I say",
+    "I'm nervous about the interview tomorrow",
+    "We went to the beach and it was lovely",
+    "I can't believe they cancelled again, this is so annoying",
+    "Honestly I'm just tired",
+    "My sister is visiting next week, I'm so excited",
+)
+
+
+class Payloads:
+    """A small pool of synthetic inputs, built once and reused"""
+
+    def __init__(self, seed: int = 0, variants: int = 4):
+        self.rng = random.Random(seed)
+        self.wavs = [
+            to_wav_bytes(synthetic_voice(2.0 + i, sr=16000, f0=110.0 + 40 * i, seed=i)[0], 16000)
+            for i in range(variants)
+        ]
+        self.images = [to_png_bytes(synthetic_face(224 + 32 * i, seed=i)) for i in range(variants)]
+
+    def text(self) -> str:
+        # A random suffix defeats the result caches unless --repeat-inputs
+        return f"{self.rng.choice(TEXTS)} ({self.rng.randrange(10 ** 6)})"
+
+    def request(self, endpoint: str, repeat_inputs: bool) -> dict:
+        text = self.rng.choice(TEXTS) if repeat_inputs else self.text()
+        wav = self.rng.choice(self.wavs)
+        image = self.rng.choice(self.images)
+
+        if endpoint == "chat":
+            return {"method": "POST", "url": "/api/chat", "json": {"text": text}}
+        if endpoint == "analyze":
+            return {
+                "method": "POST", "url": "/analyze",
+                "data": {"text": text},
+                "files": {"audio": ("clip.wav", wav, "audio/wav"), "image": ("face.png", image, "image/png")},
+            }
+        if endpoint == "voice":
+            return {"method": "POST", "url": "/analyze-voice", "files": {"file": ("clip.wav", wav, "audio/wav")}}
+        if endpoint == "face":
+            return {"method": "POST", "url": "/face-emotion", "files": {"file": ("face.png", image, "image/png")}}
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+
+
+class Results:
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.dropped = 0
+
+    def record(self, endpoint: str, status, seconds: float):
+        self.statuses[endpoint][status] += 1
+        if status == 200:
+            self.latencies[endpoint].append(seconds)
+
+    def report(self, elapsed: float) -> dict:
+        report = {}
+        for endpoint in sorted(self.statuses):
+            statuses = self.statuses[endpoint]
+            total = sum(statuses.values())
+            ok = statuses.get(200, 0)
+            latencies = sorted(self.latencies[endpoint])
+            report[endpoint] = {
+                "requests": total,
+                "ok": ok,
+                "throughput_rps": round(ok / elapsed, 2),
+                "error_rate": round(1 - ok / total, 4) if total else 0.0,
+                "errors": {str(k): v for k, v in statuses.items() if k != 200},
+                "p50_ms": percentile_ms(latencies, 50),
+                "p95_ms": percentile_ms(latencies, 95),
+                "p99_ms": percentile_ms(latencies, 99),
+                "mean_ms": round(statistics.fmean(latencies) * 1000, 1) if latencies else None,
+            }
+        return report
+
+
+def parse_mix(mix: str) -> dict:
+    """'chat=4,analyze=2' -> {'chat': 4.0, 'analyze': 2.0}"""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint '{name}', choose from {', '.join(ENDPOINTS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def send(client: httpx.AsyncClient, payloads: Payloads, results: Results,
+               endpoint: str, repeat_inputs: bool, started: float):
+    spec = payloads.request(endpoint, repeat_inputs)
+    try:
+        response = await client.request(**spec)
+        status = response.status_code
+    except httpx.TimeoutException:
+        status = "timeout"
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    results.record(endpoint, status, time.perf_counter() - started)
+
+
+async def closed_loop(client, payloads, results, weights, args, deadline):
+    names, cumulative = list(weights), list(weights.values())
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            endpoint = payloads.rng.choices(names, cumulative)[0]
+            await send(client, payloads, results, endpoint, args.repeat_inputs, time.perf_counter())
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+
+
+async def open_loop(client, payloads, results, weights, args, deadline):
+    names, cumulative = list(weights), list(weights.values())
+    in_flight = set()
+    next_at = time.perf_counter()
+
+    while True:
+        next_at += payloads.rng.expovariate(args.rate)
+        if next_at >= deadline:
+            break
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+
+        if len(in_flight) >= args.concurrency:
+            # Client-side cap reached: count it instead of silently waiting
+            results.dropped += 1
+            continue
+
+        endpoint = payloads.rng.choices(names, cumulative)[0]
+        task = asyncio.create_task(send(client, payloads, results, endpoint, args.repeat_inputs, next_at))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+async def fetch_health(client: httpx.AsyncClient) -> dict:
+    """Server-side view (pools, caches, LLM) after the run"""
+    health = {}
+    for name in ("executors", "batchers", "caches", "llm"):
+        try:
+            response = await client.get(f"/health/{name}")
+            if response.status_code == 200:
+                health[name] = response.json()
+        except httpx.HTTPError:
+            pass
+    return health
+
+
+async def run(args) -> dict:
+    weights = parse_mix(args.mix)
+    payloads = Payloads(seed=args.seed)
+    results = Results()
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits)
+        lifespan = None
+    else:
+        # In-process: same app, no sockets; offline fakes unless overridden
+        os.environ.setdefault("AIRA_LLM_BACKEND", "fake")
+        os.environ.setdefault("AIRA_TTS_BACKEND", "fake")
+        from app.main import app
+
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://loadgen", timeout=timeout, limits=limits,
+        )
+        lifespan = app.router.lifespan_context(app)
+        await lifespan.__aenter__()
+
+    try:
+        if args.warmup > 0:
+            print(f"Warming up for {args.warmup:.0f}s ...")
+            warmup_deadline = time.perf_counter() + args.warmup
+            await closed_loop(client, payloads, Results(), weights, args, warmup_deadline)
+
+        mode = f"open loop @ {args.rate} req/s" if args.rate else f"closed loop x{args.concurrency}"
+        print(f"Running {args.duration:.0f}s, {mode}, mix {weights}")
+        started = time.perf_counter()
+        deadline = started + args.duration
+        if args.rate:
+            await open_loop(client, payloads, results, weights, args, deadline)
+        else:
+            await closed_loop(client, payloads, results, weights, args, deadline)
+        elapsed = time.perf_counter() - started
+
+        return {
+            "elapsed_s": round(elapsed, 2),
+            "dropped": results.dropped,
+            "endpoints": results.report(elapsed),
+            "server": await fetch_health(client),
+        }
+    finally:
+        await client.aclose()
+        if lifespan is not None:
+            await lifespan.__aexit__(None, None, None)
+
+
+def print_report(report: dict):
+    print()
+    print(f"{'endpoint':>9} {'reqs':>6} {'rps':>7} {'err %':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  errors")
+    for endpoint, row in report["endpoints"].items():
+        print(
+            f"{endpoint:>9} {row['requests']:>6} {row['throughput_rps']:>7.2f} "
+            f"{row['error_rate'] * 100:>6.1f} {row['p50_ms'] or 0:>8.1f} "
+            f"{row['p95_ms'] or 0:>8.1f} {row['p99_ms'] or 0:>8.1f}  {row['errors'] or ''}"
+        )
+    print(f"\nelapsed {report['elapsed_s']}s, dropped (client cap) {report['dropped']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AIRA end-to-end load generator")
+    parser.add_argument("--url", default=None, help="Server base URL (default: in-process app)")
+    parser.add_argument("--mix", default="chat=4,analyze=2,voice=1,face=1",
+                        help="Endpoint weights, e.g. chat=4,analyze=2,voice=1,face=1")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds first")
+    parser.add_argument("--concurrency", type=int, default=8, help="Workers / max in-flight")
+    parser.add_argument("--rate", type=float, default=None, help="Open-loop arrivals per second")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout (s)")
+    parser.add_argument("--repeat-inputs", action="store_true",
+                        help="Reuse identical texts so result caches can hit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="Also write the full report here")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+benchmarks/signals.py
+---------------------
+Synthetic test signals shared by the benchmark scripts
+"""
+
+import io
+import struct
+import time
+import wave
+import zlib
+
+import numpy as np
+
+
+def synthetic_voice(seconds: float, sr: int = 22050, f0: float = 150.0,
+                    vibrato_hz: float = 5.0, vibrato_depth: float = 0.08,
+                    noise: float = 0.01, seed: int = 0):
+    """
+    Voiced speech-like signal with a known pitch track.
+
+    Harmonic tone whose F0 wobbles around `f0`, with a syllable-rate
+    amplitude envelope, short unvoiced gaps and a little noise.
+
+    Returns (y, true_f0_per_sample, voiced_mask_per_sample).
+    """
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sr)
+    t = np.arange(n) / sr
+
+    true_f0 = f0 * (1.0 + vibrato_depth * np.sin(2 * np.pi * vibrato_hz * t))
+    phase = 2 * np.pi * np.cumsum(true_f0) / sr
+
+    y = np.zeros(n)
+    for harmonic, weight in enumerate((1.0, 0.5, 0.3, 0.2, 0.1), start=1):
+        y += weight * np.sin(harmonic * phase)
+
+    # ~4 syllables per second with a pause every second
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 4 * t)
+    voiced = (t % 1.0) < 0.8
+    y = 0.2 * y * envelope * voiced + noise * rng.standard_normal(n)
+
+    return y.astype(np.float32), true_f0, voiced
+
+
+def to_wav_bytes(y: np.ndarray, sr: int) -> bytes:
+    """Encode float PCM in [-1, 1] as 16-bit mono WAV"""
+    pcm = (np.clip(y, -1.0, 1.0) * 32767).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sr)
+        wav.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+def synthetic_face(size: int = 256, seed: int = 0) -> np.ndarray:
+    """
+    Grayscale face-like image: skin-toned oval, two eyes, a mouth and
+    some noise. Enough for a detector to have something to chew on.
+    """
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:size, 0:size] / size
+
+    img = np.full((size, size), 40.0)
+    face = ((xx - 0.5) / 0.32) ** 2 + ((yy - 0.5) / 0.42) ** 2 < 1.0
+    img[face] = 190.0
+    for cx in (0.38, 0.62):
+        img[((xx - cx) / 0.06) ** 2 + ((yy - 0.4) / 0.03) ** 2 < 1.0] = 30.0
+    mouth = (((xx - 0.5) / 0.14) ** 2 + ((yy - 0.68) / 0.04) ** 2 < 1.0) & (yy > 0.68)
+    img[mouth] = 60.0
+
+    img += rng.normal(0.0, 6.0, img.shape)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def to_png_bytes(img: np.ndarray) -> bytes:
+    """Encode a 2-D uint8 array as a grayscale PNG (stdlib only)"""
+    height, width = img.shape
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = b"".join(b"\x00" + img[row].tobytes() for row in range(height))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows, 6))
+        + chunk(b"IEND", b"")
+    )
+
+
+def timed(fn, *args, repeats: int = 5, **kwargs):
+    """Run fn repeatedly; return (last_result, [seconds per run])"""
+    timings = []
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = fn(*args, **kwargs)
+        timings.append(time.perf_counter() - started)
+    return result, timings